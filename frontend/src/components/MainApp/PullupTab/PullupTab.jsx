@@ -48,17 +48,16 @@ function PullupTab() {
     const sendSensorData = async () => {
       try {
         setLoadingData(true);
-        const response = await fetch("http://localhost:5000/send_location", {
-          method: "POST",
-          headers: {
-            "Content-Type": "application/json",
-          },
-          body: JSON.stringify({
-            lon: sensorContext.sensorPoint[0],
-            lat: sensorContext.sensorPoint[1],
-            climateVar: sensorContext.sensorForm.climateVar,
-          }),
+        // Single cacheable GET request (ETag / Cache-Control handled by the browser)
+        const query = new URLSearchParams({
+          lon: sensorContext.sensorPoint[0],
+          lat: sensorContext.sensorPoint[1],
+          climate_var: sensorContext.sensorForm.climateVar,
+          aggregation: "hourly",
         });
+        const response = await fetch(
+          `http://localhost:5000/v1/sensor/time_series?${query}`
+        );
 
         if (!response.ok) {
           throw new Error(
@@ -87,14 +86,17 @@ function PullupTab() {
   useEffect(() => {
     if (sensorData) {
       const chartDataPrep = {
-        labels: sensorData.DATES, // X-axis: Time (DATES)
+        // X-axis: Time (epoch seconds, UTC --> "YYYY-MM-DD HH:MM")
+        labels: sensorData.TIMES.map((time) =>
+          new Date(time * 1000).toISOString().slice(0, 16).replace("T", " ")
+        ),
         datasets: [
           {
             label:
               sensorContext.sensorForm.climateVar === "rh2m"
                 ? "Rel. Humid (%)"
                 : "Dewpoint Temp (°F)",
-            data: sensorData.DATA, // Y-axis: Data values
+            data: sensorData.DATA.value, // Y-axis: Data values
             fill: true,
             borderColor: "rgba(0, 0, 140, 1.00)",
             backgroundColor: "rgba(93, 63, 211, 0.35777)",
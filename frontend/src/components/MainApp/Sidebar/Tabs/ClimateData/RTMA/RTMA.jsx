@@ -184,13 +184,14 @@ function RTMA() {
         const sendRTMAData = async() => {
             try {
                 handleLoading(true) ;
-                const response = await fetch("http://localhost:5000/send_RTMA_request", {
-                    method: "POST",
-                    headers: {
-                        "Content-Type": "application/json",
-                    },
-                    body: JSON.stringify(preparedForm), 
+                // Single cacheable GET request (ETag / Cache-Control handled by the browser)
+                const query = new URLSearchParams({
+                    year: preparedForm.year,
+                    month: preparedForm.month,
+                    day: preparedForm.day,
+                    hour: preparedForm.hour,
                 }) ;
+                const response = await fetch(`http://localhost:5000/v1/rtma?${query}`) ;
                 if(!response.ok){
                     throw new Error("ERROR: Request could not be processed. Reload & Try Again.")
                 }
@@ -182,15 +182,16 @@ function SensorData() {
     const sendSensorData = async () => {
       try {
         handleLoading(true);
+        // Single cacheable GET request (ETag / Cache-Control handled by the browser)
+        const query = new URLSearchParams({
+          year: preparedForm.year,
+          month: preparedForm.month,
+          day: preparedForm.day,
+          hour: preparedForm.hour,
+          climate_var: preparedForm.climateVar,
+        });
         const response = await fetch(
-          "http://localhost:5000/send_sensor_vis_request",
-          {
-            method: "POST", // POST declaration
-            headers: {
-              "Content-Type": "application/json",
-            },
-            body: JSON.stringify(preparedForm), // Send user variables as JSON to POST request
-          }
+          `http://localhost:5000/v1/sensor/vis?${query}`
         );
 
         console.log("IS MY RESPONSE OK?", response.ok);
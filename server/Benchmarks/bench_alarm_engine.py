@@ -0,0 +1,81 @@
+## --------------------------------------------------------------------------------------- ##
+##  Micro-Benchmark: Heat-Alarm Engine Hourly Update on a CONUS-Sized Grid                 ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Run from the `server/` directory (single core: set OMP_NUM_THREADS=1 / OPENBLAS_NUM_THREADS=1):
+### python -m Benchmarks.bench_alarm_engine --height 1597 --width 2345 --hours 48
+### python -m Benchmarks.bench_alarm_engine --sensor-file combined.nc      (also replays the sensor season)
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import argparse
+import datetime
+import time
+import numpy as np
+import orjson
+from Pipelines.Alarms.Alarm_Engine import Alarm_Engine, load_alarm_config
+from Pipelines.Alarms.Alarm_Sources import rtma_metrics, Sensor_Alarm_Source
+from Pipelines.Alarms.Alarm_Monitor import Alarm_Monitor
+
+
+def synthetic_hours(height, width, hours, seed=0) :
+    # RTMA-like fields (u, v, 2t, 2sh, sp) with a diurnal cycle --> alarms switch on and off
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(295, 315, (height, width)).astype(np.float32)
+    moisture = rng.uniform(0.004, 0.018, (height, width)).astype(np.float32)
+    pressure = np.full((height, width), 95000, dtype=np.float32)
+    wind = rng.uniform(-5, 5, (2, height, width)).astype(np.float32)
+    for hour in range(hours) :
+        temperature = base + np.float32(6 * np.sin(2 * np.pi * hour / 24))
+        yield wind[0], wind[1], temperature, moisture, pressure
+
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='Heat-alarm engine micro-benchmark')
+    parser.add_argument('--height', type=int, default=1597)
+    parser.add_argument('--width', type=int, default=2345)
+    parser.add_argument('--hours', type=int, default=48)
+    parser.add_argument('--sensor-file', default=None)
+    args = parser.parse_args()
+
+    zones, rules = load_alarm_config()
+    engine = Alarm_Engine(rules, zones)
+    longitude = np.linspace(-125, -67, args.width)
+    latitude = np.linspace(25, 50, args.height)
+    start = datetime.datetime(2024, 7, 1)
+
+    metric_seconds, update_seconds = [], []
+    for hour, fields in enumerate(synthetic_hours(args.height, args.width, args.hours)) :
+        began = time.perf_counter()
+        metrics = rtma_metrics(*fields)
+        computed = time.perf_counter()
+        engine.update(start + datetime.timedelta(hours=hour), metrics, longitude, latitude)
+        metric_seconds.append(computed - began)
+        update_seconds.append(time.perf_counter() - computed)
+    began = time.perf_counter()
+    features = engine.polygons(rules[0].rule_id)
+    polygon_seconds = time.perf_counter() - began
+
+    report = {
+        'grid' : [args.height, args.width] ,
+        'rules' : len(rules) ,
+        'hours' : args.hours ,
+        'metrics_median_seconds' : float(np.median(metric_seconds)) ,
+        'engine_update_median_seconds' : float(np.median(update_seconds[1:] or update_seconds)) ,
+        'polygons_seconds' : polygon_seconds ,
+        'polygons' : len(features) ,
+    }
+
+    # Season replay of the sensor dataset (slab reads + metrics + engine)
+    if args.sensor_file is not None :
+        monitor = Alarm_Monitor(Sensor_Alarm_Source(args.sensor_file), rules, zones)
+        replay = monitor.replay(datetime.datetime(1900, 1, 1), datetime.datetime(2100, 1, 1))
+        report['sensor_replay'] = {'hours' : len(replay['TIMES']), 'seconds' : replay['SECONDS']}
+
+    print(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode())
@@ -0,0 +1,82 @@
+## --------------------------------------------------------------------------------------- ##
+##  Micro-Benchmark: Colormap LUT Renderer vs. Matplotlib Float RGBA Path                  ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Run from the `server/` directory:
+### python -m Benchmarks.bench_colormap_lut --height 1100 --width 1600 --repeat 10
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import argparse
+import time
+import tracemalloc
+import numpy as np
+import orjson
+from matplotlib import colormaps
+from matplotlib.colors import Normalize
+from Pipelines.Common.Colormap_LUT import get_colormap_lut
+
+
+def render_matplotlib(array, vmin, vmax, cmap='turbo') :
+    # Previous renderer used by both `produce_vis_json` implementations
+    norm_values = Normalize(vmin=vmin, vmax=vmax)
+    rgba_image = colormaps[cmap](norm_values(array))
+    alpha_channel = np.ones(array.shape)
+    alpha_channel[(np.isnan(array))] = 0
+    rgba_image[:, :, 3] = alpha_channel
+    rgba_image = (rgba_image * 255).astype(np.uint8)
+    return rgba_image[::-1, :]
+
+
+def render_lut(array, vmin, vmax, cmap='turbo', out=None) :
+    return get_colormap_lut(cmap, vmin, vmax).render(array, out=out)
+
+
+def measure(function, repeat) -> dict :
+    # Best wall time and peak traced allocation over `repeat` runs
+    timings = []
+    peak = 0
+    for _ in range(repeat) :
+        tracemalloc.start()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {'best_seconds': min(timings), 'median_seconds': float(np.median(timings)), 'peak_bytes': peak}
+
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='Colormap LUT renderer micro-benchmark')
+    parser.add_argument('--height', type=int, default=1100)
+    parser.add_argument('--width', type=int, default=1600)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--dtype', default='float64', choices=['float32', 'float64'])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for vmin, vmax in ((0, 120), (10, 90), (20, 80)) :
+        array = rng.uniform(vmin - 20, vmax + 20, (args.height, args.width)).astype(args.dtype)
+        array[rng.random(array.shape) < 0.05] = np.nan
+        out = np.empty(array.shape + (4,), dtype=np.uint8)
+
+        # Outputs must be byte-for-byte identical before timings mean anything
+        if not np.array_equal(render_matplotlib(array, vmin, vmax), render_lut(array, vmin, vmax)) :
+            raise SystemExit(f'LUT output differs from the matplotlib path for range ({vmin}, {vmax})')
+
+        results[f'{vmin}-{vmax}'] = {
+            'matplotlib' : measure(lambda: render_matplotlib(array, vmin, vmax), args.repeat) ,
+            'lut' : measure(lambda: render_lut(array, vmin, vmax, out=out), args.repeat) ,
+        }
+
+    print(orjson.dumps(
+        {'shape': [args.height, args.width], 'dtype': args.dtype, 'equal_output': True, 'results': results},
+        option=orjson.OPT_INDENT_2
+    ).decode())
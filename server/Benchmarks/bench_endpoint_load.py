@@ -0,0 +1,234 @@
+## --------------------------------------------------------------------------------------- ##
+##  Benchmark: End-to-End Endpoint Load Tests Against the FastAPI App (Synthetic Fixtures)  ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# `main.py` runs under uvicorn in a subprocess (working directory --> the fixture directory, so it reads the
+# synthetic `combined.nc`; RTMA requests go to the local S3 stand-in). Each scenario is driven by `concurrency`
+# aiohttp workers until `requests` responses came back; throughput, latency percentiles, status codes,
+# and the server's resident memory (current and high-water mark) are reported per concurrency level.
+#
+# Run from the `server/` directory:
+### python -m Benchmarks.bench_endpoint_load --data bench_data --concurrency 1 4 16 --requests 100 --output load.json
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import argparse
+import asyncio
+import datetime
+import os
+import socket
+import subprocess
+import sys
+import time
+import aiohttp
+import numpy as np
+import orjson
+import xarray as xr
+from Benchmarks.bench_fixtures import build_fixtures, Local_S3, SENSOR_BOUNDS
+
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+## --------------------------------------------------------------- ##
+##                    Server Under Test                            ##
+## --------------------------------------------------------------- ##
+def free_port() -> int :
+    with socket.socket() as probe :
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+class Server_Process :
+    # `uvicorn main:app` with the fixture directory as working directory and throwaway caches
+    def __init__(self, data_dir, environment=None, workers=1) :
+        self.port = free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+        env = dict(os.environ)
+        env.update(environment or {})
+        env['PYTHONPATH'] = os.pathsep.join([SERVER_DIR, env.get('PYTHONPATH', '')]).rstrip(os.pathsep)
+        env.setdefault('RTMA_CACHE_DIR', os.path.join(os.path.abspath(data_dir), 'cache', f'products-{self.port}'))
+        env.setdefault('RTMA_REGRID_CACHE', os.path.join(os.path.abspath(data_dir), 'cache', 'regrid'))
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(self.port), '--log-level', 'warning', '--workers', str(workers)],
+            cwd = data_dir, env = env ,
+        )
+
+
+    async def wait_ready(self, timeout=120) :
+        deadline = time.monotonic() + timeout
+        async with aiohttp.ClientSession() as session :
+            while time.monotonic() < deadline :
+                if self.process.poll() is not None :
+                    raise RuntimeError(f'Server exited with status {self.process.returncode}')
+                try:
+                    async with session.get(f'{self.url}/executor_stats') as response :
+                        if response.status == 200 :
+                            return
+                except aiohttp.ClientError :
+                    pass
+                await asyncio.sleep(0.2)
+        raise TimeoutError('Server did not start in time')
+
+
+    def memory_mb(self) -> dict :
+        # Resident set of the server process (Linux `/proc`) --> current and high-water mark
+        try:
+            with open(f'/proc/{self.process.pid}/status') as status :
+                fields = dict(line.split(':', 1) for line in status if ':' in line)
+            return {
+                'rss_mb' : round(int(fields['VmRSS'].split()[0]) / 1024, 1) ,
+                'peak_rss_mb' : round(int(fields['VmHWM'].split()[0]) / 1024, 1) ,
+            }
+        except (OSError, KeyError) :
+            return {'rss_mb' : None, 'peak_rss_mb' : None}
+
+
+    def stop(self) :
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired :
+            self.process.kill()
+
+
+
+## --------------------------------------------------------------- ##
+##                     Request Scenarios                           ##
+## --------------------------------------------------------------- ##
+def scenarios(sensor_times, rtma_times, seed=0) -> dict :
+    # Scenario name --> generator of (path, query) pairs (random hours / pixels, so requests are not coalesced)
+    rng = np.random.default_rng(seed)
+
+    def sensor_vis() :
+        while True :
+            valid_time = sensor_times[rng.integers(len(sensor_times))]
+            yield '/v1/sensor/vis', {
+                'year' : valid_time.year, 'month' : valid_time.month, 'day' : valid_time.day, 'hour' : valid_time.hour,
+                'climate_var' : 'td2m', 'format' : 'binary',
+            }
+
+    def sensor_time_series() :
+        while True :
+            yield '/v1/sensor/time_series', {
+                'lon' : round(float(rng.uniform(SENSOR_BOUNDS[0], SENSOR_BOUNDS[2])), 4) ,
+                'lat' : round(float(rng.uniform(SENSOR_BOUNDS[1], SENSOR_BOUNDS[3])), 4) ,
+                'climate_var' : 'td2m' ,
+                'aggregation' : 'daily' ,
+            }
+
+    def rtma() :
+        while True :
+            valid_time = rtma_times[rng.integers(len(rtma_times))]
+            yield '/v1/rtma', {
+                'year' : valid_time.year, 'month' : valid_time.month, 'day' : valid_time.day, 'hour' : valid_time.hour,
+                'format' : 'binary',
+            }
+
+    return {'sensor_vis' : sensor_vis(), 'sensor_time_series' : sensor_time_series(), 'rtma' : rtma()}
+
+
+async def run_level(url, requests, concurrency, total) -> dict :
+    # `concurrency` workers share one request stream until `total` responses came back
+    latencies, statuses, sizes = [], {}, []
+    remaining = [total]
+
+    async def worker(session) :
+        while remaining[0] > 0 :
+            remaining[0] -= 1
+            path, query = next(requests)
+            start = time.perf_counter()
+            try:
+                async with session.get(f'{url}{path}', params=query) as response :
+                    body = await response.read()
+                    status = str(response.status)
+            except aiohttp.ClientError as e :
+                body, status = b'', type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+            sizes.append(len(body))
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=300)) as session :
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        seconds = time.perf_counter() - start
+
+    latencies = np.asarray(latencies)
+    return {
+        'concurrency' : concurrency ,
+        'requests' : len(latencies) ,
+        'seconds' : seconds ,
+        'throughput_rps' : len(latencies) / seconds ,
+        'latency_p50_seconds' : float(np.percentile(latencies, 50)) ,
+        'latency_p95_seconds' : float(np.percentile(latencies, 95)) ,
+        'latency_p99_seconds' : float(np.percentile(latencies, 99)) ,
+        'latency_max_seconds' : float(latencies.max()) ,
+        'statuses' : statuses ,
+        'mean_response_bytes' : float(np.mean(sizes)) ,
+    }
+
+
+async def load_test(server, sensor_times, rtma_times, concurrency_levels=(1, 4, 16), total=100, names=None) -> dict :
+    await server.wait_ready()
+    results = {}
+    for name, requests in scenarios(sensor_times, rtma_times).items() :
+        if names is not None and name not in names :
+            continue
+        # One untimed request warms the lanes, dataset handles, and regrid plans
+        await run_level(server.url, requests, 1, 1)
+        results[name] = []
+        for concurrency in concurrency_levels :
+            level = await run_level(server.url, requests, concurrency, total)
+            level.update(server.memory_mb())
+            results[name].append(level)
+    return results
+
+
+def run_load_tests(data_dir, fixtures, s3, concurrency_levels=(1, 4, 16), total=100, names=None, workers=1) -> dict :
+    with xr.open_dataset(fixtures['sensor'], engine='h5netcdf') as ds :
+        sensor_times = [valid_time.astype('datetime64[s]').item() for valid_time in ds['time'].values]
+    server = Server_Process(data_dir, s3.environment(), workers)
+    try:
+        return asyncio.run(load_test(server, sensor_times, list(fixtures['rtma']), concurrency_levels, total, names))
+    finally:
+        server.stop()
+
+
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='End-to-end endpoint load tests on synthetic fixtures')
+    parser.add_argument('--data', default='bench_data')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--scenarios', nargs='+', default=None)
+    parser.add_argument('--rtma-hours', type=int, default=3)
+    parser.add_argument('--rtma-scale', type=int, default=1)
+    parser.add_argument('--sensor-days', type=int, default=184)
+    parser.add_argument('--pixel-major', action='store_true')
+    parser.add_argument('--server-workers', type=int, default=1)
+    parser.add_argument('--s3-endpoint', default=None)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    fixtures = build_fixtures(
+        args.data, datetime.datetime(2024, 7, 15, 12), args.rtma_hours, args.rtma_scale, args.sensor_days, pixel_major=args.pixel_major
+    )
+    s3 = Local_S3(args.s3_endpoint)
+    try:
+        s3.upload_rtma(fixtures['rtma'])
+        report = run_load_tests(args.data, fixtures, s3, args.concurrency, args.requests, args.scenarios, args.server_workers)
+    finally:
+        s3.stop()
+
+    content = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+    if args.output is not None :
+        with open(args.output, 'wb') as output_file :
+            output_file.write(content)
+    print(content.decode())
@@ -0,0 +1,264 @@
+## --------------------------------------------------------------------------------------- ##
+##  Benchmark Fixtures: Synthetic RTMA GRIB2 Hours, Sensor Dataset, and Local S3 Stand-In  ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Deterministic, correctly shaped inputs for the offline benchmarks (no NOAA bucket, no real `combined.nc`):
+#   * RTMA    --> one `2dvaranl_ndfd.grb2` file per hour on the 2.5 km Lambert conformal CONUS grid
+#                 (2345 x 1597, `--rtma-scale` shrinks it) with 10u, 10v, 2t, 2sh, and sp messages
+#                 (simple packing, 16 bits) plus the `.idx` inventory used by the byte-range fetches
+#   * Sensors --> `combined.nc` with `td2m` (K) and `rh2m` (%) on (time, south_north, west_east)
+#   * S3      --> a moto server on localhost, or any S3 endpoint given with `--s3-endpoint`
+#                 (e.g. the SeaweedFS gateway of `start_seaweedfs.sh`)
+#
+# Run from the `server/` directory (writes the fixtures only):
+### python -m Benchmarks.bench_fixtures --out bench_data --rtma-hours 3 --sensor-days 90
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import argparse
+import datetime
+import logging
+import os
+import numpy as np
+import pandas as pd
+import xarray as xr
+from Pipelines.Sensors.Sensor_Rechunk import pixel_major_path, pixel_major_is_current, write_pixel_major
+
+
+# NCEP 2.5 km CONUS grid (RTMA / NDFD) --> Lambert conformal, standard parallel 25°N, orientation 265°E
+RTMA_GRID = {
+    'Nx' : 2345 ,
+    'Ny' : 1597 ,
+    'latitudeOfFirstGridPointInDegrees' : 19.228976 ,
+    'longitudeOfFirstGridPointInDegrees' : 233.723448 ,
+    'LaDInDegrees' : 25.0 ,
+    'LoVInDegrees' : 265.0 ,
+    'Latin1InDegrees' : 25.0 ,
+    'Latin2InDegrees' : 25.0 ,
+    'DxInMetres' : 2539.703 ,
+    'DyInMetres' : 2539.703 ,
+    'latitudeOfSouthernPoleInDegrees' : -90.0 ,
+    'longitudeOfSouthernPoleInDegrees' : 0.0 ,
+}
+# (short name, `.idx` variable, `.idx` level, discipline, category, number, fixed surface type, level)
+RTMA_MESSAGES = [
+    ('2t', 'TMP', '2 m above ground', 0, 0, 0, 103, 2),
+    ('10u', 'UGRD', '10 m above ground', 0, 2, 2, 103, 10),
+    ('10v', 'VGRD', '10 m above ground', 0, 2, 3, 103, 10),
+    ('2sh', 'SPFH', '2 m above ground', 0, 1, 0, 103, 2),
+    ('sp', 'PRES', 'surface', 0, 3, 0, 1, 0),
+]
+RTMA_BUCKET = 'noaa-rtma-pds'
+RTMA_SUFFIX = '2dvaranl_ndfd.grb2'
+# Imperial Valley extent of the sensor dataset
+SENSOR_BOUNDS = (-116.1, 32.6, -114.5, 33.4)
+
+
+## --------------------------------------------------------------- ##
+##                   Synthetic RTMA Analyses                       ##
+## --------------------------------------------------------------- ##
+def rtma_fields(nx, ny, valid_time, seed=0) -> dict :
+    # Smooth large-scale patterns + noise, diurnal cycle on temperature --> realistic value ranges
+    rng = np.random.default_rng(seed + valid_time.hour)
+    y, x = np.mgrid[0:ny, 0:nx].astype(np.float32)
+    x /= nx
+    y /= ny
+    diurnal = np.float32(8 * np.sin(2 * np.pi * (valid_time.hour - 9) / 24))
+    noise = rng.normal(0, 0.5, (ny, nx)).astype(np.float32)
+    temperature = 300 - 25 * y + 6 * np.sin(6 * x) + diurnal + noise
+    return {
+        '2t' : temperature ,
+        '10u' : 6 * np.sin(4 * x + 3 * y) + noise ,
+        '10v' : 5 * np.cos(5 * y - 2 * x) + noise ,
+        '2sh' : np.clip(0.004 + 0.012 * (1 - y) * (0.5 + 0.5 * np.sin(3 * x)), 0.0005, None) ,
+        'sp' : 101000 - 12000 * np.abs(np.sin(3 * x)) * (1 - y) + 50 * noise ,
+    }
+
+
+def write_rtma_grib(path, valid_time, scale=1, seed=0) -> str :
+    # One RTMA-shaped GRIB2 file + its `.idx` inventory (`number:offset:d=YYYYMMDDHH:VAR:level:anl:`)
+    import eccodes
+    grid = dict(RTMA_GRID)
+    grid['Nx'], grid['Ny'] = RTMA_GRID['Nx'] // scale, RTMA_GRID['Ny'] // scale
+    grid['DxInMetres'] = RTMA_GRID['DxInMetres'] * RTMA_GRID['Nx'] / grid['Nx']
+    grid['DyInMetres'] = RTMA_GRID['DyInMetres'] * RTMA_GRID['Ny'] / grid['Ny']
+    fields = rtma_fields(grid['Nx'], grid['Ny'], valid_time, seed)
+
+    inventory = []
+    with open(path, 'wb') as grib_file :
+        for number, (short_name, variable, level_name, discipline, category, parameter, surface, level) in enumerate(RTMA_MESSAGES, start=1) :
+            handle = eccodes.codes_grib_new_from_samples('GRIB2')
+            eccodes.codes_set(handle, 'gridDefinitionTemplateNumber', 30)
+            for key, value in grid.items() :
+                eccodes.codes_set(handle, key, value)
+            for key, value in (
+                ('discipline', discipline), ('parameterCategory', category), ('parameterNumber', parameter),
+                ('typeOfFirstFixedSurface', surface), ('scaledValueOfFirstFixedSurface', level),
+                ('scaleFactorOfFirstFixedSurface', 0), ('dataDate', int(f'{valid_time:%Y%m%d}')),
+                ('dataTime', valid_time.hour * 100), ('packingType', 'grid_simple'), ('bitsPerValue', 16),
+            ) :
+                eccodes.codes_set(handle, key, value)
+            eccodes.codes_set_values(handle, fields[short_name].astype(np.float64).ravel())
+            inventory.append(f'{number}:{grib_file.tell()}:d={valid_time:%Y%m%d%H}:{variable}:{level_name}:anl:')
+            eccodes.codes_write(handle, grib_file)
+            eccodes.codes_release(handle)
+
+    with open(f'{path}.idx', 'w') as index_file :
+        index_file.write('\n'.join(inventory) + '\n')
+    return path
+
+
+def rtma_hours(start, count) -> list :
+    return [start + datetime.timedelta(hours=hour) for hour in range(count)]
+
+
+def rtma_object_key(valid_time) -> str :
+    return f'rtma2p5.{valid_time:%Y%m%d}/rtma2p5.t{valid_time:%H}z.{RTMA_SUFFIX}'
+
+
+
+## --------------------------------------------------------------- ##
+##                  Synthetic Sensor Dataset                       ##
+## --------------------------------------------------------------- ##
+def write_sensor_dataset(path, start='2020-03-01', days=184, height=100, width=120, block_days=31, seed=0) -> str :
+    # Hourly `td2m` / `rh2m` grids written month by month (memory bounded by one block); a corner of
+    # NaN cells stands in for pixels without sensor coverage
+    import h5netcdf
+    times = pd.date_range(start, periods=days * 24, freq='h')
+    longitude = np.linspace(SENSOR_BOUNDS[0], SENSOR_BOUNDS[2], width)
+    latitude = np.linspace(SENSOR_BOUNDS[1], SENSOR_BOUNDS[3], height)
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    terrain = (3 * np.sin(x / width * 5) + 2 * np.cos(y / height * 4)).astype(np.float32)
+
+    # Contiguous (unchunked) variables like the production file, filled block by block
+    block_hours = block_days * 24
+    with h5netcdf.File(path, 'w') as store :
+        store.dimensions = {'time' : len(times), 'south_north' : height, 'west_east' : width}
+        store.create_variable('time', ('time',), 'i8', data=np.arange(len(times)))
+        store.variables['time'].attrs.update({'units' : f'hours since {times[0]:%Y-%m-%d %H:%M:%S}', 'calendar' : 'proleptic_gregorian'})
+        store.create_variable('south_north', ('south_north',), 'f8', data=latitude)
+        store.create_variable('west_east', ('west_east',), 'f8', data=longitude)
+        for name, units in (('td2m', 'K'), ('rh2m', '%')) :
+            store.create_variable(name, ('time', 'south_north', 'west_east'), 'f4', fillvalue=np.float32(np.nan))
+            store.variables[name].attrs['units'] = units
+
+        for block_start in range(0, len(times), block_hours) :
+            hours = np.arange(block_start, min(block_start + block_hours, len(times)))
+            diurnal = np.sin(2 * np.pi * (hours % 24 - 9) / 24).astype(np.float32)[:, None, None]
+            seasonal = np.float32(6) * np.sin(np.pi * hours / len(times)).astype(np.float32)[:, None, None]
+            dewpoint = 283 + seasonal + 4 * diurnal + terrain + rng.normal(0, 1, (len(hours), height, width)).astype(np.float32)
+            humidity = np.clip(45 - 25 * diurnal - terrain + rng.normal(0, 3, (len(hours), height, width)), 2, 100).astype(np.float32)
+            dewpoint[:, :3, :3] = np.nan
+            humidity[:, :3, :3] = np.nan
+            store.variables['td2m'][hours[0]:hours[-1] + 1] = dewpoint
+            store.variables['rh2m'][hours[0]:hours[-1] + 1] = humidity
+    return path
+
+
+
+## --------------------------------------------------------------- ##
+##                     Local S3 Stand-In                           ##
+## --------------------------------------------------------------- ##
+class Local_S3 :
+    # moto server on localhost (or an existing endpoint) holding the RTMA fixtures under NOAA's bucket layout
+    def __init__(self, endpoint_url=None, port=5555) :
+        self.server = None
+        if endpoint_url is None :
+            from moto.server import ThreadedMotoServer
+            # Keep the stand-in's per-request access log out of the benchmark output
+            logging.getLogger('werkzeug').setLevel(logging.ERROR)
+            self.server = ThreadedMotoServer(ip_address='127.0.0.1', port=port, verbose=False)
+            self.server.start()
+            endpoint_url = f'http://127.0.0.1:{port}'
+            os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+            os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+        self.endpoint_url = endpoint_url
+
+
+    def environment(self) -> dict :
+        # Variables that point `RTMA_Data_Pipe` (and a server subprocess) at the stand-in
+        return {
+            'RTMA_S3_ENDPOINT' : self.endpoint_url ,
+            'RTMA_S3_ANON' : '0' ,
+            'AWS_ACCESS_KEY_ID' : os.environ.get('AWS_ACCESS_KEY_ID', 'benchmark') ,
+            'AWS_SECRET_ACCESS_KEY' : os.environ.get('AWS_SECRET_ACCESS_KEY', 'benchmark') ,
+            'AWS_DEFAULT_REGION' : os.environ.get('AWS_DEFAULT_REGION', 'us-east-1') ,
+        }
+
+
+    def upload_rtma(self, grib_paths) :
+        # {valid time: local GRIB path} --> `rtma2p5.YYYYMMDD/rtma2p5.tHHz.2dvaranl_ndfd.grb2` (+ `.idx`)
+        import boto3
+        client = boto3.client('s3', endpoint_url=self.endpoint_url, region_name='us-east-1')
+        try:
+            client.create_bucket(Bucket=RTMA_BUCKET)
+        except client.exceptions.BucketAlreadyOwnedByYou :
+            pass
+        for valid_time, path in grib_paths.items() :
+            client.upload_file(path, RTMA_BUCKET, rtma_object_key(valid_time))
+            client.upload_file(f'{path}.idx', RTMA_BUCKET, f'{rtma_object_key(valid_time)}.idx')
+
+
+    def stop(self) :
+        if self.server is not None :
+            self.server.stop()
+
+
+
+## --------------------------------------------------------------- ##
+##                   Fixture Directory Layout                      ##
+## --------------------------------------------------------------- ##
+def build_fixtures(out_dir, rtma_start, rtma_hours_count=3, rtma_scale=1, sensor_days=184, sensor_height=100, sensor_width=120,
+                   pixel_major=False) -> dict :
+    # Existing files are reused (the fixtures are deterministic) --> delete the directory to regenerate
+    os.makedirs(os.path.join(out_dir, 'rtma'), exist_ok=True)
+    grib_paths = {}
+    for valid_time in rtma_hours(rtma_start, rtma_hours_count) :
+        path = os.path.join(out_dir, 'rtma', f'rtma2p5.{valid_time:%Y%m%d%H}.s{rtma_scale}.grb2')
+        if not os.path.exists(f'{path}.idx') :
+            write_rtma_grib(path, valid_time, rtma_scale)
+        grib_paths[valid_time] = path
+
+    sensor_path = os.path.join(out_dir, 'combined.nc')
+    expected = (sensor_days * 24, sensor_height, sensor_width)
+    current = None
+    if os.path.exists(sensor_path) :
+        with xr.open_dataset(sensor_path, engine='h5netcdf') as ds :
+            current = (ds.sizes['time'], ds.sizes['south_north'], ds.sizes['west_east'])
+    if current != expected :
+        write_sensor_dataset(sensor_path, days=sensor_days, height=sensor_height, width=sensor_width)
+
+    # Pixel-major copy (`sensor_rechunk.py`) --> point time series read it instead of the map-oriented file
+    pixel_path = pixel_major_path(sensor_path)
+    if pixel_major and not pixel_major_is_current(sensor_path, pixel_path) :
+        write_pixel_major(sensor_path, pixel_path)
+    elif not pixel_major and os.path.exists(pixel_path) :
+        os.remove(pixel_path)
+    return {'rtma' : grib_paths, 'sensor' : sensor_path}
+
+
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='Write the synthetic benchmark fixtures')
+    parser.add_argument('--out', default='bench_data')
+    parser.add_argument('--rtma-start', default='2024-07-15T12')
+    parser.add_argument('--rtma-hours', type=int, default=3)
+    parser.add_argument('--rtma-scale', type=int, default=1)
+    parser.add_argument('--sensor-days', type=int, default=184)
+    parser.add_argument('--sensor-height', type=int, default=100)
+    parser.add_argument('--sensor-width', type=int, default=120)
+    parser.add_argument('--pixel-major', action='store_true')
+    args = parser.parse_args()
+
+    fixtures = build_fixtures(
+        args.out, datetime.datetime.strptime(args.rtma_start, '%Y-%m-%dT%H'), args.rtma_hours,
+        args.rtma_scale, args.sensor_days, args.sensor_height, args.sensor_width, args.pixel_major
+    )
+    print(fixtures['sensor'], *fixtures['rtma'].values(), sep='\n')
@@ -0,0 +1,77 @@
+## --------------------------------------------------------------------------------------- ##
+##  Micro-Benchmark: Streamed Hour Range vs. One Visualization Request per Hour            ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Run from the `server/` directory:
+### python -m Benchmarks.bench_frame_stream --file combined.nc --start 2020-07-15T00 --hours 24
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import argparse
+import datetime
+import time
+import tracemalloc
+import orjson
+from Pipelines.Sensors.Sensor_Pipe import Sensor_Pipe
+from Pipelines.Common.Legend_Service import LEGEND_STYLES
+
+
+def single_requests(pipe, times, climate_var, payload_format) -> tuple :
+    # The animation loop the frontend used to run --> (seconds, bytes)
+    _, vmin, vmax, label = LEGEND_STYLES[f'sensor_{climate_var}']
+    start, size = time.perf_counter(), 0
+    for valid_time in times :
+        array = pipe.generate_hour_vis(valid_time.year, valid_time.month, valid_time.day, valid_time.hour, climate_var)
+        size += len(pipe.produce_vis_payload(array, vmin, vmax, payload_format, label=label))
+    return time.perf_counter() - start, size
+
+
+def streamed(pipe, start_date, end_date, climate_var, payload_format, encoding) -> dict :
+    tracemalloc.start()
+    start = time.perf_counter()
+    header, frames = pipe.generate_range_frames(start_date, end_date, climate_var, payload_format, encoding=encoding)
+    first_frame, size, count = None, len(header), 0
+    for message in frames :
+        if first_frame is None :
+            first_frame = time.perf_counter() - start
+        size += len(message)
+        count += 1
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'frames' : count ,
+        'first_frame_seconds' : first_frame ,
+        'total_seconds' : seconds ,
+        'bytes' : size ,
+        'peak_traced_megabytes' : round(peak / 2**20, 2) ,
+    }
+
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='Sensor frame stream micro-benchmark')
+    parser.add_argument('--file', default='combined.nc')
+    parser.add_argument('--start', default='2020-07-15T00')
+    parser.add_argument('--hours', type=int, default=24)
+    parser.add_argument('--climate-var', default='td2m')
+    parser.add_argument('--format', default='binary')
+    args = parser.parse_args()
+
+    pipe = Sensor_Pipe(args.file)
+    start_date = datetime.datetime.strptime(args.start, '%Y-%m-%dT%H')
+    end_date = start_date + datetime.timedelta(hours=args.hours - 1)
+    times = [start_date + datetime.timedelta(hours=hour) for hour in range(args.hours)]
+
+    single_seconds, single_bytes = single_requests(pipe, times, args.climate_var, args.format)
+    print(orjson.dumps({
+        'hours' : args.hours ,
+        'single_requests' : {'total_seconds' : single_seconds, 'bytes' : single_bytes} ,
+        'stream_full' : streamed(pipe, start_date, end_date, args.climate_var, args.format, 'full') ,
+        'stream_delta' : streamed(pipe, start_date, end_date, args.climate_var, args.format, 'delta') ,
+    }, option=orjson.OPT_INDENT_2).decode())
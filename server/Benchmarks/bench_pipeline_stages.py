@@ -0,0 +1,188 @@
+## --------------------------------------------------------------------------------------- ##
+##  Benchmark: Per-Stage Timings of the RTMA and Sensor Pipelines on Synthetic Fixtures    ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Every stage is timed on its own (same components, same order as a request):
+#   * RTMA    --> list (cold day listing + warm catalog lookup), fetch (byte ranges + whole file), decode, regrid plan (cold), crop, regrid,
+#                 render, serialize (JSON / binary), and `retrieve_hourly_dask` + `produce_vis_json` end to end
+#   * Sensors --> open (cold registry), `generate_hour_vis`, render, serialize, `produce_vis_json`,
+#                 and `generate_time_series`
+#
+# Run from the `server/` directory (fixtures are written to `--data` on the first run):
+### python -m Benchmarks.bench_pipeline_stages --data bench_data --repeats 5 --output stages.json
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import argparse
+import datetime
+import os
+import resource
+import tempfile
+import time
+import numpy as np
+import orjson
+from Benchmarks.bench_fixtures import build_fixtures, Local_S3, rtma_object_key, RTMA_BUCKET
+from Pipelines.NOAA.RTMA.RTMA_Pipe import RTMA_Data_Pipe
+from Pipelines.NOAA.RTMA.RTMA_Regrid import RTMA_Regrid_Engine
+from Pipelines.NOAA.RTMA.RTMA_Region import resolve_region
+from Pipelines.NOAA.RTMA.RTMA_Catalog import RTMA_Catalog
+from Pipelines.Common.Payload_Encoding import encode_payload
+from Pipelines.Common.Dataset_Registry import Dataset_Registry
+from Pipelines.Sensors.Sensor_Pipe import Sensor_Pipe
+
+
+## --------------------------------------------------------------- ##
+##                   Timing and Memory Helpers                     ##
+## --------------------------------------------------------------- ##
+def summarize(timings) -> dict :
+    timings = np.asarray(timings, dtype=np.float64)
+    return {
+        'repeats' : len(timings) ,
+        'min_seconds' : float(timings.min()) ,
+        'median_seconds' : float(np.median(timings)) ,
+        'p95_seconds' : float(np.percentile(timings, 95)) ,
+        'mean_seconds' : float(timings.mean()) ,
+    }
+
+
+def measure(function, repeats, setup=None) -> tuple :
+    # (timing summary, last result) --> `setup()` runs untimed before every call and feeds its arguments
+    timings = []
+    result = None
+    for _ in range(repeats) :
+        args = setup() if setup is not None else ()
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+    return summarize(timings), result
+
+
+def peak_rss_mb() -> float :
+    # High-water mark of this process' resident set (Linux reports kilobytes)
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+
+## --------------------------------------------------------------- ##
+##                      RTMA Pipeline Stages                       ##
+## --------------------------------------------------------------- ##
+def rtma_stages(valid_time, repeats=5, region=None) -> dict :
+    # `retrieve_hourly_dask` bypasses the product cache --> every end-to-end run really downloads and decodes
+    region = resolve_region(region)
+    pipe = RTMA_Data_Pipe()
+    filter_keys = pipe.grib_reader.filter_keys
+    path = f'{RTMA_BUCKET}/{rtma_object_key(valid_time)}'
+    stages = {}
+
+    # Cold --> a fresh catalog lists the day directory; warm --> the in-memory lookup of every later request
+    stages['list'], _ = measure(lambda : RTMA_Catalog(pipe.s3_fs, pipe.s3_bucket).resolve(valid_time), repeats)
+    pipe.catalog.resolve(valid_time)
+    stages['resolve'], _ = measure(lambda : pipe.catalog.resolve(valid_time), repeats)
+    stages['fetch'], messages = measure(lambda : pipe.partial_fetcher.fetch_messages(path, filter_keys), repeats)
+    stages['fetch_whole_file'], _ = measure(lambda : pipe.s3_fs.cat_file(path), repeats)
+    stages['decode'], fields = measure(lambda : pipe.grib_reader.read_messages(messages), repeats)
+
+    # Cold regrid plan (native coordinates + KD-tree) --> fresh engine and plan directory every time
+    key = pipe.regrid_engine.geometry_key(fields[0].attrs, fields[0].values.shape, fields[0].coordinates)
+    stages['regrid_plan'], plan = measure(
+        lambda engine : engine.get_plan(key, fields[0].coordinates, region), repeats,
+        setup = lambda : (RTMA_Regrid_Engine(cache_dir=tempfile.mkdtemp(prefix='bench_plan_')),)
+    )
+    stages['crop'], cropped = measure(lambda : [plan.crop(field.values) for field in fields], repeats)
+    stages['regrid'], _ = measure(lambda : [plan.regrid(values) for values in cropped], repeats)
+
+    # Render and serialize the regridded (u, v, 2t) arrays (the shared engine's plan is warm from here on)
+    arrays = pipe.regrid_fields(fields, region)
+    stages['render'], vis_arrays = measure(lambda : pipe.produce_vis_arrays(arrays[0], arrays[1], arrays[2]), repeats)
+    stages['serialize_json'], payload = measure(lambda : encode_payload(vis_arrays, 'json'), repeats)
+    stages['serialize_binary'], binary = measure(lambda : encode_payload(vis_arrays, 'binary'), repeats)
+    stages['produce_vis_json'], _ = measure(lambda : pipe.produce_vis_json(arrays[0], arrays[1], arrays[2]), repeats)
+
+    # End to end without the product cache (listing, fetch, decode, regrid with a warm plan)
+    hour = dict(year=f'{valid_time:%Y}', month=f'{valid_time:%m}', day=f'{valid_time:%d}', hour=f'{valid_time:%H}')
+    stages['retrieve_hourly_dask'], ds = measure(lambda : pipe.retrieve_hourly_dask(region=region, **hour), repeats)
+    return {
+        'valid_time' : f'{valid_time:%Y-%m-%dT%H}' ,
+        'grid' : list(fields[0].values.shape) ,
+        'region_grid' : list(ds[0].shape) ,
+        'payload_bytes' : {'json' : len(payload), 'binary' : len(binary)} ,
+        'stages' : stages ,
+    }
+
+
+
+## --------------------------------------------------------------- ##
+##                     Sensor Pipeline Stages                      ##
+## --------------------------------------------------------------- ##
+def sensor_stages(file_name, repeats=5, points=10, climate_var='td2m') -> dict :
+    pipe = Sensor_Pipe(file_name, pixel_file=f'{file_name}.missing')
+    stages = {}
+
+    # Cold open of the map-oriented store (fresh registry every time)
+    stages['open'], ds = measure(
+        lambda registry : registry.get(file_name, chunks={'time' : 1}, cache=False), repeats,
+        setup = lambda : (Dataset_Registry(),)
+    )
+    valid_time = ds['time'].values[len(ds['time']) // 2].astype('datetime64[s]').item()
+    hour = dict(year=valid_time.year, month=valid_time.month, day=valid_time.day, hour=valid_time.hour)
+
+    stages['generate_hour_vis'], array = measure(lambda : pipe.generate_hour_vis(climate_var=climate_var, **hour), repeats)
+    stages['render'], vis_arrays = measure(lambda : pipe.produce_vis_arrays(array, 20, 80), repeats)
+    stages['serialize_json'], payload = measure(lambda : encode_payload(vis_arrays, 'json'), repeats)
+    stages['serialize_binary'], binary = measure(lambda : encode_payload(vis_arrays, 'binary'), repeats)
+    stages['produce_vis_json'], _ = measure(lambda : pipe.produce_vis_json(array, 20, 80), repeats)
+
+    # Whole-season series of random pixels (map-oriented layout, as without `sensor_rechunk.py`)
+    rng = np.random.default_rng(0)
+    lons, lats = ds['west_east'].values, ds['south_north'].values
+    pixels = iter(zip(rng.uniform(lons.min(), lons.max(), repeats * points), rng.uniform(lats.min(), lats.max(), repeats * points)))
+    first, last = ds['time'].values[[0, -1]].astype('datetime64[s]').tolist()
+    span = dict(start_year=first.year, start_month=first.month, start_day=first.day, end_year=last.year, end_month=last.month, end_day=last.day)
+    stages['generate_time_series'], series = measure(
+        lambda lon, lat : pipe.generate_time_series(lon, lat, climate_var=climate_var, **span), repeats * points,
+        setup = lambda : next(pixels)
+    )
+    return {
+        'grid' : [ds.sizes['time'], ds.sizes['south_north'], ds.sizes['west_east']] ,
+        'payload_bytes' : {'json' : len(payload), 'binary' : len(binary)} ,
+        'series_hours' : len(series['DATA']) ,
+        'stages' : stages ,
+    }
+
+
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='RTMA and sensor pipeline stage timings on synthetic fixtures')
+    parser.add_argument('--data', default='bench_data')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--rtma-scale', type=int, default=1)
+    parser.add_argument('--sensor-days', type=int, default=184)
+    parser.add_argument('--s3-endpoint', default=None)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    rtma_start = datetime.datetime(2024, 7, 15, 12)
+    fixtures = build_fixtures(args.data, rtma_start, 1, args.rtma_scale, args.sensor_days)
+    s3 = Local_S3(args.s3_endpoint)
+    try:
+        s3.upload_rtma(fixtures['rtma'])
+        os.environ.update(s3.environment())
+        report = {
+            'rtma' : rtma_stages(rtma_start, args.repeats) ,
+            'sensor' : sensor_stages(fixtures['sensor'], args.repeats) ,
+            'peak_rss_mb' : peak_rss_mb() ,
+        }
+    finally:
+        s3.stop()
+
+    content = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+    if args.output is not None :
+        with open(args.output, 'wb') as output_file :
+            output_file.write(content)
+    print(content.decode())
@@ -0,0 +1,73 @@
+## --------------------------------------------------------------------------------------- ##
+##  Micro-Benchmark: One Batch Time-Series Read vs. One Request per Point                  ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Run from the `server/` directory:
+### python -m Benchmarks.bench_sensor_batch --file combined.nc --points 50
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import argparse
+import time
+import numpy as np
+import orjson
+import xarray as xr
+from Pipelines.Sensors.Sensor_Pipe import Sensor_Pipe
+
+
+def best_seconds(function, repeats) -> float :
+    timings = []
+    for _ in range(repeats) :
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='Sensor batch time-series micro-benchmark')
+    parser.add_argument('--file', default='combined.nc')
+    parser.add_argument('--points', type=int, default=50)
+    parser.add_argument('--climate-var', default='td2m')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    # Random pixels and the middle half of the dataset's extent as one polygon
+    with xr.open_dataset(args.file, engine='h5netcdf') as ds :
+        lons = ds['west_east'].values
+        lats = ds['south_north'].values
+    rng = np.random.default_rng(0)
+    points = [
+        {'lon' : float(lon), 'lat' : float(lat)}
+        for lon, lat in zip(rng.uniform(lons.min(), lons.max(), args.points), rng.uniform(lats.min(), lats.max(), args.points))
+    ]
+    (x0, x1), (y0, y1) = np.percentile(lons, [25, 75]), np.percentile(lats, [25, 75])
+    polygon = {'type' : 'Polygon', 'coordinates' : [[[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]]}
+
+    pipe = Sensor_Pipe(args.file)
+    # Same values as the single-point pathway
+    batch = pipe.generate_batch_time_series(points, climate_var=args.climate_var)
+    singles = [pipe.generate_time_series(point['lon'], point['lat'], climate_var=args.climate_var) for point in points]
+    if orjson.dumps([single['DATA'] for single in singles]) != orjson.dumps(batch['POINTS']['DATA']) :
+        raise SystemExit('Batch time series differ from the single-point pathway')
+
+    print(orjson.dumps({
+        'file' : args.file ,
+        'points' : args.points ,
+        'equal_output' : True ,
+        'single_requests_seconds' : best_seconds(
+            lambda: [pipe.generate_time_series(point['lon'], point['lat'], climate_var=args.climate_var) for point in points], args.repeats
+        ) ,
+        'batch_points_seconds' : best_seconds(
+            lambda: pipe.generate_batch_time_series(points, climate_var=args.climate_var), args.repeats
+        ) ,
+        'batch_polygon_seconds' : best_seconds(
+            lambda: pipe.generate_batch_time_series(polygons=[polygon], climate_var=args.climate_var), args.repeats
+        ) ,
+    }, option=orjson.OPT_INDENT_2).decode())
@@ -0,0 +1,68 @@
+## --------------------------------------------------------------------------------------- ##
+##  Micro-Benchmark: Point Time Series from Map-Oriented vs. Pixel-Major Sensor Layout     ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Run from the `server/` directory (writes the pixel-major copy when it is missing or stale):
+### python -m Benchmarks.bench_sensor_layout --file combined.nc --points 20
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import argparse
+import time
+import numpy as np
+import orjson
+import xarray as xr
+from Pipelines.Sensors.Sensor_Pipe import Sensor_Pipe
+from Pipelines.Sensors.Sensor_Rechunk import pixel_major_is_current, write_pixel_major
+
+
+def time_series_seconds(pipe, points, climate_var) -> tuple :
+    # Wall time of `generate_time_series` per point, plus the results for the equality check
+    timings = []
+    results = []
+    for lon, lat in points :
+        start = time.perf_counter()
+        results.append(pipe.generate_time_series(lon, lat, climate_var=climate_var))
+        timings.append(time.perf_counter() - start)
+    return timings, results
+
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='Sensor dataset layout micro-benchmark')
+    parser.add_argument('--file', default='combined.nc')
+    parser.add_argument('--points', type=int, default=20)
+    parser.add_argument('--climate-var', default='td2m')
+    args = parser.parse_args()
+
+    if not pixel_major_is_current(args.file) :
+        write_pixel_major(args.file)
+
+    # Random pixels inside the dataset's extent
+    with xr.open_dataset(args.file, engine='h5netcdf') as ds :
+        lons = ds['west_east'].values
+        lats = ds['south_north'].values
+    rng = np.random.default_rng(0)
+    points = list(zip(rng.uniform(lons.min(), lons.max(), args.points), rng.uniform(lats.min(), lats.max(), args.points)))
+
+    # Map-oriented layout (no pixel-major copy) vs. pixel-major layout
+    map_pipe = Sensor_Pipe(args.file, pixel_file=f'{args.file}.missing')
+    pixel_pipe = Sensor_Pipe(args.file)
+    map_timings, map_results = time_series_seconds(map_pipe, points, args.climate_var)
+    pixel_timings, pixel_results = time_series_seconds(pixel_pipe, points, args.climate_var)
+
+    if orjson.dumps(map_results, option=orjson.OPT_SERIALIZE_NUMPY) != orjson.dumps(pixel_results, option=orjson.OPT_SERIALIZE_NUMPY) :
+        raise SystemExit('Pixel-major time series differ from the map-oriented layout')
+
+    print(orjson.dumps({
+        'file' : args.file ,
+        'points' : args.points ,
+        'equal_output' : True ,
+        'map_oriented' : {'median_seconds': float(np.median(map_timings)), 'best_seconds': min(map_timings)} ,
+        'pixel_major' : {'median_seconds': float(np.median(pixel_timings)), 'best_seconds': min(pixel_timings)} ,
+    }, option=orjson.OPT_INDENT_2).decode())
@@ -0,0 +1,75 @@
+## --------------------------------------------------------------------------------------- ##
+##  Micro-Benchmark: Per-Request Dataset Open vs. Shared Dataset Registry Handles          ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Run from the `server/` directory:
+### python -m Benchmarks.bench_sensor_open --file combined.nc --repeat 20
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import argparse
+import datetime
+import time
+import numpy as np
+import orjson
+import xarray as xr
+from Pipelines.Common.Dataset_Registry import Dataset_Registry
+from Pipelines.Sensors.Sensor_Pipe import Sensor_Pipe
+
+
+def hour_vis_reopen(file_name, user_datetime, climate_var) :
+    # Previous `generate_hour_vis`: open the store on every request
+    ds = xr.open_dataset(file_name, chunks={'time': 1}, engine='h5netcdf', cache=False)
+    climate_ds = ds[climate_var].sel(time=user_datetime, method='nearest')
+    if climate_var == 'td2m' :
+        climate_ds = (climate_ds * (9/5)) - 459.67
+    return climate_ds.compute()
+
+
+def measure(function, repeat) -> dict :
+    timings = []
+    for _ in range(repeat) :
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return {'best_seconds': min(timings), 'median_seconds': float(np.median(timings))}
+
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='Sensor dataset open-cost micro-benchmark')
+    parser.add_argument('--file', default='combined.nc')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--climate-var', default='td2m')
+    args = parser.parse_args()
+
+    with xr.open_dataset(args.file, engine='h5netcdf') as ds :
+        times = ds['time'].values
+    user_datetime = datetime.datetime.fromisoformat(str(times[len(times) // 2])[:19])
+    hour = dict(year=user_datetime.year, month=user_datetime.month, day=user_datetime.day, hour=user_datetime.hour)
+
+    registry = Dataset_Registry()
+    pipe = Sensor_Pipe(args.file, registry=registry)
+    if not np.array_equal(
+        hour_vis_reopen(args.file, user_datetime, args.climate_var).values,
+        pipe.generate_hour_vis(**hour, climate_var=args.climate_var).values, equal_nan=True
+    ) :
+        raise SystemExit('Registry-backed hourly array differs from the per-request open')
+
+    results = {
+        # Fixed overhead only --> opening the store vs. looking up the shared handle
+        'open_per_request' : measure(lambda: xr.open_dataset(args.file, chunks={'time': 1}, engine='h5netcdf', cache=False), args.repeat) ,
+        'registry_lookup' : measure(lambda: registry.get(args.file, chunks={'time': 1}, cache=False), args.repeat) ,
+        # Whole hourly read (open + select + compute)
+        'hour_vis_per_request' : measure(lambda: hour_vis_reopen(args.file, user_datetime, args.climate_var), args.repeat) ,
+        'hour_vis_registry' : measure(lambda: pipe.generate_hour_vis(**hour, climate_var=args.climate_var), args.repeat) ,
+    }
+    print(orjson.dumps(
+        {'file': args.file, 'equal_output': True, 'results': results, 'registry': registry.stats()},
+        option=orjson.OPT_INDENT_2
+    ).decode())
@@ -0,0 +1,168 @@
+## --------------------------------------------------------------------------------------- ##
+##  Benchmark Suite: Fixtures, Stage Timings, and Endpoint Load Tests in One JSON Report    ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Fully offline: synthetic fixtures (`bench_fixtures`), a local S3 stand-in, per-stage pipeline timings
+# (`bench_pipeline_stages`), and load tests of `main.py` (`bench_endpoint_load`). The report is written to
+# `--output` (default `bench_results/<git revision>-<UTC time>.json`). With `--baseline` the median stage
+# times, load-test p50 latency / throughput, and peak RSS are compared with an earlier report; the exit
+# status is 1 when any metric regressed by more than `--tolerance` (a fraction, e.g. 0.25 = 25 %) and,
+# for timings, by more than `--noise-seconds`.
+#
+# Run from the `server/` directory:
+### python -m Benchmarks.bench_suite --data bench_data
+### python -m Benchmarks.bench_suite --data bench_data --baseline bench_results/<earlier report>.json
+### python -m Benchmarks.bench_suite --quick          (scaled-down RTMA grid, one month of sensor data)
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import argparse
+import datetime
+import os
+import platform
+import subprocess
+import sys
+import numpy as np
+import orjson
+import xarray as xr
+from Benchmarks.bench_fixtures import build_fixtures, Local_S3
+from Benchmarks.bench_pipeline_stages import rtma_stages, sensor_stages, peak_rss_mb
+from Benchmarks.bench_endpoint_load import run_load_tests, SERVER_DIR
+
+
+def git_revision() -> str :
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVER_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError) :
+        return 'unknown'
+
+
+def environment_info() -> dict :
+    return {
+        'revision' : git_revision() ,
+        'created' : datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ') ,
+        'python' : platform.python_version() ,
+        'numpy' : np.__version__ ,
+        'xarray' : xr.__version__ ,
+        'platform' : platform.platform() ,
+        'cpus' : os.cpu_count() ,
+    }
+
+
+
+## --------------------------------------------------------------- ##
+##                    Regression Comparison                        ##
+## --------------------------------------------------------------- ##
+def tracked_metrics(report) -> dict :
+    # Flatten a report into {metric name: (value, True if higher is better)}
+    metrics = {}
+    for pipeline in ('rtma', 'sensor') :
+        for stage, timing in report.get('stages', {}).get(pipeline, {}).get('stages', {}).items() :
+            metrics[f'stages.{pipeline}.{stage}.median_seconds'] = (timing['median_seconds'], False)
+    metrics['stages.peak_rss_mb'] = (report.get('stages', {}).get('peak_rss_mb'), False)
+    for scenario, levels in report.get('load', {}).items() :
+        for level in levels :
+            name = f"load.{scenario}.c{level['concurrency']}"
+            metrics[f'{name}.latency_p50_seconds'] = (level['latency_p50_seconds'], False)
+            metrics[f'{name}.throughput_rps'] = (level['throughput_rps'], True)
+            metrics[f'{name}.peak_rss_mb'] = (level.get('peak_rss_mb'), False)
+    return {name : metric for name, metric in metrics.items() if metric[0] is not None}
+
+
+def compare_reports(baseline, report, tolerance=0.25, noise_seconds=0.002) -> list :
+    # Relative change of every metric present in both reports --> rows flagged when worse than `tolerance`
+    # (timings that moved by less than `noise_seconds` are timer noise, never regressions)
+    previous = tracked_metrics(baseline)
+    rows = []
+    for name, (value, higher_is_better) in tracked_metrics(report).items() :
+        if name not in previous or previous[name][0] == 0 :
+            continue
+        change = (value - previous[name][0]) / previous[name][0]
+        regressed = (-change if higher_is_better else change) > tolerance
+        if name.endswith('_seconds') and abs(value - previous[name][0]) < noise_seconds :
+            regressed = False
+        rows.append({
+            'metric' : name ,
+            'baseline' : previous[name][0] ,
+            'current' : value ,
+            'change' : change ,
+            'regressed' : regressed ,
+        })
+    return rows
+
+
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='Offline benchmark suite for the RTMA and sensor pipelines')
+    parser.add_argument('--data', default='bench_data')
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--baseline', default=None)
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--noise-seconds', type=float, default=0.002)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--rtma-hours', type=int, default=3)
+    parser.add_argument('--rtma-scale', type=int, default=1)
+    parser.add_argument('--sensor-days', type=int, default=184)
+    parser.add_argument('--pixel-major', action='store_true')
+    parser.add_argument('--server-workers', type=int, default=1)
+    parser.add_argument('--s3-endpoint', default=None)
+    parser.add_argument('--skip-load', action='store_true')
+    parser.add_argument('--quick', action='store_true')
+    args = parser.parse_args()
+    if args.quick :
+        args.rtma_scale, args.sensor_days, args.repeats, args.requests = 4, 31, 3, 30
+
+    rtma_start = datetime.datetime(2024, 7, 15, 12)
+    fixtures = build_fixtures(
+        args.data, rtma_start, args.rtma_hours, args.rtma_scale, args.sensor_days, pixel_major=args.pixel_major
+    )
+    s3 = Local_S3(args.s3_endpoint)
+    try:
+        s3.upload_rtma(fixtures['rtma'])
+        os.environ.update(s3.environment())
+        report = {
+            'environment' : environment_info() ,
+            'fixtures' : {
+                'rtma_hours' : args.rtma_hours ,
+                'rtma_scale' : args.rtma_scale ,
+                'sensor_days' : args.sensor_days ,
+                'pixel_major' : args.pixel_major ,
+            } ,
+            'stages' : {
+                'rtma' : rtma_stages(rtma_start, args.repeats) ,
+                'sensor' : sensor_stages(fixtures['sensor'], args.repeats) ,
+                'peak_rss_mb' : peak_rss_mb() ,
+            } ,
+        }
+        if not args.skip_load :
+            report['load'] = run_load_tests(
+                args.data, fixtures, s3, args.concurrency, args.requests, workers=args.server_workers
+            )
+    finally:
+        s3.stop()
+
+    output = args.output or os.path.join(
+        'bench_results', f"{report['environment']['revision']}-{report['environment']['created'].replace(':', '')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'wb') as output_file :
+        output_file.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    print(f'Report written to {output}')
+
+    if args.baseline is not None :
+        with open(args.baseline, 'rb') as baseline_file :
+            rows = compare_reports(orjson.loads(baseline_file.read()), report, args.tolerance, args.noise_seconds)
+        for row in rows :
+            flag = 'REGRESSED' if row['regressed'] else ''
+            print(f"{row['metric']:<60} {row['baseline']:>12.4g} {row['current']:>12.4g} {row['change']:>+8.1%} {flag}")
+        sys.exit(1 if any(row['regressed'] for row in rows) else 0)
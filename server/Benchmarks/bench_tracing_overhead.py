@@ -0,0 +1,63 @@
+## --------------------------------------------------------------------------------------- ##
+##  Micro-Benchmark: Stage Tracing Overhead (No Trace vs. Traced Lane Job)                 ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Run from the `server/` directory:
+### python -m Benchmarks.bench_tracing_overhead --file combined.nc --repeats 200
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import argparse
+import time
+import orjson
+from Pipelines.Sensors.Sensor_Pipe import Sensor_Pipe
+from Pipelines.Common.Pipeline_Tracing import stage, run_traced
+
+
+def span_cost(repeats, traced) -> float :
+    # Seconds per empty `with stage(...)` block
+    def spans() :
+        start = time.perf_counter()
+        for _ in range(repeats) :
+            with stage('bench.empty') as span :
+                span.add_bytes(1)
+        return time.perf_counter() - start
+    seconds, _ = run_traced(spans, (), {}, traced)
+    return seconds / repeats
+
+
+def hourly_job(pipe, repeats, traced) -> float :
+    # Median seconds of the `/v1/sensor/vis` job (read, render, serialize) with and without a worker trace
+    def job() :
+        array = pipe.generate_hour_vis(2020, 7, 15, 12, 'td2m')
+        return pipe.produce_vis_payload(array, 20, 80, 'binary')
+    timings = []
+    for _ in range(repeats) :
+        start = time.perf_counter()
+        run_traced(job, (), {}, traced)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='Stage tracing overhead micro-benchmark')
+    parser.add_argument('--file', default='combined.nc')
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+
+    pipe = Sensor_Pipe(args.file)
+    hourly_job(pipe, 5, True)
+    untraced, traced = hourly_job(pipe, args.repeats, False), hourly_job(pipe, args.repeats, True)
+    print(orjson.dumps({
+        'span_seconds_untraced' : span_cost(100000, False) ,
+        'span_seconds_traced' : span_cost(100000, True) ,
+        'hourly_job_median_seconds_untraced' : untraced ,
+        'hourly_job_median_seconds_traced' : traced ,
+        'hourly_job_overhead' : traced / untraced - 1 ,
+    }, option=orjson.OPT_INDENT_2).decode())
@@ -0,0 +1,283 @@
+## --------------------------------------------------------------------------------------- ##
+##  Heat Alarm System                                                                      ##
+## ~ Alarm Engine: Per-Zone Thresholds, Duration Rules, and Rolling Per-Cell State ~        ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# A rule fires in a cell once its metric has been at or above `threshold` for `hours` consecutive
+# hours inside the rule's zone (e.g. heat index >= 103 °F for 3 hours). The engine keeps one run
+# counter per (rule, cell), capped just above the rule's duration, so every new hour is a handful of
+# element-wise grid operations --> O(grid) per hour, no history is rescanned. A missing hour
+# (gap in the feed) or a new grid geometry resets the counters.
+#
+# Zones and rules are read from a JSON file (`ALARM_CONFIG`), e.g.
+#   {"zones": [{"id": "imperial", "name": "Imperial County", "geometry": {<GeoJSON Polygon>}}],
+#    "rules": [{"id": "danger", "metric": "heat_index", "threshold": 103, "hours": 3, "zone": "imperial"}]}
+# The `all` zone (whole grid) always exists.
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+# Connected regions of alarmed cells
+from scipy import ndimage
+# GeoJSON polygon --> grid cells
+from Pipelines.Common.Geo_Selection import polygon_cells, polygon_rings
+# Standard Libraries
+import datetime
+import threading
+import json
+
+
+# Metrics produced by the alarm sources (°F)
+ALARM_METRICS = ('temperature', 'heat_index', 'apparent_temperature')
+# Default rules --> NWS heat index categories (Extreme Caution, Danger, Extreme Danger)
+DEFAULT_ALARM_RULES = [
+    {'id' : 'extreme_caution', 'metric' : 'heat_index', 'threshold' : 90, 'hours' : 3, 'zone' : 'all', 'level' : 'advisory'},
+    {'id' : 'danger', 'metric' : 'heat_index', 'threshold' : 103, 'hours' : 3, 'zone' : 'all', 'level' : 'warning'},
+    {'id' : 'extreme_danger', 'metric' : 'heat_index', 'threshold' : 125, 'hours' : 1, 'zone' : 'all', 'level' : 'emergency'},
+]
+# Largest number of alarm polygons returned per rule (largest regions first)
+MAX_ALARM_POLYGONS = 200
+ONE_HOUR = datetime.timedelta(hours=1)
+
+
+## --------------------------------------------------------------- ##
+##                 Alarm Zones and Duration Rules                  ##
+## --------------------------------------------------------------- ##
+class Alarm_Zone :
+    def __init__(self, zone_id, name=None, geometry=None) :
+        self.zone_id = zone_id
+        self.name = name or zone_id
+        # GeoJSON Polygon / MultiPolygon (None --> the whole grid)
+        self.geometry = geometry
+
+
+    def mask(self, longitude, latitude) -> np.ndarray :
+        # (lat, lon) boolean grid of the cells inside the zone
+        mask = np.zeros((len(latitude), len(longitude)), dtype=bool)
+        if self.geometry is None :
+            mask[:] = True
+            return mask
+        rows, columns = polygon_cells(self.geometry, longitude, latitude)
+        mask[rows, columns] = True
+        return mask
+
+
+
+class Alarm_Rule :
+    def __init__(self, rule_id, metric, threshold, hours=1, zone='all', level='warning') :
+        if metric not in ALARM_METRICS :
+            raise ValueError(f'Unknown alarm metric `{metric}`, expected one of {ALARM_METRICS}')
+        if int(hours) < 1 :
+            raise ValueError(f'Alarm rule `{rule_id}` needs a duration of at least 1 hour')
+        self.rule_id = rule_id
+        self.metric = metric
+        self.threshold = float(threshold)
+        self.hours = int(hours)
+        self.zone = zone
+        self.level = level
+
+
+    def describe(self) -> dict :
+        return {
+            'id' : self.rule_id, 'metric' : self.metric, 'threshold' : self.threshold,
+            'hours' : self.hours, 'zone' : self.zone, 'level' : self.level,
+        }
+
+
+
+def load_alarm_config(path=None, grids=()) -> tuple :
+    # JSON file of zones and rules --> ({zone id: Alarm_Zone}, [Alarm_Rule]); defaults without a file.
+    # `grids` --> (longitude, latitude) axes the alarms run on; a zone covering no cell of any of them
+    # is a configuration error (it would never alarm)
+    config = {}
+    if path :
+        with open(path) as config_file :
+            config = json.load(config_file)
+
+    zones = {'all' : Alarm_Zone('all', 'Whole grid')}
+    for zone in config.get('zones', []) :
+        zones[zone['id']] = Alarm_Zone(zone['id'], zone.get('name'), zone.get('geometry'))
+        if zone.get('geometry') is None :
+            continue
+        polygon_rings(zone['geometry'])
+        if len(grids) > 0 and not any(zones[zone['id']].mask(longitude, latitude).any() for longitude, latitude in grids) :
+            raise ValueError(f"Alarm zone `{zone['id']}` covers no cell of the alarm grids")
+
+    rules = []
+    for rule in config.get('rules', DEFAULT_ALARM_RULES) :
+        if rule.get('zone', 'all') not in zones :
+            raise ValueError(f"Alarm rule `{rule['id']}` refers to unknown zone `{rule['zone']}`")
+        rules.append(Alarm_Rule(
+            rule['id'], rule['metric'], rule['threshold'], rule.get('hours', 1), rule.get('zone', 'all'), rule.get('level', 'warning')
+        ))
+    return zones, rules
+
+
+
+## --------------------------------------------------------------- ##
+##                Alarm Polygons from a Cell Mask                  ##
+## --------------------------------------------------------------- ##
+def cell_edges(coords) -> np.ndarray :
+    # Cell centers --> cell edges (midpoints, outer edges extrapolated by half a cell)
+    coords = np.asarray(coords, dtype=np.float64)
+    if len(coords) == 1 :
+        return np.array([coords[0] - 0.5, coords[0] + 0.5])
+    middle = (coords[1:] + coords[:-1]) / 2
+    return np.concatenate([[2 * coords[0] - middle[0]], middle, [2 * coords[-1] - middle[-1]]])
+
+
+def alarm_polygons(mask, values, longitude, latitude, max_polygons=MAX_ALARM_POLYGONS) -> list :
+    # Connected regions (8-neighbour) of alarmed cells --> GeoJSON Features; each region is a MultiPolygon
+    # of its row runs (consecutive alarmed cells of a grid row merged into one rectangle)
+    labels, count = ndimage.label(mask, structure=np.ones((3, 3), dtype=bool))
+    if count == 0 :
+        return []
+    lon_edges, lat_edges = cell_edges(longitude), cell_edges(latitude)
+    sizes = np.bincount(labels.ravel())[1:]
+    order = np.argsort(sizes)[::-1][:max_polygons]
+    peaks = np.atleast_1d(ndimage.maximum(np.nan_to_num(values, nan=-np.inf), labels, index=order + 1))
+    # Bounding slices of every region --> each region is only scanned inside its own box
+    boxes = ndimage.find_objects(labels)
+
+    features = []
+    for region, peak in zip(order + 1, peaks) :
+        row_slice, column_slice = boxes[region - 1]
+        rows, columns = np.nonzero(labels[row_slice, column_slice] == region)
+        rows, columns = rows + row_slice.start, columns + column_slice.start
+        # Run starts where the column jumps or the row changes (np.nonzero is row-major)
+        starts = np.flatnonzero(np.r_[True, (np.diff(columns) != 1) | (np.diff(rows) != 0)])
+        ends = np.r_[starts[1:], len(rows)] - 1
+        rectangles = []
+        for start, end in zip(starts, ends) :
+            x0, x1 = sorted((float(lon_edges[columns[start]]), float(lon_edges[columns[end] + 1])))
+            y0, y1 = sorted((float(lat_edges[rows[start]]), float(lat_edges[rows[start] + 1])))
+            # Counter-clockwise exterior ring (GeoJSON right-hand rule)
+            rectangles.append([[[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]])
+
+        box_lons = lon_edges[[column_slice.start, column_slice.stop]]
+        box_lats = lat_edges[[row_slice.start, row_slice.stop]]
+        features.append({
+            'type' : 'Feature' ,
+            'geometry' : {'type' : 'MultiPolygon', 'coordinates' : rectangles} ,
+            'properties' : {
+                'cells' : int(sizes[region - 1]) ,
+                'max_value' : round(float(peak), 2) ,
+                'bbox' : [float(box_lons.min()), float(box_lats.min()), float(box_lons.max()), float(box_lats.max())] ,
+            } ,
+        })
+    return features
+
+
+
+## --------------------------------------------------------------- ##
+##        Alarm Engine: Rolling Run Counters per Rule and Cell     ##
+## --------------------------------------------------------------- ##
+class Alarm_Engine :
+    def __init__(self, rules, zones) :
+        self.rules = rules
+        self.zones = zones
+        # Longest duration of any rule --> hours of history needed to rebuild the state from scratch
+        self.max_hours = max([rule.hours for rule in rules], default=1)
+        self.lock = threading.RLock()
+        self.reset()
+
+
+    def reset(self) :
+        with self.lock :
+            self.grid_key = None
+            self.longitude = None
+            self.latitude = None
+            # Rule id --> zone mask, zone size, consecutive-hours counter (uint16), current metric grid
+            self.masks = {}
+            self.zone_cells = {}
+            self.runs = {}
+            self.values = {}
+            self.last_time = None
+            self.hours_evaluated = 0
+            self.summary = None
+
+
+    def prepare_grid(self, longitude, latitude) :
+        # Zone masks are computed once per grid geometry; a new geometry restarts every counter
+        longitude = np.asarray(longitude)
+        latitude = np.asarray(latitude)
+        grid_key = (longitude.shape, latitude.shape, longitude.tobytes(), latitude.tobytes())
+        if grid_key == self.grid_key :
+            return
+        self.reset()
+        self.grid_key = grid_key
+        self.longitude, self.latitude = longitude, latitude
+        zone_masks = {zone_id : zone.mask(longitude, latitude) for zone_id, zone in self.zones.items()}
+        shape = (len(latitude), len(longitude))
+        for rule in self.rules :
+            self.masks[rule.rule_id] = zone_masks[rule.zone]
+            self.zone_cells[rule.rule_id] = int(np.count_nonzero(zone_masks[rule.zone]))
+            self.runs[rule.rule_id] = np.zeros(shape, dtype=np.uint16)
+
+
+    def update(self, valid_time, metrics, longitude, latitude) -> dict :
+        # Advance every rule by one hour --> `metrics` maps metric name to a (lat, lon) grid
+        with self.lock :
+            self.prepare_grid(longitude, latitude)
+            if self.last_time is not None and valid_time <= self.last_time :
+                raise ValueError(f'Hour {valid_time:%Y-%m-%dT%H} is not after the last evaluated hour {self.last_time:%Y-%m-%dT%H}')
+            # A gap in the feed breaks every "consecutive hours" run
+            if self.last_time is not None and valid_time - self.last_time != ONE_HOUR :
+                for run in self.runs.values() :
+                    run[:] = 0
+
+            rules = []
+            # Peak metric per (metric, zone) --> shared by every rule on the same pair
+            peaks = {}
+            for rule in self.rules :
+                values = metrics[rule.metric]
+                mask = self.masks[rule.rule_id]
+                run = self.runs[rule.rule_id]
+                with np.errstate(invalid='ignore') :
+                    above = values >= rule.threshold
+                if rule.zone != 'all' :
+                    above &= mask
+                # run = min(run + 1, hours + 1) where above, 0 elsewhere --> `hours` exactly means "alarmed this hour"
+                np.add(run, 1, out=run, where=above & (run <= rule.hours))
+                run[~above] = 0
+                active = run >= rule.hours
+                self.values[rule.rule_id] = values
+
+                if (rule.metric, rule.zone) not in peaks :
+                    zone_values = values if rule.zone == 'all' else values[mask]
+                    # fmax ignores NaN cells; -inf --> no data in the zone this hour
+                    peaks[(rule.metric, rule.zone)] = float(np.fmax.reduce(zone_values, axis=None, initial=-np.inf))
+                peak = peaks[(rule.metric, rule.zone)]
+                rules.append({
+                    **rule.describe() ,
+                    'active_cells' : int(np.count_nonzero(active)) ,
+                    # Cells whose run reached the duration this hour (newly alarmed)
+                    'new_cells' : int(np.count_nonzero(run == rule.hours)) ,
+                    'zone_cells' : self.zone_cells[rule.rule_id] ,
+                    'max_value' : round(peak, 2) if np.isfinite(peak) else None ,
+                })
+
+            self.last_time = valid_time
+            self.hours_evaluated += 1
+            self.summary = {'time' : valid_time, 'rules' : rules}
+            return self.summary
+
+
+    def active_mask(self, rule_id) -> np.ndarray :
+        rule = next(rule for rule in self.rules if rule.rule_id == rule_id)
+        return self.runs[rule_id] >= rule.hours
+
+
+    def polygons(self, rule_id) -> list :
+        # GeoJSON Features of the regions where `rule_id` is currently active
+        with self.lock :
+            if self.last_time is None :
+                return []
+            return alarm_polygons(self.active_mask(rule_id), self.values[rule_id], self.longitude, self.latitude)
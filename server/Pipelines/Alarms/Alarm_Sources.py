@@ -0,0 +1,133 @@
+## --------------------------------------------------------------------------------------- ##
+##  Heat Alarm System                                                                      ##
+## ~ Alarm Sources: Hourly Heat-Metric Grids from the RTMA and Sensor Pipelines ~          ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# A source yields (valid time, {metric: (lat, lon) grid in °F}, longitude, latitude) for every
+# available hour of a range, in time order. Hours without data are skipped --> the engine sees the gap.
+#   * RTMA    --> 2t, 2 m specific humidity, surface pressure, and 10 m wind (heat index + apparent temperature)
+#   * Sensors --> td2m (dew point) and rh2m; air temperature is recovered from the two, and the
+#                 apparent temperature assumes still air (no wind in the sensor dataset)
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+# Standard Libraries
+import datetime
+# Derived heat metrics
+from Pipelines.Alarms.Heat_Metrics import (
+    kelvin_to_celsius, celsius_to_fahrenheit, saturation_vapor_pressure, vapor_pressure_from_specific_humidity,
+    relative_humidity, temperature_from_dewpoint, heat_index, apparent_temperature
+)
+# Pipelines
+from Pipelines.NOAA.RTMA.RTMA_Pipe import RTMA_Data_Pipe
+from Pipelines.NOAA.RTMA.RTMA_Grib_Reader import RTMA_FILTER_KEYS
+from Pipelines.Common.Dataset_Registry import dataset_registry
+
+
+# RTMA messages needed by the alarms --> the visualization fields plus moisture and pressure
+ALARM_RTMA_FILTER_KEYS = RTMA_FILTER_KEYS + [
+    {'typeOfLevel': 'heightAboveGround', 'level': 2, 'shortName': '2sh'},
+    {'typeOfLevel': 'surface', 'shortName': 'sp'},
+]
+# Hours of sensor data read per slab during replays
+SENSOR_BLOCK_HOURS = 72
+ONE_HOUR = datetime.timedelta(hours=1)
+
+
+## --------------------------------------------------------------- ##
+##               Heat Metrics from Raw Pipeline Fields             ##
+## --------------------------------------------------------------- ##
+def rtma_metrics(u, v, temperature, specific_humidity, pressure) -> dict :
+    # RTMA fields (m/s, K, kg/kg, Pa) --> heat metrics (°F)
+    celsius = kelvin_to_celsius(temperature)
+    fahrenheit = celsius_to_fahrenheit(celsius)
+    vapor_pressure = vapor_pressure_from_specific_humidity(specific_humidity, pressure)
+    wind_speed = np.hypot(np.asarray(u, dtype=np.float32), np.asarray(v, dtype=np.float32))
+    return {
+        'temperature' : fahrenheit ,
+        'heat_index' : heat_index(fahrenheit, relative_humidity(celsius, vapor_pressure)) ,
+        'apparent_temperature' : apparent_temperature(celsius, vapor_pressure, wind_speed) ,
+    }
+
+
+def sensor_metrics(dewpoint, humidity) -> dict :
+    # Sensor fields (dew point K, relative humidity %) --> heat metrics (°F)
+    dewpoint_celsius = kelvin_to_celsius(dewpoint)
+    celsius = temperature_from_dewpoint(dewpoint_celsius, humidity)
+    fahrenheit = celsius_to_fahrenheit(celsius)
+    return {
+        'temperature' : fahrenheit ,
+        'heat_index' : heat_index(fahrenheit, humidity) ,
+        'apparent_temperature' : apparent_temperature(celsius, saturation_vapor_pressure(dewpoint_celsius)) ,
+    }
+
+
+
+## --------------------------------------------------------------- ##
+##                 RTMA Source: One Analysis per Hour              ##
+## --------------------------------------------------------------- ##
+class RTMA_Alarm_Source :
+    def __init__(self, region=None, pipe_factory=None) :
+        self.region = region
+        self.pipe_factory = pipe_factory or (lambda: RTMA_Data_Pipe(filter_keys=ALARM_RTMA_FILTER_KEYS))
+
+
+    def hour(self, valid_time) -> tuple :
+        # Cropped, regridded fields come from the product cache when this hour was already retrieved
+        u, v, temperature, specific_humidity, pressure = self.pipe_factory().retrieve_hourly_cached(
+            year = f'{valid_time:%Y}' ,
+            month = f'{valid_time:%m}' ,
+            day = f'{valid_time:%d}' ,
+            hour = f'{valid_time:%H}' ,
+            region = self.region
+        )
+        metrics = rtma_metrics(u.values, v.values, temperature.values, specific_humidity.values, pressure.values)
+        return metrics, u['longitude'].values, u['latitude'].values
+
+
+    def hours(self, start, end) :
+        valid_time = start
+        while valid_time <= end :
+            try:
+                metrics, longitude, latitude = self.hour(valid_time)
+            except FileNotFoundError :
+                # Not published (or not archived) --> a gap for the duration rules
+                metrics = None
+            if metrics is not None :
+                yield valid_time, metrics, longitude, latitude
+            valid_time += ONE_HOUR
+
+
+
+## --------------------------------------------------------------- ##
+##            Sensor Source: Slabs of the Combined Dataset         ##
+## --------------------------------------------------------------- ##
+class Sensor_Alarm_Source :
+    def __init__(self, file_name='combined.nc', registry=None, block_hours=SENSOR_BLOCK_HOURS) :
+        self.file_name = file_name
+        self.registry = registry or dataset_registry
+        self.block_hours = block_hours
+
+
+    def hours(self, start, end) :
+        # Unchunked shared handle --> every slab is one contiguous HDF5 read per variable
+        ds = self.registry.get(self.file_name, cache=False)
+        longitude = ds['west_east'].values
+        latitude = ds['south_north'].values
+        selected = ds[['td2m', 'rh2m']].sel(time=slice(start, end))
+        times = selected['time'].values
+        for block_start in range(0, len(times), self.block_hours) :
+            block = selected.isel(time=slice(block_start, block_start + self.block_hours))
+            dewpoint = block['td2m'].values
+            humidity = block['rh2m'].values
+            for index, valid_time in enumerate(times[block_start:block_start + self.block_hours]) :
+                metrics = sensor_metrics(dewpoint[index], humidity[index])
+                yield valid_time.astype('datetime64[s]').item(), metrics, longitude, latitude
@@ -0,0 +1,110 @@
+## --------------------------------------------------------------------------------------- ##
+##  Heat Alarm System                                                                      ##
+## ~ Derived Heat Metrics: Heat Index, Apparent Temperature, and Humidity Conversions ~    ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Every function works element-wise on whole grids (float32 in, float32 out, NaN propagates):
+#   * heat index        --> NWS algorithm (Rothfusz regression + low/high humidity adjustments), in °F
+#   * apparent temp.    --> Steadman (1994) shade formula AT = Ta + 0.33 e - 0.70 ws - 4.00, in °F
+#   * humidity          --> Magnus form of the saturation vapor pressure (hPa) over water
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+
+
+# Magnus coefficients (Bolton 1980) --> e_s(T) = 6.112 exp(17.67 T / (T + 243.5)), T in °C, e_s in hPa
+MAGNUS_A = 6.112
+MAGNUS_B = 17.67
+MAGNUS_C = 243.5
+
+
+## --------------------------------------------------------------- ##
+##                       Unit Conversions                          ##
+## --------------------------------------------------------------- ##
+def kelvin_to_fahrenheit(kelvin) -> np.ndarray :
+    return np.asarray(kelvin, dtype=np.float32) * np.float32(9/5) - np.float32(459.67)
+
+
+def kelvin_to_celsius(kelvin) -> np.ndarray :
+    return np.asarray(kelvin, dtype=np.float32) - np.float32(273.15)
+
+
+def celsius_to_fahrenheit(celsius) -> np.ndarray :
+    return np.asarray(celsius, dtype=np.float32) * np.float32(9/5) + np.float32(32)
+
+
+def fahrenheit_to_celsius(fahrenheit) -> np.ndarray :
+    return (np.asarray(fahrenheit, dtype=np.float32) - np.float32(32)) * np.float32(5/9)
+
+
+
+## --------------------------------------------------------------- ##
+##                    Moisture and Humidity                        ##
+## --------------------------------------------------------------- ##
+def saturation_vapor_pressure(celsius) -> np.ndarray :
+    celsius = np.asarray(celsius, dtype=np.float32)
+    return np.float32(MAGNUS_A) * np.exp(np.float32(MAGNUS_B) * celsius / (celsius + np.float32(MAGNUS_C)))
+
+
+def vapor_pressure_from_specific_humidity(specific_humidity, pressure) -> np.ndarray :
+    # q (kg/kg) and surface pressure (Pa) --> vapor pressure (hPa)
+    q = np.asarray(specific_humidity, dtype=np.float32)
+    p = np.asarray(pressure, dtype=np.float32) / np.float32(100)
+    return q * p / (np.float32(0.622) + np.float32(0.378) * q)
+
+
+def relative_humidity(celsius, vapor_pressure) -> np.ndarray :
+    # Vapor pressure (hPa) at air temperature (°C) --> relative humidity (%), clipped to [0, 100]
+    return np.clip(np.float32(100) * vapor_pressure / saturation_vapor_pressure(celsius), 0, 100)
+
+
+def temperature_from_dewpoint(dewpoint_celsius, relative_humidity) -> np.ndarray :
+    # Inverse Magnus: the air temperature (°C) at which the dew point's vapor pressure gives this RH
+    rh = np.clip(np.asarray(relative_humidity, dtype=np.float32), 1, 100)
+    log_ratio = np.log(saturation_vapor_pressure(dewpoint_celsius) * np.float32(100) / rh / np.float32(MAGNUS_A))
+    return np.float32(MAGNUS_C) * log_ratio / (np.float32(MAGNUS_B) - log_ratio)
+
+
+
+## --------------------------------------------------------------- ##
+##                      Derived Heat Metrics                       ##
+## --------------------------------------------------------------- ##
+def heat_index(fahrenheit, relative_humidity) -> np.ndarray :
+    # NWS heat index (°F): Steadman's simple form below 80 °F, the Rothfusz regression above it
+    t = np.asarray(fahrenheit, dtype=np.float32)
+    rh = np.asarray(relative_humidity, dtype=np.float32)
+    f32 = np.float32
+    simple = f32(0.5) * (t + f32(61.0) + (t - f32(68.0)) * f32(1.2) + rh * f32(0.094))
+
+    # Rothfusz regression, factored to keep the number of full-grid temporaries small
+    t_rh = t * rh
+    regression = (
+        f32(-42.379) + t * (f32(2.04901523) - f32(0.00683783) * t) + rh * (f32(10.14333127) - f32(0.05481717) * rh)
+        + t_rh * (f32(-0.22475541) + f32(0.00122874) * t + f32(0.00085282) * rh - f32(0.00000199) * t_rh)
+    )
+    # Dry adjustment (RH < 13 %, 80-112 °F) and humid adjustment (RH > 85 %, 80-87 °F) --> only on the cells concerned
+    with np.errstate(invalid='ignore') :
+        dry = np.flatnonzero((rh < 13) & (t >= 80) & (t <= 112))
+        humid = np.flatnonzero((rh > 85) & (t >= 80) & (t <= 87))
+        use_regression = (simple + t) / 2 >= 80
+    flat_regression, flat_t, flat_rh = regression.reshape(-1), t.reshape(-1), rh.reshape(-1)
+    flat_regression[dry] -= (13 - flat_rh[dry]) / 4 * np.sqrt((17 - np.abs(flat_t[dry] - 95)) / 17)
+    flat_regression[humid] += (flat_rh[humid] - 85) / 10 * (87 - flat_t[humid]) / 5
+    return np.where(use_regression, regression, simple)
+
+
+def apparent_temperature(celsius, vapor_pressure, wind_speed=0.0) -> np.ndarray :
+    # Steadman (1994) apparent temperature in the shade (°F); wind speed in m/s at 10 m
+    at = (
+        np.asarray(celsius, dtype=np.float32) + np.float32(0.33) * np.asarray(vapor_pressure, dtype=np.float32)
+        - np.float32(0.70) * np.asarray(wind_speed, dtype=np.float32) - np.float32(4.00)
+    )
+    return celsius_to_fahrenheit(at)
@@ -0,0 +1,71 @@
+## --------------------------------------------------------------------------------------- ##
+##  Shared Pipeline Components                                                             ##
+## ~ Climate-Variable Renderer: Precomputed uint8 RGBA Colormap Lookup Tables ~            ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+# Colormaps (only used once per LUT, never per pixel)
+from matplotlib import colormaps
+# Standard Libraries
+from functools import lru_cache
+
+
+## --------------------------------------------------------------- ##
+##       Colormap LUT: (cmap, vmin, vmax) --> uint8 RGBA Pixels    ##
+## --------------------------------------------------------------- ##
+class Colormap_LUT :
+    def __init__(self, cmap='turbo', vmin=0, vmax=120) :
+        self.cmap = cmap
+        self.vmin = vmin
+        self.vmax = vmax
+        colormap = colormaps[cmap]
+        # Number of colors in the colormap (256 for 'turbo') --> one LUT entry per color
+        self.size = colormap.N
+
+        # uint8 RGBA table: entries [0, N) are the colormap (opaque), entry N is transparent (NaN)
+        lut = np.zeros((self.size + 1, 4), dtype=np.uint8)
+        lut[:self.size] = colormap(np.arange(self.size), bytes=True)
+        lut[:self.size, 3] = 255
+        self.lut = lut
+        self.lut.setflags(write=False)
+
+
+    def indices(self, array) -> np.ndarray :
+        # Quantize values into LUT indices with the same arithmetic as `Normalize` + `Colormap`:
+        # normalized in the array's float precision, scaled by N, truncated, clipped to [0, N - 1]
+        scaled = np.array(array, dtype=np.result_type(np.asarray(array).dtype, np.float32), copy=True)
+        scaled -= self.vmin
+        scaled /= (self.vmax - self.vmin)
+        scaled *= self.size
+        nan_mask = np.isnan(scaled)
+        np.clip(scaled, 0, self.size - 1, out=scaled)
+        scaled[nan_mask] = self.size
+        return scaled.astype(np.uint16)
+
+
+    def render(self, array, out=None, flip=True) -> np.ndarray :
+        # Render a 2-D array to a (height, width, 4) uint8 image written into `out` (preallocated or new);
+        # `flip=True` writes rows bottom-up (the orientation the frontend expects)
+        array = np.asarray(array)
+        if flip :
+            array = array[::-1]
+        if out is None :
+            out = np.empty(array.shape + (4,), dtype=np.uint8)
+        np.take(self.lut, self.indices(array), axis=0, out=out)
+        return out
+
+
+
+@lru_cache(maxsize=64)
+def get_colormap_lut(cmap='turbo', vmin=0, vmax=120) -> Colormap_LUT :
+    # Each (cmap, vmin, vmax) style is built once per process
+    return Colormap_LUT(cmap, vmin, vmax)
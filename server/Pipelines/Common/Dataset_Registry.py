@@ -0,0 +1,82 @@
+## --------------------------------------------------------------------------------------- ##
+##  Shared Pipeline Components                                                             ##
+## ~ Dataset Registry: Long-Lived, Shared Xarray Handles with Automatic Reloads ~          ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Every store is opened once per process: HDF5 metadata, coordinate arrays and the decoded time
+# index stay in memory, data variables stay lazy. Handles are shared by all requests --> callers
+# only ever derive new objects from them (`.sel`, `.isel`, arithmetic), never modify them in place.
+# Reads through the h5netcdf backend are serialized by xarray's HDF5 lock, so concurrent requests are safe.
+# A store is reopened when its file changes (mtime, size, or inode --> e.g. replaced by `os.replace`);
+# the previous handle is left to in-flight readers and closed once it is garbage collected.
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Xarray --> Spatiotemporal Multidimensional Array Library
+import xarray as xr
+# Standard Libraries
+import threading
+import os
+
+
+## --------------------------------------------------------------- ##
+##          Dataset Registry: One Open Handle per Store            ##
+## --------------------------------------------------------------- ##
+class Dataset_Registry :
+    def __init__(self, engine='h5netcdf') :
+        self.engine = engine
+        # (path, open options) --> (file version, dataset)
+        self.handles = {}
+        self.lock = threading.Lock()
+        self.counters = {'hits' : 0, 'opens' : 0, 'reloads' : 0}
+
+
+    @staticmethod
+    def version(path) -> tuple :
+        # Changes whenever the file is rewritten or replaced
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+    def get(self, path, **open_kwargs) -> xr.Dataset :
+        # Open options may hold dicts (e.g. `chunks`) --> keyed by their sorted repr
+        key = (os.path.abspath(path), repr(sorted(open_kwargs.items())))
+        version = self.version(path)
+        with self.lock :
+            handle = self.handles.get(key)
+            if handle is not None and handle[0] == version :
+                self.counters['hits'] += 1
+                return handle[1]
+
+            # First request for this store, or the file changed since it was opened
+            self.counters['reloads' if handle is not None else 'opens'] += 1
+            ds = xr.open_dataset(path, engine=self.engine, **open_kwargs)
+            # Decode the coordinates (time index, lon/lat) once --> kept in memory for every request
+            for name in ds.coords :
+                ds[name].load()
+            self.handles[key] = (version, ds)
+            return ds
+
+
+    def clear(self) :
+        with self.lock :
+            self.handles.clear()
+
+
+    def stats(self) -> dict :
+        with self.lock :
+            return {
+                **self.counters ,
+                'open_stores' : [path for path, _ in self.handles] ,
+            }
+
+
+
+# Process-wide registry shared by every `Sensor_Pipe` connection
+dataset_registry = Dataset_Registry()
@@ -0,0 +1,187 @@
+## --------------------------------------------------------------------------------------- ##
+##  Shared Pipeline Components                                                             ##
+## ~ Frame Streams: Hour Ranges as Framed Messages, Reused Buffers, Quantized Deltas ~     ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# A stream is a header message followed by one message per available hour, written as soon as it is ready:
+#   * json   --> NDJSON (`application/x-ndjson`), one line per message: {"INDEX": i, "FRAME": {...}}
+#   * binary --> repeated [uint32 length N][int32 index i][N bytes of `IVB1` envelope] (little-endian)
+# The header has INDEX -1 and lists the epoch TIMES of the range; a frame's INDEX points into TIMES
+# (hours without data are skipped, so indices may jump).
+#
+# Frame encodings (gridded sensor streams):
+#   * full  --> every frame carries `climate_var_image` (RGBA) and `climate_var_values` (like `/v1/sensor/vis`)
+#   * delta --> every frame carries `climate_var_delta` only: zlib-compressed little-endian int16 values
+#               quantized to `scale` (NaN --> `nodata`), row-major and north-up. Key frames (`key: true`) hold
+#               the quantized grid itself, the others the difference to the previous frame, with int16
+#               wrap-around (add with wrap-around to reconstruct). Clients colorize with the header's
+#               `colormap_lut`: index = clip(floor((value - vmin) / (vmax - vmin) * (len - 1)), 0, len - 2),
+#               NaN --> the last (transparent) entry.
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+# Fast data encoding JSON library
+import orjson
+# Standard Libraries
+import base64
+import datetime
+import struct
+import zlib
+# Colormap lookup tables and payload envelopes
+from Pipelines.Common.Colormap_LUT import get_colormap_lut
+from Pipelines.Common.Payload_Encoding import encode_payload
+from Pipelines.Common.Value_Encoding import VALUE_SCALE, NODATA
+
+
+FRAME_ENCODINGS = ('full', 'delta')
+STREAM_MEDIA_TYPES = {'json' : 'application/x-ndjson', 'binary' : 'application/octet-stream'}
+HEADER_INDEX = -1
+# Values are rounded to 0.01 --> int16 at that scale holds ±327.67 (°F and % both fit)
+QUANTIZE_SCALE = VALUE_SCALE
+# A key frame every day of hourly frames --> a client joining mid-stream never waits long
+KEY_FRAME_INTERVAL = 24
+# zlib level 1: deltas of smooth hourly fields compress well already, level 1 keeps up with rendering
+ZLIB_LEVEL = 1
+
+
+def epoch_seconds(valid_time) -> int :
+    return int(valid_time.replace(tzinfo=datetime.timezone.utc).timestamp())
+
+
+## --------------------------------------------------------------- ##
+##                          Framing                                ##
+## --------------------------------------------------------------- ##
+def frame_message(index, payload, payload_format='json') -> bytes :
+    # Wrap an encoded payload (JSON object or binary envelope) into one stream message
+    if payload_format == 'binary' :
+        return struct.pack('<Ii', len(payload), index) + payload
+    return b''.join([b'{"INDEX":', str(index).encode(), b',"FRAME":', payload, b'}\n'])
+
+
+def read_messages(stream, payload_format='json') :
+    # Reference decoder (Python) --> (index, payload bytes) for every message of a complete stream body
+    if payload_format == 'binary' :
+        offset = 0
+        while offset < len(stream) :
+            size, index = struct.unpack_from('<Ii', stream, offset)
+            yield index, bytes(stream[offset + 8:offset + 8 + size])
+            offset += 8 + size
+        return
+    for line in bytes(stream).splitlines() :
+        message = orjson.loads(line)
+        yield message['INDEX'], message['FRAME']
+
+
+
+## --------------------------------------------------------------- ##
+##                  Quantized Frame-to-Frame Deltas                ##
+## --------------------------------------------------------------- ##
+def quantize(values, out=None, scale=QUANTIZE_SCALE) -> np.ndarray :
+    # float grid --> int16 multiples of `scale`, NaN --> NODATA (out of range values are clipped)
+    scaled = np.multiply(values, np.float32(1 / scale), dtype=np.float32)
+    np.rint(scaled, out=scaled)
+    np.clip(scaled, NODATA + 1, -NODATA - 1, out=scaled)
+    if out is None :
+        out = np.empty(scaled.shape, dtype=np.int16)
+    with np.errstate(invalid='ignore') :
+        np.copyto(out, scaled, casting='unsafe')
+    out[np.isnan(scaled)] = NODATA
+    return out
+
+
+def dequantize(quantized, scale=QUANTIZE_SCALE) -> np.ndarray :
+    values = quantized.astype(np.float32) * np.float32(scale)
+    values[quantized == NODATA] = np.nan
+    return values
+
+
+def apply_delta(compressed, previous, shape, key) -> np.ndarray :
+    # Reference decoder (Python) --> the quantized grid of a `delta` frame
+    delta = np.frombuffer(zlib.decompress(compressed), dtype='<i2').reshape(shape)
+    if key :
+        return delta.astype(np.int16)
+    return (previous.astype(np.uint16) + delta.astype(np.uint16)).astype(np.int16)
+
+
+
+## --------------------------------------------------------------- ##
+##      Frame Encoder: One Stream of Same-Shaped Hourly Grids      ##
+## --------------------------------------------------------------- ##
+class Frame_Encoder :
+    def __init__(self, height, width, cmap='turbo', vmin=0, vmax=120, payload_format='json', image_format='raw',
+                 encoding='full', key_interval=KEY_FRAME_INTERVAL) :
+        if encoding not in FRAME_ENCODINGS :
+            raise ValueError(f'Unknown frame encoding `{encoding}`, expected one of {FRAME_ENCODINGS}')
+        self.lut = get_colormap_lut(cmap, vmin, vmax)
+        self.payload_format = payload_format
+        self.image_format = image_format
+        self.encoding = encoding
+        self.key_interval = key_interval
+        self.frames = 0
+
+        # Rendering and quantization buffers are allocated once and reused by every frame of the stream
+        self.image = np.empty((height, width, 4), dtype=np.uint8)
+        self.values = np.empty((height, width), dtype=np.float32)
+        self.quantized = np.empty((height, width), dtype=np.int16)
+        self.previous = np.empty((height, width), dtype=np.int16)
+        self.delta = np.empty((height, width), dtype=np.int16)
+
+
+    def header(self, times, **fields) -> bytes :
+        # First message of the stream --> range, grid metadata, and (delta frames) the colorization table
+        header = {
+            'STATUS' : 'SUCCESS' ,
+            'TIMES' : [epoch_seconds(valid_time) for valid_time in times] ,
+            'encoding' : self.encoding ,
+            **fields ,
+        }
+        if self.encoding == 'delta' :
+            header.update({
+                'scale' : QUANTIZE_SCALE ,
+                'nodata' : NODATA ,
+                'key_interval' : self.key_interval ,
+                'vmin' : self.lut.vmin ,
+                'vmax' : self.lut.vmax ,
+                'colormap_lut' : np.asarray(self.lut.lut) ,
+            })
+        return frame_message(HEADER_INDEX, encode_payload(header, self.payload_format), self.payload_format)
+
+
+    def encode(self, index, array) -> bytes :
+        # One (lat, lon) grid stored south-up --> one stream message (rows flipped north-up like the hourly payload)
+        np.copyto(self.values, array[::-1], casting='same_kind')
+        np.around(self.values, 2, out=self.values)
+        if self.encoding == 'full' :
+            # Colors come from the unrounded values (same pixels as the hourly payload)
+            self.lut.render(array, out=self.image)
+            frame = {'climate_var_image' : self.image, 'climate_var_values' : self.values}
+            payload = encode_payload(frame, self.payload_format, self.image_format)
+            self.frames += 1
+            return frame_message(index, payload, self.payload_format)
+
+        key = self.frames % self.key_interval == 0
+        quantize(self.values, out=self.quantized)
+        if key :
+            np.copyto(self.delta, self.quantized)
+        else :
+            # int16 subtraction wraps around --> the decoder's wrapping addition restores the exact grid
+            np.subtract(self.quantized, self.previous, out=self.delta)
+        self.quantized, self.previous = self.previous, self.quantized
+        compressed = zlib.compress(self.delta.astype('<i2', copy=False).tobytes(), ZLIB_LEVEL)
+        frame = {
+            'key' : key ,
+            'climate_var_delta' : (
+                np.frombuffer(compressed, dtype=np.uint8) if self.payload_format == 'binary'
+                else base64.b64encode(compressed).decode()
+            ) ,
+        }
+        self.frames += 1
+        return frame_message(index, encode_payload(frame, self.payload_format), self.payload_format)
@@ -0,0 +1,149 @@
+## --------------------------------------------------------------------------------------- ##
+##  Shared Pipeline Components                                                             ##
+## ~ Geo Selection: Vectorized Nearest-Cell Lookups and GeoJSON Polygon Grid Masks ~       ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Resolves points and GeoJSON polygons (Polygon, MultiPolygon, or a Feature wrapping one) to
+# (row, column) cells of a regular (lon, lat) grid. Every point is resolved in one vectorized
+# nearest-neighbour lookup; a polygon covers the cells whose centers fall inside it (even-odd rule,
+# so holes are excluded). A polygon smaller than a grid cell covers the cell nearest to its vertices' mean;
+# a polygon outside the grid's extent covers no cells.
+# Area statistics are computed for every time step at once (no per-hour Python loop).
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+# Nearest grid index along one ascending axis
+from Pipelines.Common.Tile_Pyramid import nearest_index
+
+
+POLYGON_TYPES = ('Polygon', 'MultiPolygon')
+
+
+def nearest_cells(coords, targets) -> tuple :
+    # Nearest index of every target along one axis (ascending or descending coordinates)
+    # --> (indices, whether each target falls inside the grid)
+    coords = np.asarray(coords, dtype=np.float64)
+    targets = np.asarray(targets, dtype=np.float64)
+    if len(coords) > 1 and coords[0] > coords[-1] :
+        index, valid = nearest_index(coords[::-1], targets)
+        return len(coords) - 1 - index, valid
+    return nearest_index(coords, targets)
+
+
+def polygon_rings(geometry) -> list :
+    # GeoJSON geometry (or Feature) --> list of polygons, each a list of (n, 2) rings [exterior, holes...]
+    if not isinstance(geometry, dict) :
+        raise ValueError('Polygons must be GeoJSON geometry or Feature objects')
+    if geometry.get('type') == 'Feature' :
+        geometry = geometry.get('geometry') or {}
+        if not isinstance(geometry, dict) :
+            raise ValueError('Feature `geometry` must be a GeoJSON geometry object')
+    kind = geometry.get('type')
+    if kind not in POLYGON_TYPES :
+        raise ValueError(f'Unsupported geometry type `{kind}`, expected one of {POLYGON_TYPES}')
+
+    polygons = [geometry.get('coordinates')] if kind == 'Polygon' else geometry.get('coordinates')
+    rings = []
+    for polygon in polygons or [] :
+        try:
+            parts = [np.asarray(ring, dtype=np.float64)[:, :2] for ring in polygon]
+        except (TypeError, ValueError, IndexError) :
+            raise ValueError('Polygon coordinates must be lists of [lon, lat] positions')
+        if len(parts) == 0 or any(len(ring) < 3 for ring in parts) :
+            raise ValueError('Every polygon ring needs at least 3 positions')
+        rings.append(parts)
+    if len(rings) == 0 :
+        raise ValueError('Polygon has no coordinates')
+    return rings
+
+
+def polygon_id(geometry, default=None) :
+    # Name of a polygon's result --> its own (or its Feature's) `id`, else `properties.id`, else `default`
+    properties = geometry.get('properties')
+    if properties is None :
+        properties = {}
+    if not isinstance(properties, dict) :
+        raise ValueError('Feature `properties` must be an object')
+    name = geometry.get('id', properties.get('id'))
+    return default if name is None else name
+
+
+def grid_extent(coords) -> tuple :
+    # (min, max) edges of a grid axis --> cell centers widened by half a cell on both sides
+    coords = np.asarray(coords, dtype=np.float64)
+    half = np.abs(np.diff(coords)).max() / 2 if len(coords) > 1 else 0.0
+    return coords.min() - half, coords.max() + half
+
+
+def points_in_rings(x, y, rings) -> np.ndarray :
+    # Even-odd rule over every edge of every ring (exterior and holes) --> one pass per edge, vectorized over points
+    inside = np.zeros(x.shape, dtype=bool)
+    for ring in rings :
+        x0, y0 = ring[:, 0], ring[:, 1]
+        x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+        for ax, ay, bx, by in zip(x0, y0, x1, y1) :
+            if ay == by :
+                continue
+            crosses = (ay > y) != (by > y)
+            inside ^= crosses & (x < ax + (y - ay) * (bx - ax) / (by - ay))
+    return inside
+
+
+def polygon_cells(geometry, longitude, latitude) -> tuple :
+    # (rows, columns) of the grid cells covered by a GeoJSON polygon
+    longitude = np.asarray(longitude, dtype=np.float64)
+    latitude = np.asarray(latitude, dtype=np.float64)
+    rows, columns = [], []
+    for rings in polygon_rings(geometry) :
+        # Only test the cell centers inside the polygon's bounding box
+        exterior = rings[0]
+        column_index = np.flatnonzero((longitude >= exterior[:, 0].min()) & (longitude <= exterior[:, 0].max()))
+        row_index = np.flatnonzero((latitude >= exterior[:, 1].min()) & (latitude <= exterior[:, 1].max()))
+        grid_rows, grid_columns = np.meshgrid(row_index, column_index, indexing='ij')
+        inside = points_in_rings(longitude[grid_columns], latitude[grid_rows], rings)
+        rows.append(grid_rows[inside])
+        columns.append(grid_columns[inside])
+
+    rows, columns = np.concatenate(rows), np.concatenate(columns)
+    if len(rows) == 0 :
+        # Outside the grid --> no cells (never snapped to the nearest edge cell)
+        vertices = np.concatenate([rings[0] for rings in polygon_rings(geometry)])
+        lon_min, lon_max = grid_extent(longitude)
+        lat_min, lat_max = grid_extent(latitude)
+        if (vertices[:, 0].max() < lon_min or vertices[:, 0].min() > lon_max or
+                vertices[:, 1].max() < lat_min or vertices[:, 1].min() > lat_max) :
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        # Smaller than a grid cell (e.g. a single field) --> the cell nearest to the polygon's vertices
+        column, _ = nearest_cells(longitude, vertices[:, 0].mean(keepdims=True))
+        row, _ = nearest_cells(latitude, vertices[:, 1].mean(keepdims=True))
+        return row, column
+
+    # MultiPolygon parts may overlap --> every cell once
+    cells = np.unique(np.stack([rows, columns], axis=1), axis=0)
+    return cells[:, 0], cells[:, 1]
+
+
+def nan_percentiles(values, percentiles) -> np.ndarray :
+    # Percentiles of every row of `values` (time, cells) ignoring NaN cells --> (len(percentiles), time);
+    # same linear interpolation as `np.nanpercentile`, without its per-row loop
+    if values.shape[1] == 0 :
+        return np.full((len(percentiles), values.shape[0]), np.nan)
+    ordered = np.sort(values, axis=1)  # NaN sorts last
+    counts = (~np.isnan(ordered)).sum(axis=1)
+    positions = np.asarray(percentiles, dtype=np.float64)[:, None] / 100 * np.maximum(counts - 1, 0)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, np.maximum(counts - 1, 0))
+    rows = np.arange(ordered.shape[0])
+    low_values = ordered[rows, lower].astype(np.float64)
+    high_values = ordered[rows, upper].astype(np.float64)
+    result = low_values + (high_values - low_values) * (positions - lower)
+    result[:, counts == 0] = np.nan
+    return result
@@ -0,0 +1,54 @@
+## --------------------------------------------------------------------------------------- ##
+##  Shared Pipeline Components                                                             ##
+## ~ HTTP Caching: Strong ETags, Cache-Control Policies, and Conditional (304) Responses ~  ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# FastAPI (Starlette) responses
+from fastapi.responses import Response
+# Standard Libraries
+import hashlib
+
+
+# Data that can never change (historical hours, rendered legends) --> cached by browsers/CDNs for a year
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# API version baked into every ETag --> bumping it invalidates every cached representation
+API_VERSION = 'v1'
+
+
+def make_etag(*parts) -> str :
+    # Strong validator from the request key and the data version (e.g. file version, product name)
+    return f'"{hashlib.sha1(repr((API_VERSION, *parts)).encode()).hexdigest()}"'
+
+
+def cache_control(max_age, revalidate=True) -> str :
+    return f'public, max-age={int(max_age)}' + (', must-revalidate' if revalidate else '')
+
+
+def etag_matches(if_none_match, etag) -> bool :
+    # `If-None-Match` may list several validators (or `*`); weak comparison as required for GET
+    if if_none_match is None :
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+    return '*' in candidates or any(candidate.removeprefix('W/') == etag for candidate in candidates)
+
+
+def not_modified(request, etag, headers) :
+    # 304 with the same caching headers when the client already holds this representation
+    if etag_matches(request.headers.get('if-none-match'), etag) :
+        return Response(status_code=304, headers=headers)
+    return None
+
+
+def cached_response(request, content, media_type, etag, cache_control, vary=None) -> Response :
+    headers = {'ETag': etag, 'Cache-Control': cache_control}
+    if vary is not None :
+        headers['Vary'] = vary
+    return not_modified(request, etag, headers) or Response(content=content, media_type=media_type, headers=headers)
@@ -0,0 +1,124 @@
+## --------------------------------------------------------------------------------------- ##
+##  Shared Pipeline Components                                                             ##
+## ~ Colorbar Legend Service: Render Each Legend Style Once, Serve Cached PNG Bytes ~      ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+# Object-oriented Matplotlib API (no pyplot global state)
+from matplotlib.figure import Figure
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import Normalize
+from PIL import Image
+from io import BytesIO
+# Standard Libraries
+import hashlib
+import threading
+# Per-request stage spans (matplotlib only runs on the first request of a style)
+from Pipelines.Common.Pipeline_Tracing import stage
+
+
+# Legend styles used by the pipelines --> style name: (cmap, vmin, vmax, label)
+LEGEND_STYLES = {
+    'rtma_2t' : ('turbo', 0, 120, 'Temperature (°F)'),
+    'sensor_td2m' : ('turbo', 20, 80, 'Dew Point Temperature (°F)'),
+    'sensor_rh2m' : ('turbo', 10, 90, 'Relative Humidity (%)'),
+}
+
+
+## --------------------------------------------------------------- ##
+##               Rendered Legend (PNG Bytes + ETag)                ##
+## --------------------------------------------------------------- ##
+class Legend :
+    def __init__(self, legend_id, png) :
+        self.legend_id = legend_id
+        self.png = png
+        # Strong validator --> the PNG only depends on the legend style
+        self.etag = f'"{hashlib.sha1(png).hexdigest()}"'
+        self.url = f'/legend/{legend_id}'
+        self._array = None
+
+
+    @property
+    def array(self) -> np.ndarray :
+        # Decoded RGBA array (for the list-based `legend_array` payload field), decoded once
+        if self._array is None :
+            self._array = np.array(Image.open(BytesIO(self.png)))
+            self._array.setflags(write=False)
+        return self._array
+
+
+
+## --------------------------------------------------------------- ##
+##        Legend Service: One Matplotlib Render per Style          ##
+## --------------------------------------------------------------- ##
+class Legend_Service :
+    def __init__(self) :
+        # Known styles (legend id --> parameters) and their rendered legends
+        self.styles = {}
+        self.legends = {}
+        # Matplotlib rendering is not thread-safe --> serialize the (rare) renders
+        self.lock = threading.Lock()
+        for name, (cmap, vmin, vmax, label) in LEGEND_STYLES.items() :
+            self.styles[name] = (cmap, vmin, vmax, label)
+
+
+    def legend_id(self, cmap, vmin, vmax, label) -> str :
+        # Registered styles keep their readable name, ad-hoc styles get a stable hash
+        for name, style in self.styles.items() :
+            if style == (cmap, vmin, vmax, label) :
+                return name
+        return hashlib.sha1(repr((cmap, vmin, vmax, label)).encode()).hexdigest()[:16]
+
+
+    def get(self, cmap, vmin, vmax, label) -> Legend :
+        legend_id = self.legend_id(cmap, vmin, vmax, label)
+        legend = self.legends.get(legend_id)
+        if legend is not None :
+            return legend
+        with self.lock :
+            legend = self.legends.get(legend_id)
+            if legend is None :
+                self.styles[legend_id] = (cmap, vmin, vmax, label)
+                with stage('legend.render') :
+                    legend = Legend(legend_id, self.render(cmap, vmin, vmax, label))
+                self.legends[legend_id] = legend
+        return legend
+
+
+    def get_by_id(self, legend_id) :
+        # Used by the legend endpoint --> only styles the server knows about are rendered
+        style = self.styles.get(legend_id)
+        if style is None :
+            return None
+        return self.get(*style)
+
+
+    def render(self, cmap, vmin, vmax, label) -> bytes :
+        # Separate figure for displaying the legend:
+        fig_cbar = Figure(figsize=(1, 11))
+        ax_cbar = fig_cbar.subplots(nrows=1, ncols=1)
+        sm = ScalarMappable(cmap=cmap, norm=Normalize(vmin=vmin, vmax=vmax))
+        sm.set_array([])  # Required for ScalarMappable, even if empty
+        # Add colorbar to the figure
+        cbar = fig_cbar.colorbar(sm, cax=ax_cbar, orientation='vertical')
+        cbar.set_label(label, rotation=90, labelpad=15, va='center', fontsize=18)
+        cbar.ax.yaxis.set_label_position('left')
+        cbar.ax.tick_params(labelsize=13)
+        # Save the colorbar figure to an in-memory PNG file
+        buffer_legend = BytesIO()
+        fig_cbar.savefig(buffer_legend, format='png', bbox_inches='tight', pad_inches=0.1)
+        return buffer_legend.getvalue()
+
+
+
+# Process-wide legend service shared by the pipelines and the `/legend` pathway
+legend_service = Legend_Service()
@@ -0,0 +1,173 @@
+## --------------------------------------------------------------------------------------- ##
+##  Shared Pipeline Components                                                             ##
+## ~ Grid Payload Encoding: JSON (Default), Binary Envelope, and PNG Image Fields ~        ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Binary envelope layout (`application/octet-stream`, all integers little-endian):
+#   bytes [0, 4)        magic  b'IVB1'
+#   bytes [4, 8)        uint32 length N of the header
+#   bytes [8, 8 + N)    UTF-8 JSON header:
+#                         {"fields": {scalar fields, e.g. bounds/height/width},
+#                          "arrays": [{"name", "dtype", "shape", "encoding", "offset", "length"}, ...]}
+#   bytes [8 + N, ...)  array section --> each array starts at `offset` (relative to the start of
+#                       the section, aligned to 8 bytes) and spans `length` bytes.
+#                       `encoding` is 'raw' (C-order buffer of `dtype`/`shape`) or 'png' (RGBA PNG file)
+#   Byte fields (e.g. `climate_var_values` with `values=int16` or `int16_delta`) are 'raw' uint8 arrays;
+#   the JSON payload carries them as base64 strings (see `Value_Encoding`).
+#
+# Reference decoder (JavaScript):
+#   const view = new DataView(buffer), size = view.getUint32(4, true);
+#   const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, size)));
+#   const start = 8 + size;
+#   for (const a of header.arrays) {  // e.g. dtype 'uint8' --> Uint8Array, 'float32' --> Float32Array
+#     const bytes = new Uint8Array(buffer, start + a.offset, a.length); ... }
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+# Fast data encoding JSON library
+import orjson
+# Image Encoding
+from PIL import Image
+from io import BytesIO
+# Standard Libraries
+import base64
+import struct
+
+
+PAYLOAD_FORMATS = ('json', 'binary')
+IMAGE_FORMATS = ('raw', 'png')
+BINARY_MAGIC = b'IVB1'
+BINARY_MEDIA_TYPE = 'application/octet-stream'
+JSON_MEDIA_TYPE = 'application/json'
+# RGBA uint8 (height, width, 4) fields that may be sent as compressed PNG files
+IMAGE_FIELDS = ('climate_var_image', 'wind_image', 'legend_array')
+# Values are rounded to 0.01 --> float32 keeps that precision for the grid's value range
+VALUE_DTYPE = np.float32
+
+
+## --------------------------------------------------------------- ##
+##                     Content Negotiation                         ##
+## --------------------------------------------------------------- ##
+def negotiate_format(accept=None, payload_format=None, image_format=None) -> tuple :
+    # An explicit `format` query parameter wins, otherwise the `Accept` header decides
+    if payload_format is None :
+        payload_format = 'binary' if accept is not None and BINARY_MEDIA_TYPE in accept else 'json'
+    image_format = image_format or 'raw'
+    if payload_format not in PAYLOAD_FORMATS :
+        raise ValueError(f'Unknown payload format `{payload_format}`, expected one of {PAYLOAD_FORMATS}')
+    if image_format not in IMAGE_FORMATS :
+        raise ValueError(f'Unknown image format `{image_format}`, expected one of {IMAGE_FORMATS}')
+    return payload_format, image_format
+
+
+def media_type(payload_format) -> str :
+    return BINARY_MEDIA_TYPE if payload_format == 'binary' else JSON_MEDIA_TYPE
+
+
+## --------------------------------------------------------------- ##
+##                          Encoders                               ##
+## --------------------------------------------------------------- ##
+def encode_png(image) -> bytes :
+    buffer = BytesIO()
+    Image.fromarray(np.ascontiguousarray(image)).save(buffer, format='PNG', compress_level=3)
+    return buffer.getvalue()
+
+
+def vis_arrays_to_json(vis_arrays) -> dict :
+    # Backward-compatible JSON structure --> every array flattened to a list (row-major)
+    return {
+        name : value.ravel().tolist() if isinstance(value, np.ndarray) else
+        base64.b64encode(value).decode() if isinstance(value, bytes) else value
+        for name, value in vis_arrays.items()
+    }
+
+
+def encode_json(vis_arrays, image_format='raw') -> bytes :
+    # ORJSON serializes the flattened NumPy buffers natively (no intermediate Python lists)
+    content = {}
+    for name, value in vis_arrays.items() :
+        if isinstance(value, np.ndarray) :
+            if image_format == 'png' and name in IMAGE_FIELDS :
+                value = base64.b64encode(encode_png(value)).decode()
+            else :
+                value = np.ascontiguousarray(value).ravel()
+        elif isinstance(value, bytes) :
+            value = base64.b64encode(value).decode()
+        content[name] = value
+    return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def encode_binary(vis_arrays, image_format='raw') -> bytes :
+    fields = {}
+    descriptors = []
+    buffers = []
+    offset = 0
+    for name, value in vis_arrays.items() :
+        if isinstance(value, bytes) :
+            # Encoded bytes (int16 grids, zlib streams) --> sent as-is
+            value = np.frombuffer(value, dtype=np.uint8)
+        if not isinstance(value, np.ndarray) :
+            fields[name] = value
+            continue
+
+        if image_format == 'png' and name in IMAGE_FIELDS :
+            buffer = encode_png(value)
+            encoding = 'png'
+        else :
+            if value.dtype.kind == 'f' :
+                value = value.astype(VALUE_DTYPE, copy=False)
+            value = np.ascontiguousarray(value)
+            buffer = memoryview(value).cast('B')
+            encoding = 'raw'
+
+        # Align every array to 8 bytes so clients can build typed-array views without copying
+        padding = -offset % 8
+        if padding :
+            buffers.append(b'\0' * padding)
+            offset += padding
+        descriptors.append({
+            'name' : name ,
+            'dtype' : str(value.dtype) ,
+            'shape' : list(value.shape) ,
+            'encoding' : encoding ,
+            'offset' : offset ,
+            'length' : len(buffer) ,
+        })
+        buffers.append(buffer)
+        offset += len(buffer)
+
+    header = orjson.dumps({'fields': fields, 'arrays': descriptors}, option=orjson.OPT_SERIALIZE_NUMPY)
+    # Pad the header so the array section itself starts on an 8-byte boundary
+    header += b' ' * (-(8 + len(header)) % 8)
+    return b''.join([BINARY_MAGIC, struct.pack('<I', len(header)), header, *buffers])
+
+
+def encode_payload(vis_arrays, payload_format='json', image_format='raw') -> bytes :
+    if payload_format == 'binary' :
+        return encode_binary(vis_arrays, image_format)
+    return encode_json(vis_arrays, image_format)
+
+
+def decode_binary(payload) -> dict :
+    # Reference decoder (Python) --> arrays are zero-copy views into `payload`
+    if payload[:4] != BINARY_MAGIC :
+        raise ValueError('Not a binary grid payload')
+    size = struct.unpack('<I', payload[4:8])[0]
+    header = orjson.loads(payload[8:8 + size])
+    start = 8 + size
+    decoded = dict(header['fields'])
+    for descriptor in header['arrays'] :
+        chunk = memoryview(payload)[start + descriptor['offset']:start + descriptor['offset'] + descriptor['length']]
+        if descriptor['encoding'] == 'png' :
+            decoded[descriptor['name']] = np.array(Image.open(BytesIO(chunk)))
+        else :
+            decoded[descriptor['name']] = np.frombuffer(chunk, dtype=descriptor['dtype']).reshape(descriptor['shape'])
+    return decoded
@@ -0,0 +1,154 @@
+## --------------------------------------------------------------------------------------- ##
+##  Shared Pipeline Components                                                             ##
+## ~ Pipeline Executor: Bounded Worker Pools, Admission Control, and Timeouts ~            ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Blocking pipeline calls (S3 downloads, GRIB decoding, dask computes, rendering) never run on the
+# event loop. Each endpoint family gets its own lane --> a worker pool (threads or processes) of
+# `workers` slots plus at most `queue_depth` waiting jobs. Requests beyond that are rejected right away
+# (429 + Retry-After) instead of piling up, and jobs that exceed `timeout` seconds answer 503 + Retry-After.
+# Process lanes only accept module-level functions with picklable arguments.
+# Jobs submitted while a request is traced run under a fresh worker trace; its stage spans travel back
+# with the result and are merged into the request's trace (see `Pipeline_Tracing`).
+#
+# Lane settings are read from the environment, e.g. for the `rtma` lane:
+#   RTMA_EXECUTOR=thread|process   RTMA_WORKERS=2   RTMA_QUEUE_DEPTH=8   RTMA_TIMEOUT_SECONDS=120
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Standard Libraries
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import threading
+import time
+import asyncio
+import math
+import os
+# Per-request stage spans
+from Pipelines.Common.Pipeline_Tracing import current_trace, run_traced
+
+
+def timed_call(function, args, kwargs, traced=False) -> tuple :
+    # Runs inside the worker (module-level so process pools can pickle it) --> (result, seconds, worker trace)
+    start = time.perf_counter()
+    result, trace = run_traced(function, args, kwargs, traced)
+    return result, time.perf_counter() - start, trace
+
+
+
+class Executor_Overloaded(Exception) :
+    # Raised when a lane refuses or abandons a job --> mapped to an HTTP status by the server
+    def __init__(self, lane, status_code, retry_after, reason) :
+        super().__init__(f'{lane} lane {reason}')
+        self.lane = lane
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+
+## --------------------------------------------------------------- ##
+##         Execution Lane: One Bounded Pool per Endpoint Family    ##
+## --------------------------------------------------------------- ##
+class Execution_Lane :
+    def __init__(self, name, kind='thread', workers=2, queue_depth=8, timeout=60.0) :
+        self.name = name
+        self.kind = kind
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        if kind == 'process' :
+            self.pool = ProcessPoolExecutor(max_workers=workers)
+        elif kind == 'thread' :
+            self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'{name}-lane')
+        else :
+            raise ValueError(f'Unknown executor kind `{kind}`, expected `thread` or `process`')
+
+        self.lock = threading.Lock()
+        # Admitted jobs that have not finished yet (running + queued)
+        self.admitted = 0
+        self.counters = {'completed' : 0, 'failed' : 0, 'rejected' : 0, 'timeouts' : 0}
+        self.total_seconds = 0.0
+
+
+    @classmethod
+    def from_env(cls, name, kind='thread', workers=2, queue_depth=8, timeout=60.0) :
+        prefix = name.upper()
+        return cls(
+            name ,
+            kind = os.environ.get(f'{prefix}_EXECUTOR', kind) ,
+            workers = int(os.environ.get(f'{prefix}_WORKERS', workers)) ,
+            queue_depth = int(os.environ.get(f'{prefix}_QUEUE_DEPTH', queue_depth)) ,
+            timeout = float(os.environ.get(f'{prefix}_TIMEOUT_SECONDS', timeout)) ,
+        )
+
+
+    def retry_after(self) -> int :
+        # Rough wait until a slot frees up --> queued jobs ahead of the caller times the mean job time
+        with self.lock :
+            mean_seconds = self.total_seconds / self.counters['completed'] if self.counters['completed'] > 0 else 1.0
+            backlog = max(self.admitted - self.workers, 0) + 1
+        return max(1, math.ceil(mean_seconds * backlog / self.workers))
+
+
+    def release(self, future) :
+        # Runs when the job really ends (finished, failed, or cancelled while queued)
+        with self.lock :
+            self.admitted -= 1
+            if future.cancelled() :
+                return
+            if future.exception() is not None :
+                self.counters['failed'] += 1
+            else :
+                self.counters['completed'] += 1
+                self.total_seconds += future.result()[1]
+
+
+    async def run(self, function, *args, **kwargs) :
+        # Admission control --> never more than `workers + queue_depth` jobs in the lane
+        with self.lock :
+            rejected = self.admitted >= self.workers + self.queue_depth
+            if rejected :
+                self.counters['rejected'] += 1
+            else :
+                self.admitted += 1
+        if rejected :
+            raise Executor_Overloaded(self.name, 429, self.retry_after(), 'is at capacity')
+
+        trace = current_trace.get()
+        future = self.pool.submit(timed_call, function, args, kwargs, trace is not None)
+        future.add_done_callback(self.release)
+        try:
+            result, _, worker_trace = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+            if trace is not None :
+                trace.merge(worker_trace)
+            return result
+        except asyncio.TimeoutError :
+            # Queued jobs are cancelled; a running job finishes in the background (its slot stays taken)
+            with self.lock :
+                self.counters['timeouts'] += 1
+            raise Executor_Overloaded(self.name, 503, self.retry_after(), f'timed out after {self.timeout:g} seconds')
+        except Exception as e :
+            if trace is not None :
+                trace.merge(getattr(e, 'worker_trace', None))
+            raise
+
+
+    def stats(self) -> dict :
+        with self.lock :
+            return {
+                'kind' : self.kind ,
+                'workers' : self.workers ,
+                'queue_depth' : self.queue_depth ,
+                'timeout_seconds' : self.timeout ,
+                'in_flight' : self.admitted ,
+                **self.counters ,
+            }
+
+
+    def shutdown(self, wait=False) :
+        self.pool.shutdown(wait=wait, cancel_futures=not wait)
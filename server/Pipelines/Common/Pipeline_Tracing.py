@@ -0,0 +1,354 @@
+## --------------------------------------------------------------------------------------- ##
+##  Shared Pipeline Components                                                             ##
+## ~ Pipeline Tracing: Stage Spans, Prometheus Histograms, and Slow-Request Logs ~         ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Every HTTP request gets a `Trace` (held in a context variable) and pipeline code wraps its stages in
+# `with stage('rtma.decode') as span :` --> (stage, seconds, bytes) spans. Lane jobs run in other threads
+# or processes, so `Execution_Lane` gives each job a fresh worker trace and merges its spans (and labels
+# such as `cache`) back into the request's trace when the job returns. When a request finishes, its
+# latency and per-stage totals are observed by Prometheus histograms (labels: endpoint, variable, cache),
+# exposed in the text format on `/metrics`, and requests slower than `SLOW_REQUEST_SECONDS` are logged as
+# one JSON line with their stage breakdown.
+#
+# Without a trace (tracing disabled with `TRACING_ENABLED=0`, background ingest, scripts) `stage()`
+# returns a shared no-op span --> the only cost left in the pipelines is one context variable lookup.
+# Metrics are per process: with several uvicorn workers every worker exposes its own `/metrics`.
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Fast JSON encoding (slow-request log lines)
+import orjson
+# Standard Libraries
+import contextvars
+import bisect
+import threading
+import logging
+import time
+import os
+
+
+TRACING_ENABLED = os.environ.get('TRACING_ENABLED', '1') != '0'
+# Requests slower than this (seconds) are written to the `slow_requests` log
+SLOW_REQUEST_SECONDS = float(os.environ.get('SLOW_REQUEST_SECONDS', 10))
+# Upper bounds (seconds) of the latency histogram buckets --> sub-millisecond stages up to 2-minute requests
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120)
+METRIC_PREFIX = 'heat_server'
+
+slow_request_log = logging.getLogger('slow_requests')
+
+
+
+## --------------------------------------------------------------- ##
+##               Traces and Spans (Per Request / Job)              ##
+## --------------------------------------------------------------- ##
+class Trace :
+    # Spans and labels of one request (or of one lane job, merged into its request afterwards)
+    def __init__(self) :
+        self.spans = []
+        self.labels = {}
+
+
+    def merge(self, other) :
+        if other is not None :
+            self.spans.extend(other.spans)
+            self.labels.update(other.labels)
+
+
+    def stage_totals(self) -> dict :
+        # stage --> {'seconds', 'calls', 'bytes'} summed over every span of the stage (e.g. one per frame)
+        totals = {}
+        for name, seconds, size in self.spans :
+            total = totals.get(name)
+            if total is None :
+                total = totals[name] = {'seconds' : 0.0, 'calls' : 0, 'bytes' : 0}
+            total['seconds'] += seconds
+            total['calls'] += 1
+            total['bytes'] += size
+        return totals
+
+
+
+class Span :
+    __slots__ = ('trace', 'name', 'start', 'bytes')
+
+    def __init__(self, trace, name) :
+        self.trace = trace
+        self.name = name
+        self.bytes = 0
+
+
+    def __enter__(self) :
+        self.start = time.perf_counter()
+        return self
+
+
+    def __exit__(self, *exc_info) :
+        # `list.append` is atomic --> dask threads of the same job can record spans concurrently
+        self.trace.spans.append((self.name, time.perf_counter() - self.start, self.bytes))
+        return False
+
+
+    def add_bytes(self, count) :
+        self.bytes += int(count)
+
+
+
+class Null_Span :
+    # Shared stand-in when nothing is being traced
+    __slots__ = ()
+
+    def __enter__(self) :
+        return self
+
+    def __exit__(self, *exc_info) :
+        return False
+
+    def add_bytes(self, count) :
+        pass
+
+
+NULL_SPAN = Null_Span()
+current_trace = contextvars.ContextVar('current_trace', default=None)
+
+
+def stage(name) :
+    # `with stage('sensor.read') as span : ... span.add_bytes(n)`
+    trace = current_trace.get()
+    if trace is None :
+        return NULL_SPAN
+    return Span(trace, name)
+
+
+def mark(**labels) :
+    # Request labels decided inside the pipelines or handlers, e.g. `mark(cache='hit')`
+    trace = current_trace.get()
+    if trace is not None :
+        trace.labels.update(labels)
+
+
+def bind_trace(function) :
+    # Run `function` under the caller's trace in another thread (dask tasks do not inherit context variables)
+    trace = current_trace.get()
+    if trace is None :
+        return function
+
+    def traced(*args, **kwargs) :
+        token = current_trace.set(trace)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            current_trace.reset(token)
+    return traced
+
+
+def run_traced(function, args, kwargs, traced) -> tuple :
+    # Worker side of a lane job --> (result, worker trace or None); always resets the worker's context
+    trace = Trace() if traced else None
+    token = current_trace.set(trace)
+    try:
+        return function(*args, **kwargs), trace
+    except Exception as e :
+        # Failed jobs (e.g. 404s after listing every product) keep their spans --> pickled with the exception
+        e.worker_trace = trace
+        raise
+    finally:
+        current_trace.reset(token)
+
+
+
+## --------------------------------------------------------------- ##
+##           Prometheus Metrics (Text Exposition Format)           ##
+## --------------------------------------------------------------- ##
+def escape_label(value) -> str :
+    # Label values escape backslashes, double quotes, and line feeds
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values, extra='') -> str :
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra :
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value) -> str :
+    return repr(float(value))
+
+
+
+class Histogram :
+    def __init__(self, name, description, label_names, buckets=LATENCY_BUCKETS) :
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # label values --> [per-bucket counts (non-cumulative, + overflow), sum, count]
+        self.series = {}
+
+
+    def observe(self, label_values, value) :
+        series = self.series.get(label_values)
+        if series is None :
+            series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        # First bucket whose upper bound is >= value (the last slot is `+Inf`)
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+
+    def render(self) -> list :
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        for label_values, (counts, total, count) in sorted(self.series.items()) :
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float('inf')), counts) :
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound:g}"'
+                lines.append(f'{self.name}_bucket{format_labels(self.label_names, label_values, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{format_labels(self.label_names, label_values)} {format_value(total)}')
+            lines.append(f'{self.name}_count{format_labels(self.label_names, label_values)} {count}')
+        return lines
+
+
+
+class Counter :
+    def __init__(self, name, description, label_names) :
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.series = {}
+
+
+    def inc(self, label_values, amount=1) :
+        self.series[label_values] = self.series.get(label_values, 0) + amount
+
+
+    def render(self) -> list :
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} counter']
+        for label_values, value in sorted(self.series.items()) :
+            lines.append(f'{self.name}{format_labels(self.label_names, label_values)} {format_value(value)}')
+        return lines
+
+
+
+class Metrics_Registry :
+    def __init__(self, prefix=METRIC_PREFIX, threshold=SLOW_REQUEST_SECONDS) :
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.request_seconds = Histogram(
+            f'{prefix}_request_duration_seconds', 'HTTP request latency.', ('endpoint', 'variable', 'cache', 'status')
+        )
+        self.stage_seconds = Histogram(
+            f'{prefix}_stage_duration_seconds', 'Time spent per pipeline stage and request.', ('stage', 'endpoint', 'variable', 'cache')
+        )
+        self.stage_bytes = Counter(f'{prefix}_stage_bytes_total', 'Bytes fetched, read, or produced per pipeline stage.', ('stage', 'endpoint'))
+        self.response_bytes = Counter(f'{prefix}_response_bytes_total', 'HTTP response body bytes.', ('endpoint',))
+        self.slow_requests = Counter(f'{prefix}_slow_requests_total', 'Requests slower than the slow-request threshold.', ('endpoint',))
+        # Callables returning [(name, type, description, [(label dict, value)])] --> gauges read at scrape time
+        self.collectors = []
+
+
+    def register_collector(self, collector) :
+        self.collectors.append(collector)
+
+
+    def finish_request(self, trace, endpoint, method, path, status, seconds, response_bytes) -> dict :
+        # Observe one finished request --> returns its summary (logged when slower than the threshold)
+        variable = trace.labels.get('variable', '')
+        # Conditional requests answered without computing anything --> `revalidated`
+        cache = trace.labels.get('cache', 'revalidated' if status == 304 else 'none')
+        totals = trace.stage_totals()
+        with self.lock :
+            self.request_seconds.observe((endpoint, variable, cache, str(status)), seconds)
+            self.response_bytes.inc((endpoint,), response_bytes)
+            for name, total in totals.items() :
+                self.stage_seconds.observe((name, endpoint, variable, cache), total['seconds'])
+                if total['bytes'] > 0 :
+                    self.stage_bytes.inc((name, endpoint), total['bytes'])
+            slow = seconds >= self.threshold
+            if slow :
+                self.slow_requests.inc((endpoint,))
+
+        summary = {
+            'endpoint' : endpoint ,
+            'method' : method ,
+            'path' : path ,
+            'status' : status ,
+            'seconds' : round(seconds, 4) ,
+            'response_bytes' : response_bytes ,
+            'labels' : trace.labels ,
+            # Slowest stages first; time outside every stage is event-loop, queueing, and framework time
+            'stages' : {
+                name : {**total, 'seconds' : round(total['seconds'], 4)}
+                for name, total in sorted(totals.items(), key=lambda item : -item[1]['seconds'])
+            } ,
+        }
+        if slow :
+            slow_request_log.warning(orjson.dumps({'event' : 'slow_request', **summary}, default=str).decode())
+        return summary
+
+
+    def render(self) -> str :
+        with self.lock :
+            lines = []
+            for metric in (self.request_seconds, self.stage_seconds, self.stage_bytes, self.response_bytes, self.slow_requests) :
+                lines.extend(metric.render())
+        for collector in self.collectors :
+            for name, kind, description, samples in collector() :
+                lines.extend([f'# HELP {name} {description}', f'# TYPE {name} {kind}'])
+                for labels, value in samples :
+                    lines.append(f'{name}{format_labels(labels.keys(), labels.values())} {format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry shared by the server and its lanes
+pipeline_metrics = Metrics_Registry()
+# `Content-Type` of the Prometheus text exposition format
+METRICS_MEDIA_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+
+## --------------------------------------------------------------- ##
+##            ASGI Middleware: One Trace per HTTP Request          ##
+## --------------------------------------------------------------- ##
+class Tracing_Middleware :
+    # Plain ASGI (not `BaseHTTPMiddleware`) --> streamed responses are timed until their last frame
+    def __init__(self, app, registry=None, enabled=TRACING_ENABLED) :
+        self.app = app
+        self.registry = registry or pipeline_metrics
+        self.enabled = enabled
+
+
+    async def __call__(self, scope, receive, send) :
+        if scope['type'] != 'http' or not self.enabled :
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        token = current_trace.set(trace)
+        response = {'status' : 500, 'bytes' : 0}
+
+        async def traced_send(message) :
+            if message['type'] == 'http.response.start' :
+                response['status'] = message['status']
+            elif message['type'] == 'http.response.body' :
+                response['bytes'] += len(message.get('body', b''))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, traced_send)
+        finally:
+            current_trace.reset(token)
+            # Route template (e.g. `/v1/alarms/{source}`) --> bounded label cardinality
+            route = scope.get('route')
+            self.registry.finish_request(
+                trace, getattr(route, 'path', 'unmatched'), scope['method'], scope['path'],
+                response['status'], time.perf_counter() - start, response['bytes']
+            )
@@ -0,0 +1,247 @@
+## --------------------------------------------------------------------------------------- ##
+##  Shared Pipeline Components                                                             ##
+## ~ Two-Tier Product Cache: In-Memory LRU (Byte Budget) + Size-Bounded Disk Store ~       ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+# Standard Libraries
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+import os
+
+
+## --------------------------------------------------------------- ##
+##      Product Cache: Cropped Arrays and Rendered Payloads        ##
+## --------------------------------------------------------------- ##
+# Cached values are either serialized payloads (`bytes`) or a dictionary of NumPy arrays
+class Product_Cache :
+    def __init__(self, name, memory_budget=256 * 2**20, disk_dir=None, disk_budget=2 * 2**30) :
+        self.name = name
+        # In-memory tier --> least-recently-used entries are evicted beyond `memory_budget` bytes
+        self.memory_budget = memory_budget
+        self.memory = OrderedDict()  # key --> (value, nbytes, expires)
+        self.memory_bytes = 0
+        # On-disk tier (compressed NPZ) --> optional, least-recently-used files are evicted beyond `disk_budget`
+        self.disk_dir = disk_dir
+        self.disk_budget = disk_budget
+        self.disk_bytes = 0
+        if self.disk_dir is not None :
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self.disk_bytes = sum(os.path.getsize(path) for path in self.disk_files())
+        self.lock = threading.RLock()
+        self.counters = {
+            'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+            'memory_evictions': 0, 'disk_evictions': 0, 'expirations': 0,
+        }
+
+
+    ## =============================================================== ##
+    ##                          Cache Keys                             ##
+    ## =============================================================== ##
+    @staticmethod
+    def make_key(*parts) -> str :
+        # Stable, filesystem-safe key from the request parameters
+        return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+    @staticmethod
+    def nbytes(value) -> int :
+        if isinstance(value, (bytes, bytearray, memoryview)) :
+            return len(value)
+        return sum(array.nbytes for array in value.values())
+
+
+    ## =============================================================== ##
+    ##                       Lookup and Storage                        ##
+    ## =============================================================== ##
+    def get(self, key) :
+        now = time.time()
+        with self.lock :
+            # (1) In-memory tier
+            if key in self.memory :
+                value, size, expires = self.memory[key]
+                if expires is None or expires > now :
+                    self.memory.move_to_end(key)
+                    self.counters['memory_hits'] += 1
+                    return value
+                self.drop_memory(key)
+                self.counters['expirations'] += 1
+
+        # (2) On-disk tier --> promoted back into memory on a hit
+        value, expires = self.read_disk(key, now)
+        with self.lock :
+            if value is None :
+                self.counters['misses'] += 1
+                return None
+            self.counters['disk_hits'] += 1
+            self.put_memory(key, value, expires)
+        return value
+
+
+    def peek(self, key, name) :
+        # One array of a cached dictionary entry (e.g. its product) --> the rest of the entry is neither
+        # loaded from disk nor promoted into memory, and the hit/miss counters are left untouched
+        now = time.time()
+        with self.lock :
+            if key in self.memory :
+                value, _, expires = self.memory[key]
+                if expires is None or expires > now :
+                    return value.get(name) if isinstance(value, dict) else None
+        if self.disk_dir is None or not os.path.exists(self.disk_path(key)) :
+            return None
+        try:
+            with np.load(self.disk_path(key), allow_pickle=False) as stored :
+                expires = float(stored['__expires__'])
+                if not np.isnan(expires) and expires <= now :
+                    return None
+                return stored[name] if name in stored.files else None
+        except (OSError, ValueError, KeyError) :
+            return None
+
+
+    def put(self, key, value, ttl=None) :
+        # `ttl=None` --> the entry never expires (e.g. historical hours)
+        expires = None if ttl is None else time.time() + ttl
+        with self.lock :
+            self.put_memory(key, value, expires)
+        self.write_disk(key, value, expires)
+
+
+    def stats(self) -> dict :
+        with self.lock :
+            lookups = self.counters['memory_hits'] + self.counters['disk_hits'] + self.counters['misses']
+            return {
+                'name' : self.name ,
+                **self.counters ,
+                'hit_ratio' : 0.0 if lookups == 0 else (lookups - self.counters['misses']) / lookups ,
+                'memory_entries' : len(self.memory) ,
+                'memory_bytes' : self.memory_bytes ,
+                'memory_budget' : self.memory_budget ,
+                'disk_bytes' : self.disk_bytes ,
+                'disk_budget' : self.disk_budget if self.disk_dir is not None else 0 ,
+            }
+
+
+    ## =============================================================== ##
+    ##                 In-Memory Tier (LRU, Byte Budget)               ##
+    ## =============================================================== ##
+    def put_memory(self, key, value, expires) :
+        size = self.nbytes(value)
+        if key in self.memory :
+            self.drop_memory(key)
+        if size > self.memory_budget :
+            return
+        self.memory[key] = (value, size, expires)
+        self.memory_bytes += size
+        while self.memory_bytes > self.memory_budget :
+            oldest = next(iter(self.memory))
+            self.drop_memory(oldest)
+            self.counters['memory_evictions'] += 1
+
+
+    def drop_memory(self, key) :
+        _, size, _ = self.memory.pop(key)
+        self.memory_bytes -= size
+
+
+    ## =============================================================== ##
+    ##               On-Disk Tier (Compressed NPZ Files)               ##
+    ## =============================================================== ##
+    def disk_path(self, key) -> str :
+        return os.path.join(self.disk_dir, f'{key}.npz')
+
+
+    def disk_files(self) -> list :
+        return [os.path.join(self.disk_dir, name) for name in os.listdir(self.disk_dir) if name.endswith('.npz')]
+
+
+    def read_disk(self, key, now) :
+        if self.disk_dir is None or not os.path.exists(self.disk_path(key)) :
+            return None, None
+        path = self.disk_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as stored :
+                expires = float(stored['__expires__'])
+                expires = None if np.isnan(expires) else expires
+                if expires is not None and expires <= now :
+                    self.remove_disk(path)
+                    with self.lock :
+                        self.counters['expirations'] += 1
+                    return None, None
+                if '__bytes__' in stored.files :
+                    value = stored['__bytes__'].tobytes()
+                else :
+                    value = {name: stored[name] for name in stored.files if name != '__expires__'}
+            # Refresh the modification time --> used as the disk tier's LRU order
+            os.utime(path)
+            return value, expires
+        except (OSError, ValueError, KeyError) :
+            # Corrupt or concurrently-evicted file --> treat as a miss
+            return None, None
+
+
+    def write_disk(self, key, value, expires) :
+        if self.disk_dir is None :
+            return
+        if isinstance(value, (bytes, bytearray, memoryview)) :
+            arrays = {'__bytes__': np.frombuffer(bytes(value), dtype=np.uint8)}
+        else :
+            arrays = dict(value)
+        arrays['__expires__'] = np.array(np.nan if expires is None else expires)
+
+        path = self.disk_path(key)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(temp_path, 'wb') as temp_file :
+                np.savez_compressed(temp_file, **arrays)
+            size = os.path.getsize(temp_path)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temp_path, path)
+        except OSError :
+            # Disk tier is best-effort --> the in-memory tier still holds the value
+            return
+        with self.lock :
+            self.disk_bytes += size - previous
+        self.evict_disk()
+
+
+    def remove_disk(self, path) :
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError :
+            return
+        with self.lock :
+            self.disk_bytes -= size
+
+
+    @staticmethod
+    def modified_time(path) -> float :
+        try:
+            return os.path.getmtime(path)
+        except OSError :
+            return 0.0
+
+
+    def evict_disk(self) :
+        if self.disk_bytes <= self.disk_budget :
+            return
+        # Oldest (least-recently-used) files are removed first
+        files = sorted(self.disk_files(), key=self.modified_time)
+        for path in files :
+            if self.disk_bytes <= self.disk_budget :
+                break
+            self.remove_disk(path)
+            with self.lock :
+                self.counters['disk_evictions'] += 1
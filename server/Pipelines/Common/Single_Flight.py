@@ -0,0 +1,64 @@
+## --------------------------------------------------------------------------------------- ##
+##  Shared Pipeline Components                                                             ##
+## ~ Single-Flight Request Coalescing: Identical Concurrent Requests Share One Result ~     ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# The first request for a key (the leader) starts the computation; identical requests that arrive
+# while it is in flight (followers) await the same task and receive the same serialized result
+# (or the same exception). Keys are dropped as soon as the task finishes, so nothing is cached here.
+# A follower that disconnects never cancels the shared computation.
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Standard Libraries
+import asyncio
+
+
+## --------------------------------------------------------------- ##
+##        Single Flight: One In-Flight Computation per Key         ##
+## --------------------------------------------------------------- ##
+class Single_Flight :
+    def __init__(self, name) :
+        self.name = name
+        # Normalized request key --> shared asyncio task (only touched from the event loop)
+        self.in_flight = {}
+        self.counters = {'requests' : 0, 'leaders' : 0, 'followers' : 0}
+
+
+    def finish(self, key, task) :
+        # Drop the key once the shared task is done (unless a newer task already replaced it)
+        if self.in_flight.get(key) is task :
+            del self.in_flight[key]
+        # Mark the outcome as retrieved --> no "exception was never retrieved" when every caller left
+        if not task.cancelled() :
+            task.exception()
+
+
+    async def run(self, key, function, *args, **kwargs) :
+        # `function` is a coroutine function, e.g. `Execution_Lane.run`
+        self.counters['requests'] += 1
+        task = self.in_flight.get(key)
+        if task is None :
+            self.counters['leaders'] += 1
+            task = asyncio.ensure_future(function(*args, **kwargs))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self.finish(key, done))
+        else :
+            self.counters['followers'] += 1
+        return await asyncio.shield(task)
+
+
+    def stats(self) -> dict :
+        requests = self.counters['requests']
+        return {
+            **self.counters ,
+            'in_flight' : len(self.in_flight) ,
+            # Share of requests served by another request's computation
+            'coalescing_ratio' : self.counters['followers'] / requests if requests > 0 else 0.0 ,
+        }
@@ -0,0 +1,194 @@
+## --------------------------------------------------------------------------------------- ##
+##  Shared Pipeline Components                                                             ##
+## ~ XYZ Tile Pyramid: Web Mercator Reprojection (Once per Hour) and 256 x 256 Tiles ~     ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Grids served by the pipelines are regular (lon, lat) grids, so the Web Mercator reprojection is
+# separable --> one nearest-neighbour index per Mercator column and one per Mercator row. The base
+# level uses the coarsest zoom whose pixels are no larger than half the grid spacing; lower zooms are
+# 2 x 2 NaN-aware means of the level above, higher zooms repeat base pixels (overzoom).
+# Every level is stored in global pixel coordinates (`origin` = top-left global pixel), so a tile
+# (z, x, y) is a plain slice [y * 256, (y + 1) * 256) x [x * 256, (x + 1) * 256) of its level.
+# Raw tiles are little-endian float32 (256 x 256, row 0 = north), NaN where there is no data.
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+# Standard Libraries
+from collections import OrderedDict
+import threading
+import math
+import time
+
+
+TILE_SIZE = 256
+# Finest base zoom built (bounds memory for very fine grids --> deeper zooms are overzoomed)
+MAX_BASE_ZOOM = 12
+# Web Mercator latitude limit
+MAX_LATITUDE = 85.05112878
+
+
+## --------------------------------------------------------------- ##
+##                 Web Mercator Pixel Coordinates                  ##
+## --------------------------------------------------------------- ##
+def lon_to_pixel(lon, zoom) -> np.ndarray :
+    return (np.asarray(lon, dtype=np.float64) + 180.0) / 360.0 * (TILE_SIZE * 2**zoom)
+
+
+def lat_to_pixel(lat, zoom) -> np.ndarray :
+    phi = np.radians(np.clip(np.asarray(lat, dtype=np.float64), -MAX_LATITUDE, MAX_LATITUDE))
+    return (1.0 - np.log(np.tan(phi) + 1.0 / np.cos(phi)) / np.pi) / 2.0 * (TILE_SIZE * 2**zoom)
+
+
+def pixel_to_lon(px, zoom) -> np.ndarray :
+    return np.asarray(px, dtype=np.float64) / (TILE_SIZE * 2**zoom) * 360.0 - 180.0
+
+
+def pixel_to_lat(py, zoom) -> np.ndarray :
+    n = np.pi * (1.0 - 2.0 * np.asarray(py, dtype=np.float64) / (TILE_SIZE * 2**zoom))
+    return np.degrees(np.arctan(np.sinh(n)))
+
+
+def nearest_index(coords, targets) -> tuple :
+    # Nearest grid index of every target (ascending 1-D coordinates) and whether it falls inside the grid cell
+    upper = np.clip(np.searchsorted(coords, targets), 1, len(coords) - 1)
+    lower = upper - 1
+    index = np.where(np.abs(targets - coords[lower]) <= np.abs(coords[upper] - targets), lower, upper)
+    half = np.abs(np.diff(coords)).max() / 2 if len(coords) > 1 else 0.0
+    valid = (targets >= coords[0] - half) & (targets <= coords[-1] + half)
+    return index, valid
+
+
+def downsample(level, origin) -> tuple :
+    # 2 x 2 NaN-aware mean --> the next coarser zoom (origin kept on even global pixels)
+    (oy, ox) = origin
+    pad_top, pad_left = oy % 2, ox % 2
+    height = level.shape[0] + pad_top
+    width = level.shape[1] + pad_left
+    padded = np.full((height + height % 2, width + width % 2), np.nan, dtype=level.dtype)
+    padded[pad_top:pad_top + level.shape[0], pad_left:pad_left + level.shape[1]] = level
+
+    blocks = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2)
+    present = ~np.isnan(blocks)
+    counts = present.sum(axis=(1, 3))
+    sums = np.where(present, blocks, 0).sum(axis=(1, 3))
+    coarse = np.full(counts.shape, np.nan, dtype=level.dtype)
+    np.divide(sums, counts, out=coarse, where=counts > 0)
+    return coarse, ((oy - pad_top) // 2, (ox - pad_left) // 2)
+
+
+
+## --------------------------------------------------------------- ##
+##          Tile Pyramid: One Reprojected Hour, All Zooms          ##
+## --------------------------------------------------------------- ##
+class Tile_Pyramid :
+    def __init__(self, values, longitude, latitude, base_zoom=None) :
+        values = np.asarray(values, dtype=np.float32)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        latitude = np.asarray(latitude, dtype=np.float64)
+        # Ascending coordinates (rows south --> north, columns west --> east)
+        if longitude[0] > longitude[-1] :
+            longitude, values = longitude[::-1], values[:, ::-1]
+        if latitude[0] > latitude[-1] :
+            latitude, values = latitude[::-1], values[::-1]
+
+        # Coarsest zoom whose Mercator pixels are no wider than half the grid spacing
+        # (keeps nearest-neighbour resampling within a quarter cell of the true position)
+        if base_zoom is None :
+            spacing = float(np.abs(np.diff(longitude)).min()) if len(longitude) > 1 else 360.0 / TILE_SIZE
+            base_zoom = min(MAX_BASE_ZOOM, max(0, math.ceil(math.log2(360.0 / (spacing * TILE_SIZE))) + 1))
+        self.base_zoom = base_zoom
+        # Data version behind the pyramid (e.g. RTMA product), set by the builder when it matters
+        self.version = None
+        self.bounds = [float(longitude[0]), float(latitude[0]), float(longitude[-1]), float(latitude[-1])]
+
+        # Reproject once: one index per Mercator column (longitude) and one per Mercator row (latitude)
+        half_x = (longitude[-1] - longitude[0]) / max(len(longitude) - 1, 1) / 2
+        half_y = (latitude[-1] - latitude[0]) / max(len(latitude) - 1, 1) / 2
+        x0 = int(math.floor(lon_to_pixel(longitude[0] - half_x, base_zoom)))
+        x1 = int(math.ceil(lon_to_pixel(longitude[-1] + half_x, base_zoom)))
+        y0 = int(math.floor(lat_to_pixel(latitude[-1] + half_y, base_zoom)))
+        y1 = int(math.ceil(lat_to_pixel(latitude[0] - half_y, base_zoom)))
+        columns, valid_columns = nearest_index(longitude, pixel_to_lon(np.arange(x0, x1) + 0.5, base_zoom))
+        rows, valid_rows = nearest_index(latitude, pixel_to_lat(np.arange(y0, y1) + 0.5, base_zoom))
+
+        base = values[np.ix_(rows, columns)]
+        base[~valid_rows, :] = np.nan
+        base[:, ~valid_columns] = np.nan
+
+        # zoom --> (array, (global row, global column) of its top-left pixel)
+        self.levels = {base_zoom : (base, (y0, x0))}
+        for zoom in range(base_zoom - 1, -1, -1) :
+            self.levels[zoom] = downsample(*self.levels[zoom + 1])
+
+
+    def tile(self, z, x, y) -> np.ndarray :
+        # float32 (256, 256) tile, NaN outside the grid
+        out = np.full((TILE_SIZE, TILE_SIZE), np.nan, dtype=np.float32)
+        if z < 0 or not (0 <= x < 2**z and 0 <= y < 2**z) :
+            return out
+
+        # Overzoom --> cut the covering base-level pixels and repeat them
+        factor = 2**max(z - self.base_zoom, 0)
+        level, (oy, ox) = self.levels[min(z, self.base_zoom)]
+        size = TILE_SIZE // factor if factor <= TILE_SIZE else 1
+        top = (y * TILE_SIZE) // factor - oy
+        left = (x * TILE_SIZE) // factor - ox
+
+        # Intersect the tile window with the level array
+        r0, r1 = max(top, 0), min(top + size, level.shape[0])
+        c0, c1 = max(left, 0), min(left + size, level.shape[1])
+        if r0 >= r1 or c0 >= c1 :
+            return out
+        window = np.full((size, size), np.nan, dtype=np.float32)
+        window[r0 - top:r1 - top, c0 - left:c1 - left] = level[r0:r1, c0:c1]
+
+        if factor == 1 :
+            return window
+        if factor <= TILE_SIZE :
+            return np.repeat(np.repeat(window, factor, axis=0), factor, axis=1)
+        # Deeper than 256x the base zoom --> the tile sits inside a single base pixel
+        out[:] = window[0, 0]
+        return out
+
+
+
+## --------------------------------------------------------------- ##
+##        Pyramid Store: Most Recently Used Hours in Memory        ##
+## --------------------------------------------------------------- ##
+class Tile_Pyramid_Store :
+    def __init__(self, max_entries=48) :
+        self.max_entries = max_entries
+        self.pyramids = OrderedDict()
+        self.lock = threading.Lock()
+
+
+    def get(self, key) :
+        with self.lock :
+            entry = self.pyramids.get(key)
+            if entry is None :
+                return None
+            pyramid, expires = entry
+            if expires is not None and expires <= time.time() :
+                # Built from a product that may have been superseded since --> rebuilt on the next request
+                del self.pyramids[key]
+                return None
+            self.pyramids.move_to_end(key)
+            return pyramid
+
+
+    def put(self, key, pyramid, ttl=None) :
+        # `ttl=None` --> kept until evicted (e.g. historical hours, final analyses)
+        expires = None if ttl is None else time.time() + ttl
+        with self.lock :
+            self.pyramids[key] = (pyramid, expires)
+            self.pyramids.move_to_end(key)
+            while len(self.pyramids) > self.max_entries :
+                self.pyramids.popitem(last=False)
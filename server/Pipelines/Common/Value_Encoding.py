@@ -0,0 +1,135 @@
+## --------------------------------------------------------------------------------------- ##
+##  Shared Pipeline Components                                                             ##
+## ~ Value Grid Encoding: Scale/Offset int16 Grids with a No-Data Sentinel (+ Delta/zlib) ~ ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# `climate_var_values` encodings (query parameter `values`):
+#   'float'       --> values rounded to 0.01 (JSON numbers / float32 in the binary envelope), the default
+#   'int16'       --> int16 grid as little-endian bytes (base64 string in JSON / uint8 bytes in the binary
+#                     envelope) --> JSON integer text would cost up to 6 characters per pixel
+#   'int16_delta' --> the same int16 grid, row-major first differences (wrapping int16), zlib-compressed
+#                     (base64 string in JSON / uint8 bytes in the binary envelope)
+#
+# The int16 encodings add `climate_var_values_encoding`:
+#   {"dtype": "int16", "scale": 0.01, "offset": 87.5, "nodata": -32768, "shape": [height, width],
+#    "filter": null | "delta", "compression": null | "zlib", "byte_order": "little"}
+# value = offset + q * scale for every q != nodata (no data / NaN otherwise). The offset is the middle
+# of the frame's value range, so ±327.67 around it fits at 0.01; wider ranges get a larger `scale`.
+#
+# Reference decoder (JavaScript):
+#   async function decodeValues(values, enc) {
+#     let q;
+#     const bytes = typeof values === 'string' ? Uint8Array.from(atob(values), (c) => c.charCodeAt(0)) : values;
+#     if (enc.compression === 'zlib') {
+#       const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+#       q = new Int16Array(await new Response(stream).arrayBuffer());
+#     } else {
+#       q = new Int16Array(bytes.slice().buffer);  // copy --> 2-byte aligned
+#     }
+#     if (enc.filter === 'delta') { for (let i = 1; i < q.length; i++) q[i] = q[i] + q[i - 1]; }  // Int16Array wraps
+#     const out = new Float32Array(q.length);
+#     for (let i = 0; i < q.length; i++) out[i] = q[i] === enc.nodata ? NaN : enc.offset + q[i] * enc.scale;
+#     return out;  // row-major (height, width), north-up like `climate_var_image`
+#   }
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+# Standard Libraries
+import base64
+import math
+import zlib
+
+
+VALUE_ENCODINGS = ('float', 'int16', 'int16_delta')
+# Precision of the `float` payloads --> the int16 step whenever the frame's range allows it
+VALUE_SCALE = 0.01
+NODATA = -32768
+# Largest |q| of valid values (NODATA stays reserved)
+QUANTIZED_MAX = 32767
+# Deltas are small integers --> higher levels barely shrink them but cost ~4x the time
+VALUE_ZLIB_LEVEL = 1
+
+
+def value_range(values) -> tuple :
+    # (min, max) of the finite values (None when the grid holds no data)
+    finite = values[np.isfinite(values)]
+    if finite.size == 0 :
+        return None
+    return float(finite.min()), float(finite.max())
+
+
+def encode_values(values, encoding='int16', scale=VALUE_SCALE) -> tuple :
+    # (height, width) float grid (NaN = no data) --> (little-endian int16 bytes or zlib bytes, encoding metadata)
+    if encoding not in VALUE_ENCODINGS[1:] :
+        raise ValueError(f'Unknown value encoding `{encoding}`, expected one of {VALUE_ENCODINGS}')
+    values = np.asarray(values)
+    bounds = value_range(values)
+    offset = 0.0
+    if bounds is not None :
+        # Widen the step only when the range does not fit in ±32767 steps around the middle
+        scale = scale * max(1, math.ceil((bounds[1] - bounds[0]) / scale / (2 * QUANTIZED_MAX - 1)))
+        offset = round(round((bounds[0] + bounds[1]) / 2 / scale) * scale, 10)
+
+    # Shift, scale, and round in place in float64 (|error| <= scale / 2 of the source value), then cast;
+    # NaN --> NODATA
+    scaled = np.subtract(values, offset, dtype=np.float64)
+    scaled /= scale
+    np.rint(scaled, out=scaled)
+    quantized = np.empty(values.shape, dtype=np.int16)
+    with np.errstate(invalid='ignore') :
+        np.copyto(quantized, scaled, casting='unsafe')
+    quantized[np.isnan(values)] = NODATA
+
+    metadata = {
+        'dtype' : 'int16' ,
+        'scale' : scale ,
+        'offset' : offset ,
+        'nodata' : NODATA ,
+        'shape' : list(values.shape) ,
+        'filter' : None ,
+        'compression' : None ,
+        'byte_order' : 'little' ,
+    }
+    if encoding == 'int16' :
+        return quantized.astype('<i2', copy=False).tobytes(), metadata
+
+    # Neighbouring pixels differ by a few steps --> small deltas compress far better than the grid
+    flat = quantized.ravel()
+    delta = np.empty_like(flat)
+    delta[:1] = flat[:1]
+    np.subtract(flat[1:], flat[:-1], out=delta[1:])
+    metadata.update({'filter' : 'delta', 'compression' : 'zlib'})
+    return zlib.compress(delta.astype('<i2', copy=False).tobytes(), VALUE_ZLIB_LEVEL), metadata
+
+
+def decode_values(encoded, metadata) -> np.ndarray :
+    # Reference decoder (Python) --> float64 (height, width) grid with NaN where no data
+    # base64 string (JSON), bytes, or uint8 array (binary envelope)
+    if isinstance(encoded, str) :
+        encoded = base64.b64decode(encoded)
+    encoded = bytes(encoded)
+    if metadata['compression'] == 'zlib' :
+        encoded = zlib.decompress(encoded)
+    quantized = np.frombuffer(encoded, dtype='<i2').astype(np.int16)
+    if metadata['filter'] == 'delta' :
+        # Wrapping cumulative sum restores the exact int16 grid
+        quantized = np.cumsum(quantized, dtype=np.int16)
+    values = metadata['offset'] + quantized * float(metadata['scale'])
+    values[quantized == metadata['nodata']] = np.nan
+    return values.reshape(metadata['shape'])
+
+
+def value_fields(values, encoding='float') -> dict :
+    # Payload fields of a north-up value grid --> `climate_var_values` (+ its encoding metadata)
+    if encoding == 'float' :
+        return {'climate_var_values' : np.around(values, 2)}
+    encoded, metadata = encode_values(values, encoding)
+    return {'climate_var_values' : encoded, 'climate_var_values_encoding' : metadata}
@@ -0,0 +1,370 @@
+## --------------------------------------------------------------------------------------- ##
+##  NOAA's Real-Time Mesoscale Analysis (RTMA) Data Pipeline                               ##
+## ~ Analysis-Ready Zarr Archive: Cropped Hourly History per Region of Interest ~          ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# One Zarr group per region (`<store>/southern_california/`) holding the regridded fields of every
+# archived hour as (time, latitude, longitude) float32 arrays named by GRIB short name (`2t`, `10u`,
+# `10v`, and any extra fields such as `2sh` / `sp`), chunked by day in time and by `tile` pixels in
+# space, Blosc/zstd compressed. The hourly `time` axis starts at `ARCHIVE_ORIGIN`, so an hour always
+# maps to the same index and unwritten chunks cost nothing. The per-hour `product` array holds the
+# stored product rank (`RTMA_PRODUCTS` order, -1 = not archived); it is written after the fields,
+# so an hour only counts as archived once all of its fields are complete.
+#
+# The store is a local directory (atomic chunk writes) or any fsspec URL, e.g. the SeaweedFS S3
+# gateway from `start_seaweedfs.sh`: RTMA_ARCHIVE=s3://rtma-archive/rtma.zarr with
+# RTMA_ARCHIVE_S3_ENDPOINT=http://127.0.0.1:8333. Groups open directly in xarray:
+### xr.open_zarr('rtma_archive.zarr', group='southern_california')
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+# Xarray --> Spatiotemporal Multidimensional Array Library
+import xarray as xr
+# Chunked, compressed array storage
+import zarr
+import numcodecs
+# Standard Libraries
+import datetime
+import threading
+import time
+import os
+# Product preference order (index = stored rank)
+from Pipelines.NOAA.RTMA.RTMA_Cache import RTMA_PRODUCTS
+
+
+# First hour of the archive time axis (RTMA 2.5 km analyses on the NOAA bucket start in 2014)
+ARCHIVE_ORIGIN = datetime.datetime(2014, 1, 1)
+# Hours per time chunk (one day) and spatial tile edge (pixels) of every field chunk
+ARCHIVE_TIME_CHUNK = 24
+ARCHIVE_TILE = 64
+# Seconds before a missing region, or an hour beyond the archived time axis, is looked up again
+ARCHIVE_REFRESH_SECONDS = float(os.environ.get('RTMA_ARCHIVE_REFRESH_SECONDS', 60))
+ARCHIVE_COMPRESSOR = numcodecs.Blosc(cname='zstd', clevel=5, shuffle=numcodecs.Blosc.SHUFFLE)
+# `product` value of hours that are not archived
+NOT_ARCHIVED = -1
+ONE_HOUR = datetime.timedelta(hours=1)
+
+
+def hour_offset(valid_time) -> int :
+    # Hours since the archive origin (negative before it)
+    return (valid_time - ARCHIVE_ORIGIN) // ONE_HOUR
+
+
+def hour_index(valid_time) -> int :
+    # Storage index of an hour that can be written --> hours before the origin are rejected
+    index = hour_offset(valid_time)
+    if index < 0 :
+        raise ValueError(f'{valid_time:%Y-%m-%d %H}Z precedes the archive origin {ARCHIVE_ORIGIN:%Y-%m-%d}')
+    return index
+
+
+def hour_range(start, end) -> list :
+    # Every hour of [start, end] (inclusive)
+    hours = []
+    valid_time = start
+    while valid_time <= end :
+        hours.append(valid_time)
+        valid_time += ONE_HOUR
+    return hours
+
+
+def archive_storage_options(store) -> dict :
+    # S3 stores (SeaweedFS gateway, MinIO, AWS) --> endpoint and anonymous access from the environment
+    if not store.startswith('s3://') :
+        return {}
+    options = {'anon' : os.environ.get('RTMA_ARCHIVE_S3_ANON', '0') != '0'}
+    endpoint_url = os.environ.get('RTMA_ARCHIVE_S3_ENDPOINT')
+    if endpoint_url :
+        options['client_kwargs'] = {'endpoint_url' : endpoint_url}
+    return options
+
+
+
+## --------------------------------------------------------------- ##
+##                Zarr Archive of Regridded RTMA Hours             ##
+## --------------------------------------------------------------- ##
+class RTMA_Archive :
+    def __init__(self, store, mode='r', storage_options=None, time_chunk=ARCHIVE_TIME_CHUNK, tile=ARCHIVE_TILE,
+                 refresh_seconds=ARCHIVE_REFRESH_SECONDS) :
+        # `mode='r'` for readers (the server), `mode='a'` for the backfill
+        self.location = store
+        self.mode = mode
+        if '://' in store :
+            options = archive_storage_options(store) if storage_options is None else storage_options
+            self.store = zarr.storage.FSStore(store, mode='r' if mode == 'r' else 'w', **options)
+        else :
+            # Directory stores write every chunk to a temporary file and rename it --> readers never see partial chunks
+            self.store = zarr.storage.DirectoryStore(store)
+        self.time_chunk = time_chunk
+        self.tile = tile
+        # Region key --> opened arrays and coordinates (None = not archived) and when they were opened
+        self.regions = {}
+        self.opened_at = {}
+        self.refresh_seconds = refresh_seconds
+        self.lock = threading.Lock()
+
+
+    @classmethod
+    def from_env(cls) :
+        # Archive read by the server pathways (`RTMA_ARCHIVE` unset --> no archive)
+        store = os.environ.get('RTMA_ARCHIVE')
+        return cls(store) if store else None
+
+
+    ## =============================================================== ##
+    ##                   Opening and Creating Groups                   ##
+    ## =============================================================== ##
+    def open_region(self, region, refresh=False) :
+        # {'group', 'product', 'arrays' (short name --> zarr array), 'longitude', 'latitude'} or None
+        key = region.key()
+        with self.lock :
+            opened = self.regions.get(key)
+            if opened is not None and not refresh :
+                return opened
+        try:
+            group = zarr.open_group(self.store, mode='r' if self.mode == 'r' else 'r+', path=key)
+        except (zarr.errors.GroupNotFoundError, KeyError) :
+            group = None
+        if group is None or 'product' not in group :
+            opened = None
+        else :
+            opened = {
+                'group' : group ,
+                'product' : group['product'] ,
+                'arrays' : {name : group[name] for name in group.attrs['short_names']} ,
+                'longitude' : group['longitude'][:] ,
+                'latitude' : group['latitude'][:] ,
+            }
+        with self.lock :
+            self.regions[key] = opened
+            self.opened_at[key] = time.monotonic()
+        return opened
+
+
+    def create_region(self, region, data_arrays, filter_keys) :
+        # Group, coordinates, and empty field arrays from the first retrieved hour (the grid of the region).
+        # The archived fields are fixed here --> every archived hour holds all of them
+        root = zarr.open_group(self.store, mode='a')
+        group = root.require_group(region.key())
+        longitude = np.asarray(data_arrays[0]['longitude'].values)
+        latitude = np.asarray(data_arrays[0]['latitude'].values)
+        group.array('longitude', longitude, chunks=len(longitude), compressor=None, overwrite=True)
+        group.array('latitude', latitude, chunks=len(latitude), compressor=None, overwrite=True)
+        group['longitude'].attrs.update({'_ARRAY_DIMENSIONS' : ['longitude'], 'units' : 'degrees_east'})
+        group['latitude'].attrs.update({'_ARRAY_DIMENSIONS' : ['latitude'], 'units' : 'degrees_north'})
+
+        group.zeros('time', shape=0, chunks=self.time_chunk * 366, dtype='i8', overwrite=True)
+        group['time'].attrs.update({
+            '_ARRAY_DIMENSIONS' : ['time'] ,
+            'units' : f'hours since {ARCHIVE_ORIGIN:%Y-%m-%d %H:%M:%S}' ,
+            'calendar' : 'proleptic_gregorian' ,
+        })
+        for filter_key, data_array in zip(filter_keys, data_arrays) :
+            group.full(
+                filter_key['shortName'], fill_value=np.nan, shape=(0, len(latitude), len(longitude)), dtype='f4',
+                chunks=(self.time_chunk, min(self.tile, len(latitude)), min(self.tile, len(longitude))),
+                compressor=ARCHIVE_COMPRESSOR, overwrite=True,
+            )
+            group[filter_key['shortName']].attrs.update({
+                '_ARRAY_DIMENSIONS' : ['time', 'latitude', 'longitude'] ,
+                'short_name' : filter_key['shortName'] ,
+                'name' : str(data_array.name) ,
+            })
+
+        # `product` last --> a group without it is an interrupted creation (recreated by the next backfill)
+        group.full('product', fill_value=NOT_ARCHIVED, shape=0, chunks=self.time_chunk, dtype='i1', overwrite=True)
+        group['product'].attrs.update({
+            '_ARRAY_DIMENSIONS' : ['time'] ,
+            'flag_values' : [NOT_ARCHIVED, *range(len(RTMA_PRODUCTS))] ,
+            'flag_meanings' : ' '.join(['not_archived', *[name for name, _ in RTMA_PRODUCTS]]) ,
+        })
+        group.attrs.update({
+            'region' : region.key() ,
+            'bounds' : region.bounds() ,
+            'origin' : ARCHIVE_ORIGIN.isoformat() ,
+            'time_chunk' : self.time_chunk ,
+            'filter_keys' : filter_keys ,
+            'short_names' : [filter_key['shortName'] for filter_key in filter_keys] ,
+            'names' : {filter_key['shortName'] : str(data_array.name) for filter_key, data_array in zip(filter_keys, data_arrays)} ,
+        })
+        return self.open_region(region, refresh=True)
+
+
+    def filter_keys(self, region) -> list :
+        # GRIB filter keys of the fields archived for the region (None when the region is not archived)
+        opened = self.open_region(region)
+        return None if opened is None else list(opened['group'].attrs['filter_keys'])
+
+
+    def extend(self, region, end) :
+        # Grow the time axis to cover `end` (only ever called by one writer, before the workers start)
+        group = zarr.open_group(self.store, mode='r+', path=region.key())
+        size = hour_index(end) + 1
+        current = group['product'].shape[0]
+        if size <= current :
+            return
+        group['time'].resize(size)
+        group['time'][current:] = np.arange(current, size, dtype=np.int64)
+        group['product'].resize(size)
+        for short_name in group.attrs['short_names'] :
+            group[short_name].resize(size, *group[short_name].shape[1:])
+        self.open_region(region, refresh=True)
+
+
+    def consolidate(self) :
+        # Consolidated metadata (`.zmetadata`) for xarray / dask readers, refreshed after every backfill
+        zarr.consolidate_metadata(self.store)
+
+
+    ## =============================================================== ##
+    ##                 Writing and Reading Hourly Fields               ##
+    ## =============================================================== ##
+    def write_hour(self, region, valid_time, data_arrays, short_names, product) :
+        # Fields first, then the product rank --> an interrupted write leaves the hour "not archived"
+        opened = self.open_region(region)
+        index = hour_index(valid_time)
+        if opened is None or index >= opened['product'].shape[0] :
+            raise ValueError(f'Archive region {region.key()} does not cover {valid_time:%Y-%m-%d %H}Z yet')
+        if sorted(short_names) != sorted(opened['arrays']) :
+            raise ValueError(f'Archive region {region.key()} stores {list(opened["arrays"])}, received {list(short_names)}')
+        for short_name, data_array in zip(short_names, data_arrays) :
+            values = np.asarray(data_array.values, dtype=np.float32)
+            array = opened['arrays'][short_name]
+            if values.shape != array.shape[1:] :
+                raise ValueError(f'Field `{short_name}` of shape {values.shape} does not fit the archive of {region.key()}')
+            array[index] = values
+        opened['product'][index] = [name for name, _ in RTMA_PRODUCTS].index(product)
+
+
+    def region_covering(self, region, index, short_names=()) :
+        # Opened region whose time axis covers `index` and that archives every short name (None otherwise).
+        # Missing regions and hours beyond the cached shape are looked up again at most every `refresh_seconds`
+        key = region.key()
+        with self.lock :
+            cached = key in self.regions
+            opened = self.regions.get(key)
+            stale = time.monotonic() - self.opened_at.get(key, 0.0) > self.refresh_seconds
+        if not cached or (stale and (opened is None or index >= opened['product'].shape[0])) :
+            opened = self.open_region(region, refresh=True)
+        if opened is None or index >= opened['product'].shape[0] :
+            return None
+        if any(name not in opened['arrays'] for name in short_names) :
+            return None
+        return opened
+
+
+    def product_ranks(self, region, start, end) -> np.ndarray :
+        # Stored product rank of every hour of [start, end] (`NOT_ARCHIVED` where missing or before the origin)
+        first, last = hour_offset(start), hour_offset(end)
+        ranks = np.full(last - first + 1, NOT_ARCHIVED, dtype=np.int8)
+        stored_first = max(first, 0)
+        opened = self.region_covering(region, stored_first) if last >= 0 else None
+        if opened is not None :
+            stored = opened['product'][stored_first:min(last + 1, opened['product'].shape[0])]
+            ranks[stored_first - first:stored_first - first + len(stored)] = stored
+        return ranks
+
+
+    def read_hour(self, region, valid_time, short_names) :
+        # (regridded DataArrays in `short_names` order, product name) or None when the hour is not archived
+        index = hour_offset(valid_time)
+        if index < 0 :
+            return None
+        opened = self.region_covering(region, index, short_names)
+        if opened is None :
+            return None
+        rank = int(opened['product'][index])
+        if rank == NOT_ARCHIVED :
+            return None
+
+        names = opened['group'].attrs.get('names', {})
+        lon_da = xr.DataArray(opened['longitude'], dims=['x'], name='longitude', attrs={'units': 'degrees_east'})
+        lat_da = xr.DataArray(opened['latitude'], dims=['y'], name='latitude', attrs={'units': 'degrees_north'})
+        data_arrays = [
+            xr.DataArray(
+                opened['arrays'][short_name][index], dims=['y', 'x'], name=names.get(short_name, short_name),
+                coords={'longitude': lon_da, 'latitude': lat_da},
+            )
+            for short_name in short_names
+        ]
+        return data_arrays, RTMA_PRODUCTS[rank][0]
+
+
+    def read_point(self, region, lon, lat, start, end, short_names) :
+        # Nearest archived pixel over [start, end] --> {'present', 'values' (short name --> float32 column),
+        # 'grid_lon', 'grid_lat'}; None when the region is not archived (or the range ends before the origin)
+        first, last = hour_offset(start), hour_offset(end)
+        if last < 0 :
+            return None
+        stored_first = max(first, 0)
+        opened = self.region_covering(region, stored_first, short_names)
+        if opened is None :
+            return None
+        column = int(np.abs(opened['longitude'] - lon).argmin())
+        row = int(np.abs(opened['latitude'] - lat).argmin())
+
+        # Hours before the origin stay absent (NaN)
+        hours = last - first + 1
+        stop = max(min(last + 1, opened['product'].shape[0]), stored_first)
+        span = slice(stored_first - first, stop - first)
+        present = np.zeros(hours, dtype=bool)
+        present[span] = opened['product'][stored_first:stop] != NOT_ARCHIVED
+        values = {}
+        for short_name in short_names :
+            values[short_name] = np.full(hours, np.nan, dtype=np.float32)
+            values[short_name][span] = opened['arrays'][short_name][stored_first:stop, row, column]
+            values[short_name][~present] = np.nan
+        return {
+            'present' : present ,
+            'values' : values ,
+            'grid_lon' : float(opened['longitude'][column]) ,
+            'grid_lat' : float(opened['latitude'][row]) ,
+        }
+
+
+    ## =============================================================== ##
+    ##                    Gap Detection and Coverage                   ##
+    ## =============================================================== ##
+    def gaps(self, region, start, end) -> list :
+        # Missing hours of [start, end] as inclusive (first, last) ranges
+        hours = hour_range(start, end)
+        missing = np.flatnonzero(self.product_ranks(region, start, end) == NOT_ARCHIVED)
+        if len(missing) == 0 :
+            return []
+        breaks = np.flatnonzero(np.diff(missing) > 1)
+        firsts = np.concatenate([missing[:1], missing[breaks + 1]])
+        lasts = np.concatenate([missing[breaks], missing[-1:]])
+        return [(hours[first], hours[last]) for first, last in zip(firsts, lasts)]
+
+
+    def coverage(self, region) -> dict :
+        # First / last archived hour, archived hours, and the hours missing in between
+        opened = self.open_region(region, refresh=True)
+        if opened is None :
+            return {'region' : region.key(), 'first' : None, 'last' : None, 'hours' : 0, 'missing' : 0, 'fields' : []}
+        archived = np.flatnonzero(opened['product'][:] != NOT_ARCHIVED)
+        if len(archived) == 0 :
+            first = last = None
+        else :
+            first = (ARCHIVE_ORIGIN + int(archived[0]) * ONE_HOUR).isoformat()
+            last = (ARCHIVE_ORIGIN + int(archived[-1]) * ONE_HOUR).isoformat()
+        return {
+            'region' : region.key() ,
+            'first' : first ,
+            'last' : last ,
+            'hours' : len(archived) ,
+            'missing' : 0 if len(archived) == 0 else int(archived[-1] - archived[0] + 1 - len(archived)) ,
+            'fields' : list(opened['arrays']) ,
+        }
+
+
+# Process-wide archive read by the RTMA pipeline (None unless `RTMA_ARCHIVE` is set)
+default_rtma_archive = RTMA_Archive.from_env()
@@ -0,0 +1,141 @@
+## --------------------------------------------------------------------------------------- ##
+##  NOAA's Real-Time Mesoscale Analysis (RTMA) Data Pipeline                               ##
+## ~ Archive Backfill: Parallel, Resumable Ingest of a Date Range into the Zarr Archive ~   ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Every hour of [start, end] that is not archived yet (or was archived from a fallback product that can
+# still be superseded) is retrieved with `RTMA_Data_Pipe.retrieve_hourly_dask`, cropped and regridded to
+# the region, and written to the archive. Pending hours are grouped by archive time chunk (one day) and
+# each group runs in one worker process --> every Zarr chunk has exactly one writer. Re-running the same
+# range resumes where an interrupted backfill stopped; hours with no RTMA object on S3 are reported as gaps.
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Standard Libraries
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+import traceback
+import time
+# RTMA retrieval (S3 --> cropped, regridded DataArrays)
+from Pipelines.NOAA.RTMA.RTMA_Pipe import RTMA_Data_Pipe
+from Pipelines.NOAA.RTMA.RTMA_Cache import rtma_is_settled
+from Pipelines.NOAA.RTMA.RTMA_Archive import RTMA_Archive, NOT_ARCHIVED, hour_index, hour_range
+
+
+def needs_ingest(rank, valid_time) -> bool :
+    # Not archived yet, or archived from a fallback product while a better one may still be published
+    if rank == NOT_ARCHIVED :
+        return True
+    return rank > 0 and not rtma_is_settled(valid_time.year, valid_time.month, valid_time.day, valid_time.hour)
+
+
+def ingest_hour(archive, pipe, region, valid_time, extend_to=None) -> dict :
+    # Retrieve one hour from S3 and archive it --> {'hour', 'status', 'product' | 'error'}
+    # (`extend_to` --> the region is created from this hour when it is not archived yet)
+    result = {'hour' : valid_time.isoformat()}
+    try:
+        data_arrays = pipe.retrieve_hourly_dask(
+            year = f'{valid_time:%Y}' ,
+            month = f'{valid_time:%m}' ,
+            day = f'{valid_time:%d}' ,
+            hour = f'{valid_time:%H}' ,
+            region = region
+        )
+        filter_keys = pipe.grib_reader.filter_keys
+        if extend_to is not None and archive.open_region(region) is None :
+            archive.create_region(region, data_arrays, filter_keys)
+            archive.extend(region, extend_to)
+        archive.write_hour(region, valid_time, data_arrays, [key['shortName'] for key in filter_keys], pipe.product)
+        result.update({'status' : 'ingested', 'product' : pipe.product})
+    except FileNotFoundError :
+        result['status'] = 'unavailable'
+    except Exception :
+        result.update({'status' : 'failed', 'error' : traceback.format_exc(limit=3)})
+    return result
+
+
+def archive_hours(location, storage_options, region, filter_keys, hours) -> list :
+    # Worker job (module-level so the process pool can pickle it) --> one result per hour
+    archive = RTMA_Archive(location, mode='a', storage_options=storage_options)
+    pipe = RTMA_Data_Pipe(filter_keys=filter_keys)
+    return [ingest_hour(archive, pipe, region, valid_time) for valid_time in hours]
+
+
+
+## --------------------------------------------------------------- ##
+##                 Backfill of a Range of Hours                    ##
+## --------------------------------------------------------------- ##
+def backfill_archive(location, start, end, region, filter_keys, workers=4, storage_options=None) -> dict :
+    started = time.perf_counter()
+    # Hours before the archive origin cannot be stored (raises before anything is retrieved)
+    hour_index(start)
+    archive = RTMA_Archive(location, mode='a', storage_options=storage_options)
+    hours = hour_range(start, end)
+    results = []
+
+    # An archived region keeps its fields --> the backfill writes exactly those (requested ones must be among them)
+    stored_keys = archive.filter_keys(region)
+    if stored_keys is not None :
+        stored = [key['shortName'] for key in stored_keys]
+        extra = [key['shortName'] for key in filter_keys if key['shortName'] not in stored]
+        if len(extra) > 0 :
+            raise ValueError(f'Archive region {region.key()} stores {stored}; {extra} need a new archive store')
+        filter_keys = stored_keys
+        archive.extend(region, end)
+    ranks = archive.product_ranks(region, start, end)
+    pending = [valid_time for valid_time, rank in zip(hours, ranks) if needs_ingest(rank, valid_time)]
+    skipped = len(hours) - len(pending)
+
+    # New region --> the first retrievable hour defines the grid, created here before any worker starts
+    if stored_keys is None :
+        pipe = RTMA_Data_Pipe(filter_keys=filter_keys)
+        while len(pending) > 0 and archive.open_region(region) is None :
+            results.append(ingest_hour(archive, pipe, region, pending.pop(0), extend_to=end))
+
+    # One job per archive time chunk --> no two workers ever write the same Zarr chunk
+    blocks = {}
+    for valid_time in pending :
+        blocks.setdefault(hour_index(valid_time) // archive.time_chunk, []).append(valid_time)
+    if archive.open_region(region) is None :
+        # Nothing could be retrieved to learn the grid --> the remaining hours stay pending
+        blocks = {}
+    if workers <= 1 :
+        for block in blocks.values() :
+            results.extend(archive_hours(location, storage_options, region, filter_keys, block))
+    elif len(blocks) > 0 :
+        # Spawned workers --> no dask / ecCodes state inherited through fork
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor :
+            futures = [
+                executor.submit(archive_hours, location, storage_options, region, filter_keys, block)
+                for block in blocks.values()
+            ]
+            for future in as_completed(futures) :
+                results.extend(future.result())
+
+    if archive.open_region(region) is not None :
+        archive.consolidate()
+
+    products = {}
+    for result in results :
+        if result['status'] == 'ingested' :
+            products[result['product']] = products.get(result['product'], 0) + 1
+    return {
+        'region' : region.key() ,
+        'start' : start.isoformat() ,
+        'end' : end.isoformat() ,
+        'requested' : len(hours) ,
+        'skipped' : skipped ,
+        'ingested' : sum(result['status'] == 'ingested' for result in results) ,
+        'unavailable' : sorted(result['hour'] for result in results if result['status'] == 'unavailable') ,
+        'failed' : sorted((result for result in results if result['status'] == 'failed'), key=lambda result : result['hour']) ,
+        'products' : products ,
+        'gaps' : [[first.isoformat(), last.isoformat()] for first, last in archive.gaps(region, start, end)] ,
+        'seconds' : round(time.perf_counter() - started, 3) ,
+    }
@@ -0,0 +1,94 @@
+## --------------------------------------------------------------------------------------- ##
+##  NOAA's Real-Time Mesoscale Analysis (RTMA) Data Pipeline                               ##
+## ~ Hourly Product Cache: Keys, Expiration Policy, and Array Packing ~                    ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+# Xarray --> Spatiotemporal Multidimensional Array Library
+import xarray as xr
+# Standard Libraries
+import datetime
+import tempfile
+import os
+# Two-tier (memory + disk) cache shared by the pipelines
+from Pipelines.Common.Product_Cache import Product_Cache
+
+
+# RTMA products in order of preference --> (product name, object suffix in `rtma2p5.YYYYMMDD/`)
+RTMA_PRODUCTS = [
+    ('2dvaranl', '2dvaranl_ndfd.grb2'),
+    ('2dvaranl_wexp', '2dvaranl_ndfd.grb2_wexp'),
+    ('2dvarges_wexp', '2dvarges_ndfd.grb2_wexp'),
+]
+# Only the primary analysis is final; fallback products can still be superseded
+FINAL_PRODUCTS = {'2dvaranl'}
+# Hours younger than this may still receive a better product --> cached briefly
+REVISION_WINDOW = datetime.timedelta(hours=48)
+REVISABLE_TTL = 600
+
+
+# Process-wide cache shared by every `RTMA_Data_Pipe` connection and the server pathways
+rtma_product_cache = Product_Cache(
+    'rtma',
+    memory_budget = int(os.environ.get('RTMA_CACHE_MEMORY_MB', 512)) * 2**20,
+    disk_dir = os.environ.get('RTMA_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'rtma_products')),
+    disk_budget = int(os.environ.get('RTMA_CACHE_DISK_MB', 4096)) * 2**20,
+)
+
+
+## --------------------------------------------------------------- ##
+##                   Cache Keys and Expiration                     ##
+## --------------------------------------------------------------- ##
+def rtma_cache_key(year, month, day, hour, region, filter_keys, kind) -> str :
+    # (year, month, day, hour, region, variable set) plus the kind of entry ('arrays', 'payload', ...)
+    variables = ','.join(sorted(filter_key['shortName'] for filter_key in filter_keys))
+    return Product_Cache.make_key(
+        'rtma', int(year), int(month), int(day), int(hour), region.key(), variables, kind
+    )
+
+
+def rtma_is_settled(year, month, day, hour) -> bool :
+    # Hours older than the revision window can no longer receive a better product
+    valid_time = datetime.datetime(int(year), int(month), int(day), int(hour))
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) - valid_time > REVISION_WINDOW
+
+
+def rtma_cache_ttl(product, year, month, day, hour) :
+    # Historical hours and final analyses never expire (`None`)
+    if product in FINAL_PRODUCTS or rtma_is_settled(year, month, day, hour) :
+        return None
+    # Recent hours served from a fallback product (e.g. `2dvarges`) expire early
+    return REVISABLE_TTL
+
+
+
+## --------------------------------------------------------------- ##
+##         Packing Regridded DataArrays to/from Plain Arrays       ##
+## --------------------------------------------------------------- ##
+def pack_rtma_arrays(data_arrays, product) -> dict :
+    return {
+        'values' : np.stack([np.asarray(da.values) for da in data_arrays]) ,
+        'names' : np.array([str(da.name) for da in data_arrays]) ,
+        'longitude' : np.asarray(data_arrays[0]['longitude'].values) ,
+        'latitude' : np.asarray(data_arrays[0]['latitude'].values) ,
+        'product' : np.array(product or '') ,
+    }
+
+
+def unpack_rtma_arrays(arrays) -> list :
+    # Rebuild the regridded DataArrays returned by `RTMA_Data_Pipe.retrieve_hourly_dask`
+    lon_da = xr.DataArray(arrays['longitude'], dims=['x'], name='longitude', attrs={'units': 'degrees_east'})
+    lat_da = xr.DataArray(arrays['latitude'], dims=['y'], name='latitude', attrs={'units': 'degrees_north'})
+    return [
+        xr.DataArray(values, dims=['y', 'x'], name=str(name), coords={'longitude': lon_da, 'latitude': lat_da})
+        for values, name in zip(arrays['values'], arrays['names'])
+    ]
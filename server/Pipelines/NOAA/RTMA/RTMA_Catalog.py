@@ -0,0 +1,237 @@
+## --------------------------------------------------------------------------------------- ##
+##  NOAA's Real-Time Mesoscale Analysis (RTMA) Data Pipeline                               ##
+## ~ Object Catalog: One Listing per Day, In-Memory Product Index, Availability Ranges ~    ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Every `rtma2p5.YYYYMMDD/` day directory is listed once and indexed as {hour: best product}, so
+# resolving the product of an hour is a dictionary lookup instead of up to three S3 prefix listings.
+# Days whose hours are all settled (see `rtma_is_settled`) never change and are never listed again;
+# recent days expire after `recent_ttl` seconds. An expired day keeps answering from its index while a
+# background thread lists it again (stale-while-revalidate) --> only a day that was never listed, or a
+# miss on an expired day (e.g. the newest hour), waits for S3. Listing failures raise
+# `RTMA_Catalog_Error` instead of looking like missing data.
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Standard Libraries
+import datetime
+import threading
+import time
+import os
+import re
+# Product preference order and the revision window of recent hours
+from Pipelines.NOAA.RTMA.RTMA_Cache import RTMA_PRODUCTS, rtma_is_settled
+
+
+# Object names inside `rtma2p5.YYYYMMDD/` --> (hour, object suffix)
+RTMA_OBJECT_PATTERN = re.compile(r'rtma2p5\.t(\d{2})z\.(.+)$')
+# Product preference rank (lower is better) keyed by object suffix
+PRODUCT_RANKS = {suffix: rank for rank, (_, suffix) in enumerate(RTMA_PRODUCTS)}
+# Seconds before a day that can still receive products is listed again
+CATALOG_RECENT_TTL = float(os.environ.get('RTMA_CATALOG_TTL_SECONDS', 60))
+ONE_HOUR = datetime.timedelta(hours=1)
+
+
+class RTMA_Catalog_Error(Exception) :
+    # A day directory could not be listed (network, credentials) --> mapped to 503 by the server
+    pass
+
+
+def utc_now() -> datetime.datetime :
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def index_day_objects(names) -> dict :
+    # Object names of one day --> {hour: {'rank', 'suffix', 'index'}} with the best product per hour
+    suffixes = {}
+    for name in names :
+        match = RTMA_OBJECT_PATTERN.match(name.rsplit('/', 1)[-1])
+        if match is not None :
+            suffixes.setdefault(int(match.group(1)), set()).add(match.group(2))
+    hours = {}
+    for hour, available in suffixes.items() :
+        ranked = [PRODUCT_RANKS[suffix] for suffix in available if suffix in PRODUCT_RANKS]
+        if len(ranked) > 0 :
+            suffix = RTMA_PRODUCTS[min(ranked)][1]
+            # `.idx` sidecar listed next to the GRIB file --> byte-range retrieval is possible
+            hours[hour] = {'rank' : min(ranked), 'suffix' : suffix, 'index' : f'{suffix}.idx' in available}
+    return hours
+
+
+
+## --------------------------------------------------------------- ##
+##              Catalog of RTMA Objects in the Bucket              ##
+## --------------------------------------------------------------- ##
+class RTMA_Catalog :
+    def __init__(self, s3_fs, bucket='noaa-rtma-pds', recent_ttl=CATALOG_RECENT_TTL, clock=utc_now) :
+        self.s3_fs = s3_fs
+        self.bucket = bucket
+        self.recent_ttl = recent_ttl
+        self.clock = clock
+
+        self.lock = threading.Lock()
+        # date --> {'hours' (see `index_day_objects`), 'listed' (UTC), 'expires' (monotonic seconds or None)}
+        self.days = {}
+        # Per-day locks --> concurrent lookups of an unlisted day share one listing
+        self.day_locks = {}
+        self.refreshing = set()
+        self.counters = {'lookups' : 0, 'listings' : 0, 'stale_hits' : 0, 'listing_errors' : 0}
+        self.last_error = None
+
+
+    ## =============================================================== ##
+    ##                    Listing and Indexing Days                    ##
+    ## =============================================================== ##
+    def list_day(self, day) -> list :
+        # Object names inside `rtma2p5.YYYYMMDD/` (a day that does not exist yet has no objects)
+        try:
+            paths = self.s3_fs.ls(f'{self.bucket}/rtma2p5.{day:%Y%m%d}/', refresh=True)
+        except FileNotFoundError :
+            return []
+        except Exception as e :
+            with self.lock :
+                self.counters['listing_errors'] += 1
+                self.last_error = f'{day:%Y-%m-%d}: {e!r}'
+            raise RTMA_Catalog_Error(f'Listing RTMA objects of {day:%Y-%m-%d} failed: {e!r}') from e
+        return [path.rsplit('/', 1)[-1] for path in paths]
+
+
+    def day_settled(self, day) -> bool :
+        # Every hour of the day is past the revision window --> its listing can never change
+        return rtma_is_settled(day.year, day.month, day.day, 23)
+
+
+    def refresh(self, day) -> list :
+        # List the day now and replace its index --> returns the object names (used by the ingest scheduler)
+        names = self.list_day(day)
+        entry = {
+            'hours' : index_day_objects(names) ,
+            'listed' : self.clock() ,
+            'expires' : None if self.day_settled(day) else time.monotonic() + self.recent_ttl ,
+        }
+        with self.lock :
+            self.days[day] = entry
+            self.counters['listings'] += 1
+        return names
+
+
+    def refresh_in_background(self, day) :
+        # One background listing per expired day at a time; failures keep the previous index
+        with self.lock :
+            if day in self.refreshing :
+                return
+            self.refreshing.add(day)
+
+        def run() :
+            try:
+                self.refresh(day)
+            except RTMA_Catalog_Error :
+                pass
+            finally:
+                with self.lock :
+                    self.refreshing.discard(day)
+        threading.Thread(target=run, name=f'rtma-catalog-{day:%Y%m%d}', daemon=True).start()
+
+
+    def day_index(self, day, hour=None) -> dict :
+        # {hour: product entry} of a day --> listed on first use; expired days answer from their index
+        # while they are listed again, unless the requested `hour` is missing from it
+        with self.lock :
+            entry = self.days.get(day)
+            day_lock = self.day_locks.setdefault(day, threading.Lock())
+        if entry is not None :
+            expired = entry['expires'] is not None and time.monotonic() > entry['expires']
+            if not expired :
+                return entry['hours']
+            if hour is None or hour in entry['hours'] :
+                with self.lock :
+                    self.counters['stale_hits'] += 1
+                self.refresh_in_background(day)
+                return entry['hours']
+
+        with day_lock :
+            # Another lookup may have listed the day while this one waited
+            with self.lock :
+                current = self.days.get(day)
+            if current is not None and current is not entry :
+                return current['hours']
+            self.refresh(day)
+            with self.lock :
+                return self.days[day]['hours']
+
+
+    ## =============================================================== ##
+    ##                 Product Resolution and Availability             ##
+    ## =============================================================== ##
+    def resolve(self, valid_time) :
+        # Best available product of an hour --> {'product', 'path', 'index'} or None when nothing is published
+        with self.lock :
+            self.counters['lookups'] += 1
+        found = self.day_index(valid_time.date(), valid_time.hour).get(valid_time.hour)
+        if found is None :
+            return None
+        return {
+            'product' : RTMA_PRODUCTS[found['rank']][0] ,
+            'path' : f"{self.bucket}/rtma2p5.{valid_time:%Y%m%d}/rtma2p5.t{valid_time:%H}z.{found['suffix']}" ,
+            'index' : found['index'] ,
+        }
+
+
+    def availability(self, start, end) -> dict :
+        # Published hours of [start, end] as runs of the same best product, plus the missing runs
+        ranges, missing = [], []
+        valid_time = start
+        while valid_time <= end :
+            found = self.day_index(valid_time.date()).get(valid_time.hour)
+            product = None if found is None else RTMA_PRODUCTS[found['rank']][0]
+            runs = missing if product is None else ranges
+            if len(runs) > 0 and runs[-1]['product'] == product and runs[-1]['end'] == valid_time - ONE_HOUR :
+                runs[-1]['end'] = valid_time
+            else :
+                runs.append({'start' : valid_time, 'end' : valid_time, 'product' : product})
+            valid_time += ONE_HOUR
+        return {
+            'ranges' : [{'start' : run['start'].isoformat(), 'end' : run['end'].isoformat(), 'product' : run['product']} for run in ranges] ,
+            'missing' : [[run['start'].isoformat(), run['end'].isoformat()] for run in missing] ,
+            'latest' : None if len(ranges) == 0 else ranges[-1]['end'].isoformat() ,
+        }
+
+
+    def stats(self) -> dict :
+        with self.lock :
+            return {
+                'days' : len(self.days) ,
+                'settled_days' : sum(entry['expires'] is None for entry in self.days.values()) ,
+                'refreshing' : len(self.refreshing) ,
+                'last_error' : self.last_error ,
+                **self.counters ,
+            }
+
+
+
+# Process-wide catalogs --> one per (bucket, S3 endpoint), shared by every pipeline connection
+rtma_catalogs = {}
+rtma_catalogs_lock = threading.Lock()
+
+def rtma_catalog(s3_fs, bucket, endpoint_url=None) -> RTMA_Catalog :
+    with rtma_catalogs_lock :
+        catalog = rtma_catalogs.get((bucket, endpoint_url))
+        if catalog is None :
+            catalog = rtma_catalogs[(bucket, endpoint_url)] = RTMA_Catalog(s3_fs, bucket)
+        return catalog
+
+
+def rtma_catalog_stats() -> dict :
+    # `bucket` (or `bucket@endpoint`) --> stats of every catalog of this process
+    with rtma_catalogs_lock :
+        catalogs = dict(rtma_catalogs)
+    return {
+        bucket if endpoint_url is None else f'{bucket}@{endpoint_url}' : catalog.stats()
+        for (bucket, endpoint_url), catalog in catalogs.items()
+    }
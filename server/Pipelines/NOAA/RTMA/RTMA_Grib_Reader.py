@@ -0,0 +1,135 @@
+## --------------------------------------------------------------------------------------- ##
+##  NOAA's Real-Time Mesoscale Analysis (RTMA) Data Pipeline                               ##
+## ~ Single-Pass Multi-Variable GRIB2 Reader (ecCodes) ~                                   ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+# GRIB2 message decoding (the same library cfgrib is built on)
+import eccodes
+# Grid-definition attributes shared with the regridding engine
+from Pipelines.NOAA.RTMA.RTMA_Regrid import GEOMETRY_ATTRS
+
+
+# RTMA messages used by the pipeline --> (shortName, matching GRIB keys)
+RTMA_FILTER_KEYS = [
+    {'typeOfLevel': 'heightAboveGround', 'level': 10, 'shortName': '10u'},
+    {'typeOfLevel': 'heightAboveGround', 'level': 10, 'shortName': '10v'},
+    {'shortName': '2t'},
+]
+
+
+## --------------------------------------------------------------- ##
+##          Decoded GRIB Field (Values + Grid Definition)          ##
+## --------------------------------------------------------------- ##
+class RTMA_Grib_Field :
+    def __init__(self, name, short_name, values, attrs, message) :
+        self.name = name
+        self.short_name = short_name
+        # 2-D (y, x) array of decoded values, missing points set to NaN
+        self.values = values
+        # cfgrib-style `GRIB_*` grid-definition attributes (used as the geometry key)
+        self.attrs = attrs
+        # Raw GRIB message kept so (longitude, latitude) are only computed when needed
+        self.message = message
+
+
+    def coordinates(self) -> tuple :
+        # Compute the 2-D (longitude, latitude) arrays of the native grid from the message
+        handle = eccodes.codes_new_from_message(self.message)
+        try:
+            shape = self.values.shape
+            latitude = eccodes.codes_get_array(handle, 'latitudes').reshape(shape)
+            longitude = eccodes.codes_get_array(handle, 'longitudes').reshape(shape)
+        finally:
+            eccodes.codes_release(handle)
+        longitude = (longitude + 180) % 360 - 180
+        return longitude, latitude
+
+
+
+## --------------------------------------------------------------- ##
+##       Multi-Variable Reader: One Scan of the Message Stream     ##
+## --------------------------------------------------------------- ##
+class RTMA_Grib_Reader :
+    def __init__(self, filter_keys=None) :
+        self.filter_keys = filter_keys or RTMA_FILTER_KEYS
+
+
+    def match(self, handle) :
+        # Return the filter-key dictionary matched by this message (or None)
+        short_name = eccodes.codes_get(handle, 'shortName')
+        for filter_key in self.filter_keys :
+            if filter_key.get('shortName', short_name) != short_name :
+                continue
+            if all(eccodes.codes_get(handle, key, type(value)) == value for key, value in filter_key.items()) :
+                return filter_key
+        return None
+
+
+    def decode(self, handle, filter_key) -> RTMA_Grib_Field :
+        # Decode the values of a matched message into a 2-D (y, x) array
+        size_x = eccodes.codes_get(handle, 'Nx')
+        size_y = eccodes.codes_get(handle, 'Ny')
+        values = eccodes.codes_get_values(handle).reshape(size_y, size_x)
+        if eccodes.codes_get(handle, 'bitmapPresent') :
+            values[values == eccodes.codes_get(handle, 'missingValue')] = np.nan
+
+        attrs = {}
+        for attr in GEOMETRY_ATTRS :
+            try:
+                attrs[attr] = eccodes.codes_get(handle, attr[len('GRIB_'):])
+            except eccodes.KeyValueNotFoundError :
+                pass
+
+        return RTMA_Grib_Field(
+            name = eccodes.codes_get(handle, 'cfVarName'),
+            short_name = filter_key['shortName'],
+            values = values,
+            attrs = attrs,
+            message = eccodes.codes_get_message(handle),
+        )
+
+
+    def read_file(self, path) -> list :
+        # Scan every message of a local file once --> no cfgrib `.idx` is written
+        with open(path, 'rb') as grib_file :
+            handles = iter(lambda: eccodes.codes_grib_new_from_file(grib_file), None)
+            return self.collect(handles)
+
+
+    def read_messages(self, messages) -> list :
+        # Decode in-memory GRIB messages (e.g. byte ranges fetched straight from S3)
+        handles = (eccodes.codes_new_from_message(message) for message in messages)
+        return self.collect(handles)
+
+
+    def collect(self, handles) -> list :
+        # Decode only the requested messages, stopping once every variable has been found
+        fields = {}
+        for handle in handles :
+            try:
+                filter_key = self.match(handle)
+                if filter_key is not None and filter_key['shortName'] not in fields :
+                    fields[filter_key['shortName']] = self.decode(handle, filter_key)
+            finally:
+                eccodes.codes_release(handle)
+            if len(fields) == len(self.filter_keys) :
+                break
+        return self.ordered(fields)
+
+
+    def ordered(self, fields) -> list :
+        # Return the decoded fields in the order of the filter keys
+        missing = [key['shortName'] for key in self.filter_keys if key['shortName'] not in fields]
+        if len(missing) > 0 :
+            raise KeyError(f'GRIB messages not found: {missing}')
+        return [fields[key['shortName']] for key in self.filter_keys]
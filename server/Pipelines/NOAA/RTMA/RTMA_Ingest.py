@@ -0,0 +1,230 @@
+## --------------------------------------------------------------------------------------- ##
+##  NOAA's Real-Time Mesoscale Analysis (RTMA) Data Pipeline                               ##
+## ~ Background Ingest Scheduler: Poll, Backfill, and Pre-Render New Hours ~               ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Standard Libraries
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import threading
+import traceback
+# RTMA pipeline and its product preference order
+from Pipelines.NOAA.RTMA.RTMA_Pipe import RTMA_Data_Pipe
+from Pipelines.NOAA.RTMA.RTMA_Cache import RTMA_PRODUCTS
+from Pipelines.NOAA.RTMA.RTMA_Region import resolve_region
+# Object names, product ranks, and the shared day listings
+from Pipelines.NOAA.RTMA.RTMA_Catalog import RTMA_OBJECT_PATTERN, PRODUCT_RANKS, utc_now
+
+
+## --------------------------------------------------------------- ##
+##         Ingest Scheduler: Keeps Recent Hours Pre-Rendered       ##
+## --------------------------------------------------------------- ##
+class RTMA_Ingest_Scheduler :
+    def __init__(self, pipe_factory=RTMA_Data_Pipe, lister=None, regions=None,
+                 trailing_hours=24, workers=2, poll_interval=120, on_ingest=None) :
+        # Creates a pipeline connection per ingest job (override to point at a local S3 stand-in)
+        self.pipe_factory = pipe_factory
+        # Listing backend: `lister(day) --> object names` inside `rtma2p5.YYYYMMDD/`
+        self.lister = lister or self.list_day
+        self.regions = regions or [resolve_region()]
+        # Trailing window (hours) that is backfilled and kept up to date
+        self.trailing_hours = trailing_hours
+        self.poll_interval = poll_interval
+        # Optional hook called with (valid time, region) after every ingested hour (e.g. heat alarms)
+        self.on_ingest = on_ingest
+        # Bounded worker pool --> at most `workers` hours are retrieved and rendered at once
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rtma-ingest')
+
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        # (valid time, region key) --> product rank that is currently stored (seeded from the product
+        # cache, so hours pre-rendered before a restart are not retrieved again)
+        self.ingested = {}
+        self.in_flight = set()
+        self.status = {
+            'running' : False ,
+            'polls' : 0 ,
+            'last_poll' : None ,
+            'last_poll_error' : None ,
+            'latest_available' : None ,
+            'latest_ingested' : None ,
+            'ingested_hours' : 0 ,
+            'failed_hours' : 0 ,
+            'last_failure' : None ,
+            'last_hook_error' : None ,
+        }
+
+
+    ## =============================================================== ##
+    ##                Listing: Available Hours per Day                 ##
+    ## =============================================================== ##
+    def list_day(self, day) -> list :
+        # Default backend --> a fresh listing of the S3 day directory, which also refreshes the
+        # process-wide catalog (the server then resolves newly published hours without listing)
+        return self.pipe_factory().catalog.refresh(day)
+
+
+    def available_hours(self, now=None) -> dict :
+        # Best available product for every hour in the trailing window --> {valid time: rank}
+        now = now or utc_now()
+        latest = now.replace(minute=0, second=0, microsecond=0)
+        window = [latest - datetime.timedelta(hours=offset) for offset in range(self.trailing_hours)]
+
+        available = {}
+        for day in sorted({valid_time.date() for valid_time in window}) :
+            for name in self.lister(day) :
+                match = RTMA_OBJECT_PATTERN.match(name)
+                if match is None or match.group(2) not in PRODUCT_RANKS :
+                    continue
+                valid_time = datetime.datetime(day.year, day.month, day.day, int(match.group(1)))
+                rank = PRODUCT_RANKS[match.group(2)]
+                if valid_time in window and rank < available.get(valid_time, len(PRODUCT_RANKS)) :
+                    available[valid_time] = rank
+        return available
+
+
+    ## =============================================================== ##
+    ##                  Polling and Job Submission                     ##
+    ## =============================================================== ##
+    def restore_ingested(self, available) :
+        # Hours of the window that are unknown to this process but still in the (disk) product cache
+        # --> recorded with their cached product instead of being retrieved again
+        product_ranks = [name for name, _ in RTMA_PRODUCTS]
+        pipe = None
+        for valid_time in available :
+            for region in self.regions :
+                job = (valid_time, region.key())
+                with self.lock :
+                    if job in self.ingested or job in self.in_flight :
+                        continue
+                pipe = pipe or self.pipe_factory()
+                product = pipe.cached_product(
+                    f'{valid_time:%Y}', f'{valid_time:%m}', f'{valid_time:%d}', f'{valid_time:%H}', region
+                )
+                if product in product_ranks :
+                    with self.lock :
+                        self.ingested.setdefault(job, product_ranks.index(product))
+
+
+    def poll_once(self, now=None) -> list :
+        # Submit every hour that is new, or whose stored product was superseded by a better one
+        try:
+            available = self.available_hours(now)
+            self.restore_ingested(available)
+        except Exception as e :
+            with self.lock :
+                self.status['last_poll_error'] = repr(e)
+            return []
+
+        submitted = []
+        with self.lock :
+            self.status['polls'] += 1
+            self.status['last_poll'] = utc_now().isoformat()
+            self.status['last_poll_error'] = None
+            if len(available) > 0 :
+                self.status['latest_available'] = max(available).isoformat()
+
+            # Newest hours first --> users mostly ask for the latest analysis
+            for valid_time in sorted(available, reverse=True) :
+                for region in self.regions :
+                    job = (valid_time, region.key())
+                    if job in self.in_flight or self.ingested.get(job, len(PRODUCT_RANKS)) <= available[valid_time] :
+                        continue
+                    self.in_flight.add(job)
+                    self.executor.submit(self.ingest_hour, valid_time, region, available[valid_time])
+                    submitted.append(job)
+        return submitted
+
+
+    def ingest_hour(self, valid_time, region, rank=None) :
+        # `rank` --> best product published for the hour; arrays already cached from it are reused
+        job = (valid_time, region.key())
+        try:
+            pipe = self.pipe_factory()
+            product = pipe.refresh_hourly_cache(
+                year = f'{valid_time:%Y}' ,
+                month = f'{valid_time:%m}' ,
+                day = f'{valid_time:%d}' ,
+                hour = f'{valid_time:%H}' ,
+                region = region ,
+                best_product = None if rank is None else RTMA_PRODUCTS[rank][0] ,
+            )
+            rank = [name for name, _ in RTMA_PRODUCTS].index(product)
+            with self.lock :
+                self.ingested[job] = rank
+                self.status['ingested_hours'] += 1
+                latest = self.status['latest_ingested']
+                if latest is None or valid_time.isoformat() > latest :
+                    self.status['latest_ingested'] = valid_time.isoformat()
+        except Exception :
+            with self.lock :
+                self.status['failed_hours'] += 1
+                self.status['last_failure'] = traceback.format_exc(limit=3)
+            return
+        finally:
+            with self.lock :
+                self.in_flight.discard(job)
+
+        # A failing hook never marks the hour itself as failed
+        if self.on_ingest is not None :
+            try:
+                self.on_ingest(valid_time, region)
+            except Exception :
+                with self.lock :
+                    self.status['last_hook_error'] = traceback.format_exc(limit=3)
+
+
+    ## =============================================================== ##
+    ##                 Background Loop and Status Report               ##
+    ## =============================================================== ##
+    def run_forever(self) :
+        with self.lock :
+            self.status['running'] = True
+        while not self.stop_event.is_set() :
+            self.poll_once()
+            self.stop_event.wait(self.poll_interval)
+        with self.lock :
+            self.status['running'] = False
+
+
+    def start(self) :
+        # Run the polling loop inside the current process (e.g. the FastAPI server)
+        if self.thread is None or not self.thread.is_alive() :
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.run_forever, name='rtma-ingest-poll', daemon=True)
+            self.thread.start()
+
+
+    def stop(self, wait=False) :
+        self.stop_event.set()
+        self.executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+    def report(self) -> dict :
+        # Status plus lag between the newest published hour and the newest pre-rendered hour
+        with self.lock :
+            report = dict(self.status)
+            report['in_flight'] = len(self.in_flight)
+            report['trailing_hours'] = self.trailing_hours
+            report['regions'] = [region.key() for region in self.regions]
+
+        lag = None
+        if report['latest_available'] is not None and report['latest_ingested'] is not None :
+            lag = (
+                datetime.datetime.fromisoformat(report['latest_available']) -
+                datetime.datetime.fromisoformat(report['latest_ingested'])
+            ).total_seconds()
+        report['lag_seconds'] = lag
+        report['latest_ingested_age_seconds'] = None if report['latest_ingested'] is None else (
+            utc_now() - datetime.datetime.fromisoformat(report['latest_ingested'])
+        ).total_seconds()
+        return report
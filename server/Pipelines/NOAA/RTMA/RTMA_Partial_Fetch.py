@@ -0,0 +1,114 @@
+## --------------------------------------------------------------------------------------- ##
+##  NOAA's Real-Time Mesoscale Analysis (RTMA) Data Pipeline                               ##
+## ~ Partial GRIB2 Retrieval: `.idx` Inventory and Coalesced S3 Byte-Range Reads ~         ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+
+# GRIB shortName --> (NCEP variable, level) as written in the NOAA `.idx` inventory
+IDX_FIELDS = {
+    '10u' : ('UGRD', '10 m above ground'),
+    '10v' : ('VGRD', '10 m above ground'),
+    '2t' : ('TMP', '2 m above ground'),
+    '2d' : ('DPT', '2 m above ground'),
+    '2sh' : ('SPFH', '2 m above ground'),
+    '10si' : ('WIND', '10 m above ground'),
+    '10wdir' : ('WDIR', '10 m above ground'),
+    'i10fg' : ('GUST', '10 m above ground'),
+    'sp' : ('PRES', 'surface'),
+    'vis' : ('VIS', 'surface'),
+    'tcc' : ('TCDC', 'entire atmosphere (considered as a single layer)'),
+}
+
+
+## --------------------------------------------------------------- ##
+##     Partial Fetcher: Only Download the Requested GRIB Messages  ##
+## --------------------------------------------------------------- ##
+class RTMA_Partial_Fetcher :
+    def __init__(self, s3_fs, max_gap=256 * 1024) :
+        self.s3_fs = s3_fs
+        # Neighbouring ranges closer than `max_gap` bytes are merged into one request
+        self.max_gap = max_gap
+        # Bytes pulled from object storage by this fetcher (payload only, excluding the `.idx`)
+        self.bytes_fetched = 0
+
+
+    def parse_index(self, text) -> list :
+        # Each inventory line reads `number:offset:d=YYYYMMDDHH:VAR:level:forecast:`
+        entries = []
+        for line in text.splitlines() :
+            parts = line.split(':')
+            if len(parts) < 5 :
+                continue
+            entries.append({'offset': int(parts[1]), 'variable': parts[3], 'level': parts[4]})
+        entries.sort(key=lambda entry: entry['offset'])
+
+        # A message ends where the next one starts (the last message runs to the end of the file)
+        for entry, next_entry in zip(entries, entries[1:] + [None]) :
+            entry['end'] = None if next_entry is None else next_entry['offset']
+        return entries
+
+
+    def message_ranges(self, entries, filter_keys) :
+        # Byte range (start, end) of every requested message --> None if any of them is unknown
+        ranges = []
+        for filter_key in filter_keys :
+            field = IDX_FIELDS.get(filter_key['shortName'])
+            if field is None :
+                return None
+            matches = [entry for entry in entries if (entry['variable'], entry['level']) == field]
+            if len(matches) == 0 :
+                return None
+            ranges.append((matches[0]['offset'], matches[0]['end']))
+        return sorted(set(ranges), key=lambda byte_range: byte_range[0])
+
+
+    def coalesce(self, ranges) -> list :
+        # Merge adjacent/nearby ranges so fewer, larger requests are sent to S3
+        merged = []
+        for start, end in ranges :
+            if len(merged) > 0 and merged[-1][1] is not None and start - merged[-1][1] <= self.max_gap :
+                merged[-1][1] = end
+            else :
+                merged.append([start, end])
+        return [tuple(byte_range) for byte_range in merged]
+
+
+    def fetch_messages(self, path, filter_keys) :
+        # Read the `.idx` sidecar --> fall back (return None) when it is missing or incomplete
+        try:
+            index_text = self.s3_fs.cat_file(f'{path}.idx').decode()
+        except (FileNotFoundError, OSError) :
+            return None
+        ranges = self.message_ranges(self.parse_index(index_text), filter_keys)
+        if ranges is None :
+            return None
+
+        # Fetch the coalesced ranges concurrently, then cut the individual messages back out
+        merged = self.coalesce(ranges)
+        chunks = self.s3_fs.cat_ranges(
+            [path] * len(merged),
+            [start for start, _ in merged],
+            [end for _, end in merged],
+        )
+        for chunk in chunks :
+            if isinstance(chunk, Exception) :
+                raise chunk
+
+        messages = []
+        for (start, end), (merged_start, _), chunk in self.expand(ranges, merged, chunks) :
+            messages.append(chunk[start - merged_start:None if end is None else end - merged_start])
+        self.bytes_fetched += sum(len(chunk) for chunk in chunks)
+        return messages
+
+
+    def expand(self, ranges, merged, chunks) :
+        # Pair every message range with the merged range (and bytes) that contains it
+        for start, end in ranges :
+            for merged_range, chunk in zip(merged, chunks) :
+                if merged_range[0] <= start and (merged_range[1] is None or (end is not None and end <= merged_range[1])) :
+                    yield (start, end), merged_range, chunk
+                    break
@@ -13,7 +13,6 @@
 ## --------------------------------------------------------------- ##
 # Import Array Manipulation Libraries
 import numpy as np
-from scipy.interpolate import griddata
 # Dask --> Parallelized Computation
 from dask import delayed, compute
 # Xarray --> Spatiotemporal Multidimensional Array Library
@@ -23,216 +22,368 @@ import fsspec
 from boto3 import client as b3_client
 from botocore import UNSIGNED
 from botocore.client import Config
-# Generate Raw PNG Images of Climate Data
-import matplotlib.pyplot as plt
-from matplotlib import colormaps
-from matplotlib.colors import Normalize
-import matplotlib.cm as cm
-from PIL import Image
-from io import BytesIO
+import datetime
 import os
+# Precomputed uint8 colormap lookup tables
+from Pipelines.Common.Colormap_LUT import get_colormap_lut
+# Colorbar legends rendered once per style
+from Pipelines.Common.Legend_Service import legend_service
+# Grid payload encoding (JSON lists, binary envelope, PNG image fields)
+from Pipelines.Common.Payload_Encoding import encode_payload, vis_arrays_to_json
+from Pipelines.Common.Value_Encoding import value_fields
+# Epoch timestamps of hourly series
+from Pipelines.Common.Frame_Stream import epoch_seconds
+# Single-pass wind textures (U/V, speed/direction, particle layouts)
+from Pipelines.NOAA.RTMA.RTMA_Wind import encode_wind, encode_wind_png, wind_scale
+# Cached Lambert --> (Lon, Lat) regridding index maps
+from Pipelines.NOAA.RTMA.RTMA_Regrid import default_regrid_engine
+# Regions of interest (bounding boxes) served by the pipeline
+from Pipelines.NOAA.RTMA.RTMA_Region import resolve_region
+# Single-pass multi-variable GRIB2 decoding
+from Pipelines.NOAA.RTMA.RTMA_Grib_Reader import RTMA_Grib_Reader, RTMA_FILTER_KEYS
+# Byte-range retrieval of individual GRIB messages from S3
+from Pipelines.NOAA.RTMA.RTMA_Partial_Fetch import RTMA_Partial_Fetcher
+# Indexed listing of the bucket (best product per hour)
+from Pipelines.NOAA.RTMA.RTMA_Catalog import rtma_catalog
+# Persistent hourly product cache
+from Pipelines.NOAA.RTMA.RTMA_Cache import (
+    rtma_product_cache, rtma_cache_key, rtma_cache_ttl, pack_rtma_arrays, unpack_rtma_arrays
+)
+# Cropped hourly history (Zarr archive filled by `rtma_archive.py`)
+from Pipelines.NOAA.RTMA.RTMA_Archive import default_rtma_archive, hour_range
+# Per-request stage spans (no-ops outside traced requests)
+from Pipelines.Common.Pipeline_Tracing import stage, mark, bind_trace
 
 
 ## --------------------------------------------------------------- ##
 ##            RTMA Hourly Data Pipeline Python Class               ##
 ## --------------------------------------------------------------- ##
 class RTMA_Data_Pipe:
-    def __init__(self, bucket='noaa-rtma-pds'):
+    def __init__(self, bucket='noaa-rtma-pds', regrid_engine=None, filter_keys=None,
+                 endpoint_url=None, anon=None, partial_fetch=True, product_cache=None, archive=None, catalog=None):
         os.environ['ECCODES_DEFINITION_PATH'] = '/usr/share/eccodes/definitions'
         self.s3_bucket = bucket
-        self.s3_fs = fsspec.filesystem('s3', anon=True)
+        # Regridding index maps are shared across connections (computed once per grid geometry)
+        self.regrid_engine = regrid_engine or default_regrid_engine
+        # Decodes 10u, 10v, and 2t (plus any other requested messages) from one pass over each GRIB file
+        self.grib_reader = RTMA_Grib_Reader(filter_keys=filter_keys)
+        # S3 connection --> NOAA's public bucket, or a local S3 stand-in (SeaweedFS gateway, moto)
+        # when `endpoint_url` / the `RTMA_S3_ENDPOINT` environment variable is set (with `anon=False`
+        # or `RTMA_S3_ANON=0` the stand-in's credentials are read from the usual AWS environment variables)
+        endpoint_url = endpoint_url or os.environ.get('RTMA_S3_ENDPOINT')
+        if anon is None :
+            anon = os.environ.get('RTMA_S3_ANON', '1') != '0'
+        self.s3_options = {'anon': anon}
+        if endpoint_url :
+            self.s3_options['client_kwargs'] = {'endpoint_url': endpoint_url}
+        self.s3_fs = fsspec.filesystem('s3', **self.s3_options)
         self.s3_url = f's3://{self.s3_bucket}/'
+        # Day listings indexed once per process --> the best product of an hour is a dictionary lookup
+        self.catalog = catalog or rtma_catalog(self.s3_fs, self.s3_bucket, endpoint_url)
+        # Byte-range retrieval of only the requested GRIB messages (driven by the `.idx` sidecar)
+        self.partial_fetch = partial_fetch
+        self.partial_fetcher = RTMA_Partial_Fetcher(self.s3_fs)
+        # Hourly products (cropped arrays, rendered payloads) shared across connections
+        self.product_cache = product_cache or rtma_product_cache
+        # Archived hours are read from the Zarr archive instead of S3 (None --> no archive configured)
+        self.archive = archive or default_rtma_archive
+        # RTMA product served by the latest retrieval (see `RTMA_PRODUCTS`)
+        self.product = None
+
+
+    def process_grib_file(self, temp_path, region=None) -> list :
+        # Decode every requested variable (10u, 10v, 2t) from a single scan of the GRIB file
+        with stage('rtma.decode') :
+            fields = self.grib_reader.read_file(temp_path)
+        return self.regrid_fields(fields, region)
+
+
+    def process_grib_messages(self, messages, region=None) -> list :
+        # Decode the requested variables from in-memory GRIB messages (partial S3 fetch)
+        with stage('rtma.decode') as span :
+            fields = self.grib_reader.read_messages(messages)
+            span.add_bytes(sum(len(message) for message in messages))
+        return self.regrid_fields(fields, region)
 
-    def list_files(self, prefix='') -> list :
-        # List files in the S3 bucket with the given prefix
-        try:
-            all_paths = self.s3_fs.ls(f'{self.s3_url}{prefix}')
-            # Filter out directory paths
-            file_paths = [path for path in all_paths if not path.endswith('/')]
-        except:
-            file_paths = []
-        finally:
-            return file_paths
-
-
-    def process_filter_key(self, temp_path, filter_key, ) -> dict :
-        try:
-            ds = xr.open_dataset(
-                temp_path, engine='cfgrib', 
-                chunks={'time': 1}, 
-                backend_kwargs={'filter_by_keys': filter_key}
-            )
-        except Exception as e:
-            index_file = temp_path + ".idx"
-            if os.path.exists(index_file):
-                os.remove(index_file)
-            ds = xr.open_dataset(
-                temp_path, engine='cfgrib', 
-                chunks={'time': 1}, 
-                backend_kwargs={'filter_by_keys': filter_key}
-            )
-        
-        ds.coords['longitude'] = (ds.coords['longitude'] + 180) % 360 - 180
 
+    def regrid_fields(self, fields, region=None) -> list :
         # ########################################
-        #           Re-Gridding Process          #
+        #     Region of Interest & Re-Gridding   #
         # ########################################
-        # Extract (longitude, latitude) coordinates from multi-dimensional array
-        longitude = ds['longitude'].values  # 2D array (y, x)
-        latitude = ds['latitude'].values  # 2D array (y, x)
-        lon_min, lon_max = longitude.min(), longitude.max()
-        lat_min, lat_max = latitude.min(), latitude.max()
-        points = np.column_stack((longitude.flatten(), latitude.flatten()))
-        
-        lon_new = np.linspace(lon_min, lon_max, ds.sizes['x'])  # or the desired resolution
-        lat_new = np.linspace(lat_min, lat_max, ds.sizes['y'])  # or the desired resolution
-        lon_new_grid, lat_new_grid = np.meshgrid(lon_new, lat_new)
+        # Source --> target index map is computed once per (grid geometry, region) and then reused;
+        # the (longitude, latitude) arrays of the native grid are only computed on a cache miss
+        key = self.regrid_engine.geometry_key(fields[0].attrs, fields[0].values.shape, fields[0].coordinates)
+        with stage('rtma.regrid_plan') :
+            plan = self.regrid_engine.get_plan(key, fields[0].coordinates, region)
         
         # Create DataArrays for the Longitude & Latitude Coordinates
-        lon_da = xr.DataArray(lon_new, dims=['x'], name='longitude', attrs={'units': 'degrees_east'})
-        lat_da = xr.DataArray(lat_new, dims=['y'], name='latitude', attrs={'units': 'degrees_north'})
+        lon_da = xr.DataArray(plan.longitude, dims=['x'], name='longitude', attrs={'units': 'degrees_east'})
+        lat_da = xr.DataArray(plan.latitude, dims=['y'], name='latitude', attrs={'units': 'degrees_north'})
         
-        var_names = list(ds.data_vars.keys()) 
         regridded_data = []
-        for var_name in var_names :
-            values_grid = griddata(points, ds[var_name].values.flatten(), (lon_new_grid, lat_new_grid), method='nearest')
-            values_da = xr.DataArray(values_grid, dims=['y', 'x'], name=var_name, coords={'longitude': lon_da, 'latitude': lat_da},)
+        for field in fields :
+            # Crop to the native Lambert window covering the region, then gather the target pixels
+            with stage('rtma.regrid') :
+                values_grid = plan.regrid(plan.crop(field.values))
+            values_da = xr.DataArray(values_grid, dims=['y', 'x'], name=field.name, coords={'longitude': lon_da, 'latitude': lat_da},)
             regridded_data.append(values_da)
 
         return regridded_data
 
 
 
-    def retrieve_hourly_dask(self, year, month, day, hour) -> xr.Dataset :
+    def retrieve_hourly_cached(self, year, month, day, hour, region=None) -> list :
+        # Serve the cropped, regridded arrays from the product cache when available
+        region = region or resolve_region()
+        key = rtma_cache_key(year, month, day, hour, region, self.grib_reader.filter_keys, 'arrays')
+        with stage('rtma.array_cache') :
+            arrays = self.product_cache.get(key)
+        if arrays is not None :
+            self.product = str(arrays['product'])
+            return unpack_rtma_arrays(arrays)
+
+        # Archived hours skip the S3 retrieval; only the gaps of the archive go to the bucket
+        combined_ds = self.read_archived_hour(datetime.datetime(int(year), int(month), int(day), int(hour)), region)
+        if combined_ds is None :
+            combined_ds = self.retrieve_hourly_dask(year, month, day, hour, region)
+        self.product_cache.put(
+            key, pack_rtma_arrays(combined_ds, self.product),
+            ttl = rtma_cache_ttl(self.product, year, month, day, hour)
+        )
+        return combined_ds
+
+
+
+    def cached_product(self, year, month, day, hour, region=None) :
+        # Product of the hour's cached arrays (None when the hour is not cached or has expired)
+        region = region or resolve_region()
+        key = rtma_cache_key(year, month, day, hour, region, self.grib_reader.filter_keys, 'arrays')
+        product = self.product_cache.peek(key, 'product')
+        return None if product is None or str(product) == '' else str(product)
+
+
+
+    def read_archived_hour(self, valid_time, region) -> list :
+        # Regridded arrays of an archived hour (None when the hour, region, or a variable is not archived)
+        if self.archive is None :
+            return None
+        with stage('rtma.archive') :
+            archived = self.archive.read_hour(region, valid_time, [key['shortName'] for key in self.grib_reader.filter_keys])
+        if archived is None :
+            return None
+        mark(cache='archive')
+        data_arrays, self.product = archived
+        return data_arrays
+
+
+
+    def refresh_hourly_cache(self, year, month, day, hour, region=None, served_keys=RTMA_FILTER_KEYS,
+                             best_product=None) -> str :
+        # Re-retrieve an hour (e.g. a better product was published) and overwrite its
+        # cached arrays and rendered payload --> returns the product that was ingested.
+        # A pipe decoding more fields than the served ones (e.g. for the heat alarms) caches both
+        # variable sets from this one retrieval, and renders the payload from the `served_keys` fields;
+        # arrays already cached from `best_product` (e.g. read by the alarms first) are not retrieved again
+        region = region or resolve_region()
+        filter_keys = self.grib_reader.filter_keys
+        key = rtma_cache_key(year, month, day, hour, region, filter_keys, 'arrays')
+        arrays = None if best_product is None else self.product_cache.get(key)
+        reused = arrays is not None and str(arrays['product']) == best_product
+        if reused :
+            self.product = best_product
+            combined_ds = unpack_rtma_arrays(arrays)
+        else :
+            combined_ds = self.retrieve_hourly_dask(year, month, day, hour, region)
+        ttl = rtma_cache_ttl(self.product, year, month, day, hour)
+        if not reused :
+            self.product_cache.put(key, pack_rtma_arrays(combined_ds, self.product), ttl=ttl)
+
+        fields = {filter_key['shortName'] : da for filter_key, da in zip(filter_keys, combined_ds)}
+        served_ds = [fields[filter_key['shortName']] for filter_key in served_keys]
+        served = rtma_cache_key(year, month, day, hour, region, served_keys, 'arrays')
+        if served != key :
+            self.product_cache.put(served, pack_rtma_arrays(served_ds, self.product), ttl=ttl)
+        self.product_cache.put(
+            rtma_cache_key(year, month, day, hour, region, served_keys, 'payload:json:raw'),
+            self.produce_vis_payload(served_ds), ttl=ttl
+        )
+        return self.product
+
+
+
+    def retrieve_hourly_dask(self, year, month, day, hour, region=None) -> xr.Dataset :
+        # Region of interest served by this request (defaults to Southern California)
+        region = region or resolve_region()
         combined_ds = None
-        prefix = f'rtma2p5.{year}{month}{day}/rtma2p5.t{hour}z.2dvaranl_ndfd.grb2'
-        file_list = self.list_files(prefix=prefix)
-        
-        if len(file_list) == 0 :
-            prefix = f'rtma2p5.{year}{month}{day}/rtma2p5.t{hour}z.2dvaranl_ndfd.grb2_wexp'
-            file_list = self.list_files(prefix=prefix)
-            
-            if len(file_list) == 0 :
-                prefix = f'rtma2p5.{year}{month}{day}/rtma2p5.t{hour}z.2dvarges_ndfd.grb2_wexp'
-                file_list = self.list_files(prefix=prefix)
-                
-        temp_uri_list = [f'simplecache::s3://{file}' for file in file_list]
-        temp_path_list = [fsspec.open_local(temp_uri, s3={'anon': True}) for temp_uri in temp_uri_list]
-        
-        filter_keys = [
-            {'typeOfLevel': 'heightAboveGround', 'level': 10, 'shortName': '10u'},
-            {'typeOfLevel': 'heightAboveGround', 'level': 10, 'shortName': '10v'},
-            {'shortName': '2t'},
-        ]
 
+        # Pick the best available product (`2dvaranl` --> `2dvaranl_wexp` --> `2dvarges_wexp`) from the catalog
+        valid_time = datetime.datetime(int(year), int(month), int(day), int(hour))
+        self.product = None
+        with stage('rtma.list') :
+            resolved = self.catalog.resolve(valid_time)
+        if resolved is None :
+            raise FileNotFoundError(f'No RTMA analysis available for {year}-{month}-{day} {hour}Z')
+        self.product = resolved['product']
+        file_list = [resolved['path']]
+
+        # One task per GRIB file --> every variable is decoded from a single open of the file.
+        # Prefer fetching only the requested messages by byte range; fall back to downloading
+        # the whole file when the `.idx` inventory is missing or does not list every variable
         delayed_tasks = []
-        for temp_path in temp_path_list:
-            for filter_key in filter_keys:
-                delayed_task = delayed(self.process_filter_key)(temp_path, filter_key)
-                delayed_tasks.append(delayed_task)
+        for file in file_list:
+            messages = None
+            # Without a listed `.idx` sidecar the whole file is downloaded right away
+            if self.partial_fetch and resolved['index'] :
+                with stage('rtma.fetch') as span :
+                    messages = self.partial_fetcher.fetch_messages(file, self.grib_reader.filter_keys)
+                    if messages is not None :
+                        span.add_bytes(sum(len(message) for message in messages))
+
+            # Decoding and regridding run in dask threads --> bound to this request's trace
+            if messages is not None :
+                delayed_task = delayed(bind_trace(self.process_grib_messages))(messages, region)
+            else :
+                with stage('rtma.download') as span :
+                    temp_path = fsspec.open_local(f'simplecache::s3://{file}', s3=self.s3_options)
+                    span.add_bytes(os.path.getsize(temp_path))
+                delayed_task = delayed(bind_trace(self.process_grib_file))(temp_path, region)
+            delayed_tasks.append(delayed_task)
             
         # Compute all tasks in parallel
         results = compute(*delayed_tasks)
 
         # Combine results into a single dataset
         combined_ds = sum(results, [])
-        
-        # Slice the entire array to only return Southern California extent
-        lon_mask = (combined_ds[0].longitude > -118.5) & (combined_ds[0].longitude < -114.5)
-        lat_mask = (combined_ds[0].latitude > 32.2) & (combined_ds[0].latitude < 35)
-        for i in range(0, len(combined_ds)) :
-            combined_ds[i] = combined_ds[i].where(
-                lon_mask & lat_mask, 
-                drop=True
-            )
-
-        # Clear system cache from fsspec S3 connection and update pipeline to reflect S3 content
-        self.s3_fs.invalidate_cache()
-        self.s3_fs.clear_instance_cache()
-        
         return combined_ds
 
 
-    def create_wind_image(self, u_component, v_component) -> np.array :
-        # Normalize the U and V components to 0-255
-        u_norm = ((u_component + 128) / (127 + 128) * 255).astype(np.uint8)
-        v_norm = ((v_component + 128) / (127 + 128) * 255).astype(np.uint8)
+    def generate_point_time_series(self, lon, lat, start_date, end_date, region=None, max_gap_hours=24) -> dict :
+        # Hourly values at the pixel nearest (lon, lat) over [start_date, end_date] (inclusive hours):
+        # archived hours are read from the archive, at most `max_gap_hours` other hours are retrieved hourly
+        region = region or resolve_region()
+        if not (region.lon_min <= lon <= region.lon_max and region.lat_min <= lat <= region.lat_max) :
+            raise ValueError(f'Point ({lon}, {lat}) lies outside of region {region.key()} {region.bounds()}')
+        short_names = [key['shortName'] for key in self.grib_reader.filter_keys]
+        times = hour_range(start_date, end_date)
+        values = {short_name : np.full(len(times), np.nan, dtype=np.float32) for short_name in short_names}
+        sources = [None] * len(times)
+        grid_lon = grid_lat = None
 
-        # Calculate the wind magnitude
-        alpha_channel = np.full(u_component.shape, 255, dtype=np.uint8)
-        
-        # Combine U and V components into an RGB image
-        wind_image = np.zeros((u_component.shape[0], u_component.shape[1], 4), dtype=np.uint8)
-        wind_image[..., 0] = u_norm  # Red channel for U component
-        wind_image[..., 1] = v_norm  # Green channel for V component
-        wind_image[..., 2] = v_norm  # Blue channel can be zeros
-        wind_image[..., 3] = alpha_channel
-
-        buffer = BytesIO()
-        img = Image.fromarray(wind_image)
-        img.save(buffer, format="PNG")
-        buffer.seek(0)
-        image_array = np.array(Image.open(buffer))
-        image_array = image_array[::-1, :]
-        buffer.close()
-        
-        return image_array
+        archived = None
+        if self.archive is not None :
+            with stage('rtma.archive') :
+                archived = self.archive.read_point(region, lon, lat, start_date, end_date, short_names)
+        if archived is not None :
+            grid_lon, grid_lat = archived['grid_lon'], archived['grid_lat']
+            for short_name in short_names :
+                values[short_name][archived['present']] = archived['values'][short_name][archived['present']]
+            for index in np.flatnonzero(archived['present']) :
+                sources[index] = 'archive'
+
+        # Gaps of the archive --> product cache or S3, one hour at a time
+        gaps = [index for index, source in enumerate(sources) if source is None]
+        for index in gaps[:max_gap_hours] :
+            valid_time = times[index]
+            try:
+                data_arrays = self.retrieve_hourly_cached(
+                    f'{valid_time:%Y}', f'{valid_time:%m}', f'{valid_time:%d}', f'{valid_time:%H}', region
+                )
+            except FileNotFoundError :
+                continue
+            column = int(np.abs(data_arrays[0]['longitude'].values - lon).argmin())
+            row = int(np.abs(data_arrays[0]['latitude'].values - lat).argmin())
+            if grid_lon is None :
+                grid_lon = float(data_arrays[0]['longitude'].values[column])
+                grid_lat = float(data_arrays[0]['latitude'].values[row])
+            for short_name, data_array in zip(short_names, data_arrays) :
+                values[short_name][index] = data_array.values[row, column]
+            sources[index] = 'retrieved'
+
+        # Temperature: Convert from Kelvin --> Fahrenheit (same values as the hourly payload)
+        if '2t' in values :
+            values['2t'] = (values['2t'] - 273.15) * (9/5) + 32
+        return {
+            'STATUS' : 'SUCCESS' ,
+            'TIMES' : [epoch_seconds(valid_time) for valid_time in times] ,
+            'DATA' : {short_name : np.around(series.astype(np.float64), 2).tolist() for short_name, series in values.items()} ,
+            'SOURCES' : sources ,
+            'MISSING' : sum(source is None for source in sources) ,
+            'grid_lon' : grid_lon ,
+            'grid_lat' : grid_lat ,
+        }
+
+
+    def create_wind_image(self, u_component, v_component, encoding='uv', png=False) :
+        # Single-pass wind texture written straight into a bottom-up (flipped) RGBA buffer;
+        # `png=True` returns the compressed PNG file instead of the raw pixels
+        if png :
+            return encode_wind_png(u_component, v_component, encoding)
+        return encode_wind(u_component, v_component, encoding)
     
     
 
-    def produce_vis_json(self, u, v, climate_var, vmin=0, vmax=120, cmap='turbo', 
-                    longitude='longitude', latitude='latitude',
-                    size_x='x', size_y='y') -> dict :
+    def produce_vis_arrays(self, u, v, climate_var, vmin=0, vmax=120, cmap='turbo', 
+                    label='Temperature (°F)', longitude='longitude', latitude='latitude',
+                    size_x='x', size_y='y', wind_encoding='uv', value_encoding='float') -> dict :
     
-        # Normalize values for the plot and legend
-        norm_values = Normalize(
-            vmin=vmin, vmax=vmax,
-        )
-        
-        # Separate figure for displaying the legend:
-        fig_cbar, ax_cbar = plt.subplots(nrows=1, ncols=1, figsize=(1, 11))
-        sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm_values)
-        sm.set_array([])  # Required for ScalarMappable, even if empty
-        # Add colorbar to the figure
-        cbar = fig_cbar.colorbar(sm, cax=ax_cbar, orientation='vertical')
-        cbar.set_label('Temperature (°F)', rotation=90, labelpad=15, va='center', fontsize=18)
-        cbar.ax.yaxis.set_label_position('left')
-        cbar.ax.tick_params(labelsize=13)
-        # Save the colorbar figure to an in-memory file
-        buffer_legend = BytesIO()
-        fig_cbar.savefig(buffer_legend, format='png', bbox_inches='tight', pad_inches=0.1)
-        plt.close(fig_cbar)  # Close the figure after saving to release memory
-        buffer_legend.seek(0)
-        image_legend = Image.open(buffer_legend)
-        legend_array = np.array(image_legend)
-        buffer_legend.close()
+        # Colorbar legend --> rendered once per (cmap, vmin, vmax, label) style and reused
+        legend = legend_service.get(cmap, vmin, vmax, label)
         
         # Climate Variable Image
         array = climate_var
         array = (array - 273.15) * (9/5) + 32
-        rgba_image = colormaps[cmap](norm_values(array))
-        alpha_channel = np.ones(array.shape)
-        alpha_channel[(np.isnan(array))] = 0
-        rgba_image[:, :, 3] = alpha_channel
-        rgba_image = (rgba_image * 255).astype(np.uint8)  # [0, 255] represents the colors
-        rgba_image = rgba_image[::-1, :]
+        # uint8 RGBA lookup table per (cmap, vmin, vmax) --> NaN pixels are transparent, rows flipped
+        with stage('rtma.render') :
+            rgba_image = get_colormap_lut(cmap, vmin, vmax).render(array.values)
 
 
         # Wind Image
-        wind_image = self.create_wind_image(
-            u,
-            v,
-        )
+        with stage('rtma.wind') :
+            wind_image = self.create_wind_image(
+                u,
+                v,
+                encoding = wind_encoding,
+            )
         
-        return {
-            'climate_var_image': rgba_image.flatten().tolist(),
-            'climate_var_values': np.around(array[::-1, :].values.flatten(), 2).tolist(),
-            'wind_image': wind_image.flatten().tolist(),
-            'legend_array' : legend_array.flatten().tolist(),
+        # Arrays stay as NumPy buffers --> encoded as JSON lists or binary by `Payload_Encoding`
+        vis_arrays = {
+            'climate_var_image': rgba_image,
+            # Rounded floats or a quantized int16 grid (see `Value_Encoding`)
+            **value_fields(array[::-1, :].values, value_encoding),
+            'wind_image': wind_image,
+            'legend_array' : legend.array,
+            'legend_url' : legend.url,
             'bounds' : [
                 array[longitude].min().item(), array[latitude].min().item(), 
                 array[longitude].max().item(), array[latitude].max().item(),
             ],
             'height': array.sizes[size_y],
             'width': array.sizes[size_x],
-        }
\ No newline at end of file
+        }
+        # The original U/V layout keeps the original payload fields, other layouts describe their scales
+        if wind_encoding != 'uv' :
+            vis_arrays['wind_scale'] = wind_scale(wind_encoding)
+        return vis_arrays
+
+
+
+    def produce_vis_json(self, u, v, climate_var, **kwargs) -> dict :
+        # JSON-compatible structure (flattened lists), kept for backward compatibility
+        return vis_arrays_to_json(self.produce_vis_arrays(u, v, climate_var, **kwargs))
+
+
+
+    def produce_vis_payload(self, ds, payload_format='json', image_format='raw', wind_encoding='uv',
+                            value_encoding='float') -> bytes :
+        # Render the (u, v, climate variable) arrays and serialize them once (JSON or binary envelope)
+        vis_arrays = self.produce_vis_arrays(
+            u = ds[0],
+            v = ds[1],
+            climate_var = ds[2],
+            wind_encoding = wind_encoding,
+            value_encoding = value_encoding,
+        )
+        with stage('rtma.serialize') as span :
+            payload = encode_payload(vis_arrays, payload_format, image_format)
+            span.add_bytes(len(payload))
+        return payload
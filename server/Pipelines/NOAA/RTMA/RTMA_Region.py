@@ -0,0 +1,106 @@
+## --------------------------------------------------------------------------------------- ##
+##  NOAA's Real-Time Mesoscale Analysis (RTMA) Data Pipeline                               ##
+## ~ Regions of Interest: Bounding Boxes and Native Lambert Grid Windows ~                 ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+
+
+# Nominal spacing (degrees) of the 2.5 km RTMA grid
+RTMA_SPACING = 0.025
+
+
+## --------------------------------------------------------------- ##
+##          Region of Interest (Longitude, Latitude) Box           ##
+## --------------------------------------------------------------- ##
+class RTMA_Region :
+    def __init__(self, lon_min, lat_min, lon_max, lat_max, margin=0.25, name=None) :
+        if not (lon_min < lon_max and lat_min < lat_max) :
+            raise ValueError(f'Invalid region bounds: ({lon_min}, {lat_min}, {lon_max}, {lat_max})')
+        self.lon_min = float(lon_min)
+        self.lat_min = float(lat_min)
+        self.lon_max = float(lon_max)
+        self.lat_max = float(lat_max)
+        # Margin (degrees) kept around the box on the native grid so that every
+        # target pixel inside the box still finds its true nearest neighbour
+        self.margin = float(margin)
+        self.name = name
+
+
+    def key(self) -> str :
+        # Stable identifier used by the regridding plans and product caches
+        if self.name is not None :
+            return self.name
+        return f'{self.lon_min:.4f},{self.lat_min:.4f},{self.lon_max:.4f},{self.lat_max:.4f}'
+
+
+    def bounds(self) -> list :
+        return [self.lon_min, self.lat_min, self.lon_max, self.lat_max]
+
+
+    def native_window(self, longitude, latitude) -> tuple :
+        # Smallest (y, x) window of the native Lambert grid covering the box plus its margin
+        mask = (
+            (longitude >= self.lon_min - self.margin) & (longitude <= self.lon_max + self.margin) &
+            (latitude >= self.lat_min - self.margin) & (latitude <= self.lat_max + self.margin)
+        )
+        rows = np.flatnonzero(mask.any(axis=1))
+        cols = np.flatnonzero(mask.any(axis=0))
+        if rows.size == 0 or cols.size == 0 :
+            raise ValueError(f'Region {self.key()} lies outside of the RTMA grid')
+        return slice(int(rows[0]), int(rows[-1]) + 1), slice(int(cols[0]), int(cols[-1]) + 1)
+
+
+    def axes(self, spacing=RTMA_SPACING) -> tuple :
+        # Regular (longitude, latitude) axes spanning the box --> approximates the regridded grid of the region
+        longitude = np.arange(self.lon_min, self.lon_max + spacing / 2, spacing)
+        latitude = np.arange(self.lat_min, self.lat_max + spacing / 2, spacing)
+        return longitude, latitude
+
+
+    def lon_mask(self, longitude) -> np.ndarray :
+        return (longitude > self.lon_min) & (longitude < self.lon_max)
+
+
+    def lat_mask(self, latitude) -> np.ndarray :
+        return (latitude > self.lat_min) & (latitude < self.lat_max)
+
+
+
+## --------------------------------------------------------------- ##
+##                 Preset Regions Served by the API                ##
+## --------------------------------------------------------------- ##
+REGIONS = {
+    'southern_california' : RTMA_Region(-118.5, 32.2, -114.5, 35.0, name='southern_california'),
+    'imperial_county' : RTMA_Region(-116.11, 32.61, -114.46, 33.44, name='imperial_county'),
+    'riverside_county' : RTMA_Region(-117.68, 33.42, -114.43, 34.08, name='riverside_county'),
+    'san_diego_county' : RTMA_Region(-117.61, 32.53, -116.08, 33.51, name='san_diego_county'),
+}
+
+DEFAULT_REGION = 'southern_california'
+
+
+def resolve_region(region=None, bbox=None) -> RTMA_Region :
+    # An explicit bounding box `lon_min,lat_min,lon_max,lat_max` takes precedence over a preset name
+    if bbox is not None :
+        if isinstance(bbox, str) :
+            bbox = bbox.split(',')
+        try:
+            lon_min, lat_min, lon_max, lat_max = [float(value) for value in bbox]
+        except (TypeError, ValueError) :
+            raise ValueError(f'Bounding box must be `lon_min,lat_min,lon_max,lat_max`, received: {bbox}')
+        return RTMA_Region(lon_min, lat_min, lon_max, lat_max)
+
+    region = region or DEFAULT_REGION
+    if region not in REGIONS :
+        raise ValueError(f'Unknown region `{region}`, available regions: {sorted(REGIONS)}')
+    return REGIONS[region]
@@ -0,0 +1,179 @@
+## --------------------------------------------------------------------------------------- ##
+##  NOAA's Real-Time Mesoscale Analysis (RTMA) Data Pipeline                               ##
+## ~ Persistent Nearest-Neighbour Regridding Engine (Lambert --> Regular Lon/Lat) ~        ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+from scipy.spatial import cKDTree
+# Standard Libraries
+import hashlib
+import tempfile
+import threading
+import os
+
+
+# Grid-definition attributes (cfgrib naming) that fully describe the RTMA
+# Lambert Conformal grid --> two fields sharing these values share a geometry
+GEOMETRY_ATTRS = (
+    'GRIB_gridType', 'GRIB_Nx', 'GRIB_Ny',
+    'GRIB_LoVInDegrees', 'GRIB_Latin1InDegrees', 'GRIB_Latin2InDegrees',
+    'GRIB_latitudeOfFirstGridPointInDegrees', 'GRIB_longitudeOfFirstGridPointInDegrees',
+    'GRIB_DxInMetres', 'GRIB_DyInMetres',
+)
+
+
+## --------------------------------------------------------------- ##
+##       Regridding Plan: Cached Source --> Target Index Map       ##
+## --------------------------------------------------------------- ##
+class RTMA_Regrid_Plan :
+    def __init__(self, index, longitude, latitude, window=None) :
+        # Flat index into the (cropped) source field for every target pixel (row-major, y then x)
+        self.index = index
+        # 1-D target coordinates of the regular (longitude, latitude) grid
+        self.longitude = longitude
+        self.latitude = latitude
+        self.shape = (latitude.size, longitude.size)
+        # Native (y, x) window of the source grid that the index refers to
+        self.window = window or (slice(None), slice(None))
+
+
+    def crop(self, field) :
+        # Select the native Lambert window covering the region (works lazily on xarray/dask objects)
+        window_y, window_x = self.window
+        if hasattr(field, 'isel') :
+            return field.isel(y=window_y, x=window_x)
+        return field[..., window_y, window_x]
+
+
+    def regrid(self, values) -> np.ndarray :
+        # Single vectorized gather replaces the per-variable nearest-neighbour search
+        return np.take(np.asarray(values).ravel(), self.index).reshape(self.shape)
+
+
+
+## --------------------------------------------------------------- ##
+##      Regridding Engine: In-Memory and On-Disk Plan Storage      ##
+## --------------------------------------------------------------- ##
+class RTMA_Regrid_Engine :
+    def __init__(self, cache_dir=None) :
+        # On-disk tier for the index maps --> survives server restarts
+        self.cache_dir = cache_dir or os.environ.get(
+            'RTMA_REGRID_CACHE', os.path.join(tempfile.gettempdir(), 'rtma_regrid')
+        )
+        # In-memory tier for the index maps --> one entry per grid geometry
+        self.plans = {}
+        self.lock = threading.Lock()
+
+
+    def geometry_key(self, attrs, shape, coordinates=None) -> str :
+        # Prefer the GRIB grid definition, fall back to the coordinate corners
+        signature = [f'{attr}={attrs[attr]}' for attr in GEOMETRY_ATTRS if attr in attrs]
+        if len(signature) == 0 and coordinates is not None :
+            longitude, latitude = coordinates()
+            corners = np.array([longitude.flat[0], longitude.flat[-1], latitude.flat[0], latitude.flat[-1]])
+            signature.append(corners.round(6).tobytes().hex())
+        signature.append(str(tuple(shape)))
+        return hashlib.sha1('|'.join(signature).encode()).hexdigest()[:20]
+
+
+    def get_plan(self, key, coordinates, region=None) -> RTMA_Regrid_Plan :
+        # Plans are specific to both the grid geometry and the requested region
+        if region is not None :
+            key = f"{key}_{hashlib.sha1(region.key().encode()).hexdigest()[:12]}"
+
+        # (1) In-memory lookup
+        plan = self.plans.get(key)
+        if plan is not None :
+            return plan
+
+        with self.lock :
+            plan = self.plans.get(key)
+            if plan is None :
+                # (2) On-disk lookup, (3) otherwise compute the native (longitude, latitude)
+                # arrays through the `coordinates` callable, then build and persist the plan
+                plan = self.load_plan(key)
+                if plan is None :
+                    longitude, latitude = coordinates()
+                    plan = self.build_plan(longitude, latitude, region)
+                    self.save_plan(key, plan)
+                self.plans[key] = plan
+        return plan
+
+
+    def build_plan(self, longitude, latitude, region=None) -> RTMA_Regrid_Plan :
+        # Extract (longitude, latitude) coordinates from multi-dimensional array
+        longitude = np.asarray(longitude)
+        latitude = np.asarray(latitude)
+        size_y, size_x = longitude.shape
+
+        # Regular target grid spanning the source extent at the source resolution
+        lon_new = np.linspace(longitude.min(), longitude.max(), size_x)
+        lat_new = np.linspace(latitude.min(), latitude.max(), size_y)
+
+        # Region of interest --> keep the target pixels inside the box and the
+        # native window (box plus margin) that holds their nearest neighbours
+        window = (slice(0, size_y), slice(0, size_x))
+        if region is not None :
+            lon_new = lon_new[region.lon_mask(lon_new)]
+            lat_new = lat_new[region.lat_mask(lat_new)]
+            window = region.native_window(longitude, latitude)
+            longitude = longitude[window]
+            latitude = latitude[window]
+        lon_new_grid, lat_new_grid = np.meshgrid(lon_new, lat_new)
+
+        # Nearest source pixel for every target pixel --> same search `griddata(method='nearest')` performs
+        points = np.column_stack((longitude.ravel(), latitude.ravel()))
+        tree = cKDTree(points)
+        _, index = tree.query(np.column_stack((lon_new_grid.ravel(), lat_new_grid.ravel())))
+
+        return RTMA_Regrid_Plan(index.astype(np.int64), lon_new, lat_new, window)
+
+
+    def plan_path(self, key) -> str :
+        return os.path.join(self.cache_dir, f'regrid_{key}.npz')
+
+
+    def load_plan(self, key) :
+        path = self.plan_path(key)
+        if not os.path.exists(path) :
+            return None
+        try:
+            with np.load(path) as stored :
+                window_y, window_x = stored['window']
+                return RTMA_Regrid_Plan(
+                    stored['index'], stored['longitude'], stored['latitude'],
+                    (slice(int(window_y[0]), int(window_y[1])), slice(int(window_x[0]), int(window_x[1]))),
+                )
+        except Exception :
+            # Corrupt or partially-written plan --> rebuild it
+            return None
+
+
+    def save_plan(self, key, plan) :
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temporary file first so concurrent workers never read a partial plan
+            temp_path = f'{self.plan_path(key)}.{os.getpid()}.tmp.npz'
+            window = np.array([
+                [plan.window[0].start, plan.window[0].stop],
+                [plan.window[1].start, plan.window[1].stop],
+            ])
+            np.savez(temp_path, index=plan.index, longitude=plan.longitude, latitude=plan.latitude, window=window)
+            os.replace(temp_path, self.plan_path(key))
+        except OSError :
+            # Disk tier is best-effort --> the in-memory plan is still used
+            pass
+
+
+
+# Process-wide engine shared by every `RTMA_Data_Pipe` connection
+default_regrid_engine = RTMA_Regrid_Engine()
@@ -0,0 +1,105 @@
+## --------------------------------------------------------------------------------------- ##
+##  NOAA's Real-Time Mesoscale Analysis (RTMA) Data Pipeline                               ##
+## ~ Wind Textures: Vectorized U/V, Speed/Direction, and Particle Encodings ~              ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Texture layouts (RGBA uint8, rows bottom-up like every other image in the payload):
+#   'uv'              R = U, G = V, B = V, A = 255     with U/V (m/s) = channel - 128   (original layout)
+#   'speed_direction' R = speed, G = direction, B = 0  with speed (m/s) = R * max_speed / 255,
+#                                                      direction (degrees, meteorological "from") = G * 360 / 256
+#   'particle'        R = U, G = V, B = speed          with U/V (m/s) = channel / 255 * 2 * max_speed - max_speed,
+#                                                      speed (m/s) = B * max_speed / 255
+# For 'speed_direction' and 'particle' missing (NaN) pixels get A = 0; the scales are reported in `wind_scale`
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Import Array Manipulation Libraries
+import numpy as np
+# PNG encoding shared with the payload encoders
+from Pipelines.Common.Payload_Encoding import encode_png
+
+
+WIND_ENCODINGS = ('uv', 'speed_direction', 'particle')
+# Wind speeds (m/s) mapped to the top of the 8-bit range for the scaled encodings
+WIND_MAX_SPEED = 40.0
+
+
+## --------------------------------------------------------------- ##
+##                Wind Texture Encoder (Single Pass)               ##
+## --------------------------------------------------------------- ##
+def wind_scale(encoding='uv', max_speed=WIND_MAX_SPEED) -> dict :
+    # Decoding parameters sent along with the texture
+    if encoding == 'uv' :
+        return {'encoding' : encoding, 'min' : -128, 'max' : 127}
+    return {'encoding' : encoding, 'max_speed' : max_speed}
+
+
+def encode_wind(u_component, v_component, encoding='uv', max_speed=WIND_MAX_SPEED, out=None, flip=True) -> np.ndarray :
+    # Write the wind texture straight into a (height, width, 4) uint8 buffer (preallocated or new);
+    # `flip=True` writes rows bottom-up through a reversed view instead of copying the image afterwards
+    if encoding not in WIND_ENCODINGS :
+        raise ValueError(f'Unknown wind encoding `{encoding}`, expected one of {WIND_ENCODINGS}')
+    u = np.asarray(u_component)
+    v = np.asarray(v_component)
+    if out is None :
+        out = np.empty(u.shape + (4,), dtype=np.uint8)
+    target = out[::-1] if flip else out
+
+    if encoding == 'uv' :
+        # Same arithmetic (and dtype) as the original per-channel normalization --> identical bytes
+        scratch = np.add(u, 128)
+        scratch /= (127 + 128)
+        scratch *= 255
+        np.copyto(target[..., 0], scratch, casting='unsafe')
+        np.add(v, 128, out=scratch)
+        scratch /= (127 + 128)
+        scratch *= 255
+        np.copyto(target[..., 1], scratch, casting='unsafe')
+        target[..., 2] = target[..., 1]
+        target[..., 3] = 255
+        return out
+
+    # Missing pixels are zeroed first (no NaN casts) and made transparent at the end
+    missing = np.isnan(u) | np.isnan(v)
+    u = np.where(missing, 0, u)
+    v = np.where(missing, 0, v)
+    speed = np.hypot(u, v)
+    if encoding == 'speed_direction' :
+        scratch = np.clip(speed, 0, max_speed)
+        scratch *= 255 / max_speed
+        np.rint(scratch, out=scratch)
+        np.copyto(target[..., 0], scratch, casting='unsafe')
+        # Meteorological convention --> direction the wind blows from, clockwise from north
+        np.arctan2(-u, -v, out=scratch)
+        np.degrees(scratch, out=scratch)
+        np.mod(scratch, 360, out=scratch)
+        scratch *= 256 / 360
+        np.floor(scratch, out=scratch)
+        np.minimum(scratch, 255, out=scratch)
+        np.copyto(target[..., 1], scratch, casting='unsafe')
+        target[..., 2] = 0
+    else :
+        for channel, component in ((0, u), (1, v)) :
+            scratch = np.clip(component, -max_speed, max_speed)
+            scratch += max_speed
+            scratch *= 255 / (2 * max_speed)
+            np.rint(scratch, out=scratch)
+            np.copyto(target[..., channel], scratch, casting='unsafe')
+        np.clip(speed, 0, max_speed, out=speed)
+        speed *= 255 / max_speed
+        np.rint(speed, out=speed)
+        np.copyto(target[..., 2], speed, casting='unsafe')
+
+    np.copyto(target[..., 3], np.where(missing, 0, 255), casting='unsafe')
+    return out
+
+
+def encode_wind_png(u_component, v_component, encoding='uv', max_speed=WIND_MAX_SPEED) -> bytes :
+    # Compressed PNG file of the wind texture (ready to hand to the client as-is)
+    return encode_png(encode_wind(u_component, v_component, encoding, max_speed))
@@ -11,9 +11,9 @@
 ## --------------------------------------------------------------- ##
 ##                  Pydantic Validation Methods                    ##
 ## --------------------------------------------------------------- ##
-from pydantic import BaseModel
-from typing import List
-from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List, Optional, Literal
+from datetime import datetime, date
 
 
 ## --------------------------------------------------------------- ##
@@ -24,6 +24,32 @@ class RTMA_Data_Submission(BaseModel) :
     month: str
     day: str
     hour: str
+    # Region of interest --> preset name or explicit `lon_min,lat_min,lon_max,lat_max` box
+    region: Optional[str] = None
+    bbox: Optional[str] = None
+
+# Query parameters of the versioned GET pathway (`/v1/rtma`) --> invalid values are rejected with 422
+class RTMA_Hour_Query(BaseModel) :
+    year: int = Field(ge=2014, le=2100)
+    month: int = Field(ge=1, le=12)
+    day: int = Field(ge=1, le=31)
+    hour: int = Field(ge=0, le=23)
+    region: Optional[str] = None
+    bbox: Optional[str] = None
+    format: Optional[Literal['json', 'binary']] = None
+    image_format: Optional[Literal['raw', 'png']] = None
+    # `climate_var_values` --> rounded floats (default) or quantized int16 grids (see `Value_Encoding`)
+    values: Literal['float', 'int16', 'int16_delta'] = 'float'
+    wind: Literal['uv', 'speed_direction', 'particle'] = 'uv'
+
+# Point time series (`/v1/rtma/time_series`) --> inclusive calendar days, served from the RTMA archive
+class RTMA_Point_Query(BaseModel) :
+    lon: float = Field(ge=-180, le=180)
+    lat: float = Field(ge=-90, le=90)
+    start: date
+    end: date
+    region: Optional[str] = None
+    bbox: Optional[str] = None
 
 class RTMA_Parse_Data :
     def __init__(self, json_object, ) :
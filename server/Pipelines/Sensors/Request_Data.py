@@ -3,9 +3,9 @@
 ## --------------------------------------------------------------- ##
 ##                  Pydantic Validation Methods                    ##
 ## --------------------------------------------------------------- ##
-from pydantic import BaseModel
-from typing import List
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional, Literal, Union, Annotated
+from datetime import datetime, date
 
 
 ## --------------------------------------------------------------- ##
@@ -23,6 +23,53 @@ class Sensor_Data_Time_Series(BaseModel) :
     lat: float
     climateVar: str
 
+# Query parameters of the versioned GET pathways (`/v1/sensor/...`) --> invalid values are rejected with 422
+class Sensor_Hour_Query(BaseModel) :
+    year: int = Field(ge=1900, le=2100)
+    month: int = Field(ge=1, le=12)
+    day: int = Field(ge=1, le=31)
+    hour: int = Field(ge=0, le=23)
+    climate_var: Literal['td2m', 'rh2m']
+    format: Optional[Literal['json', 'binary']] = None
+    image_format: Optional[Literal['raw', 'png']] = None
+    # `climate_var_values` --> rounded floats (default) or quantized int16 grids (see `Value_Encoding`)
+    values: Literal['float', 'int16', 'int16_delta'] = 'float'
+
+class Sensor_Point_Query(BaseModel) :
+    lon: float = Field(ge=-180, le=180)
+    lat: float = Field(ge=-90, le=90)
+    climate_var: Literal['td2m', 'rh2m']
+    # Inclusive calendar days (defaults --> the whole dataset) and the server-side reduction
+    start: Optional[date] = None
+    end: Optional[date] = None
+    aggregation: Literal['hourly', 'daily', 'threshold', 'rolling'] = 'hourly'
+    threshold: Optional[float] = None
+    window: int = Field(default=24, ge=1, le=744)
+
+# Batch time series (`POST /v1/sensor/time_series/batch`) --> many points and GeoJSON polygons in one read
+class Sensor_Batch_Point(BaseModel) :
+    lon: float = Field(ge=-180, le=180)
+    lat: float = Field(ge=-90, le=90)
+    id: Optional[Union[str, int]] = None
+
+class Sensor_Batch_Query(BaseModel) :
+    climate_var: Literal['td2m', 'rh2m']
+    points: List[Sensor_Batch_Point] = Field(default=[], max_length=1000)
+    # GeoJSON `Polygon` / `MultiPolygon` geometries, or Features wrapping them (Feature `id` names the result)
+    polygons: List[dict] = Field(default=[], max_length=100)
+    percentiles: List[Annotated[float, Field(ge=0, le=100)]] = Field(default=[10, 50, 90], max_length=10)
+    start: Optional[date] = None
+    end: Optional[date] = None
+
+    @field_validator('percentiles')
+    @classmethod
+    def unique_percentiles(cls, percentiles) :
+        # One `p<q>` column per percentile --> duplicates (compared as column names) are dropped, order kept
+        columns = {}
+        for q in percentiles :
+            columns.setdefault(f'p{q:g}', q)
+        return list(columns.values())
+
 class Sensor_Parse_Data :
     def __init__(self, json_object, ) :
         self.df = json_object
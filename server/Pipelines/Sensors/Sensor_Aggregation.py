@@ -0,0 +1,111 @@
+## --------------------------------------------------------------------------------------- ##
+##  Sensor Data Pipeline                                                                   ##
+## ~ Time-Series Date Ranges and Temporal Aggregation (Reduced Before Materializing) ~      ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Aggregations are built on the lazy (dask / lazily-indexed) selection of one pixel, so only the
+# reduced columns are computed and serialized:
+#   hourly     --> value                       (one row per hour)
+#   daily      --> min, mean, max              (one row per day)
+#   threshold  --> hours_above, hours          (one row per day; hours strictly above `threshold`, hours with data)
+#   rolling    --> min, mean, max              (one row per hour; trailing `window`-hour window)
+# Rows are labelled by the epoch second (UTC) at which their hour / day starts.
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Xarray --> Spatiotemporal Multidimensional Array Library
+import xarray as xr
+# Import Array Manipulation Libraries
+import numpy as np
+# Standard Libraries
+import datetime
+
+
+AGGREGATIONS = ('hourly', 'daily', 'threshold', 'rolling')
+# Columns returned by every aggregation
+AGGREGATION_COLUMNS = {
+    'hourly' : ('value',) ,
+    'daily' : ('min', 'mean', 'max') ,
+    'threshold' : ('hours_above', 'hours') ,
+    'rolling' : ('min', 'mean', 'max') ,
+}
+# Decimals kept in aggregated values (same precision as the hourly visualization arrays)
+VALUE_DECIMALS = 2
+
+
+def date_range(start=None, end=None) -> tuple :
+    # Inclusive calendar days --> (first hour, last second) bounds for `.sel(time=slice(...))`
+    start_date = None if start is None else datetime.datetime.combine(start, datetime.time.min)
+    end_date = None if end is None else datetime.datetime.combine(end, datetime.time.max)
+    if start_date is not None and end_date is not None and start_date > end_date :
+        raise ValueError('start must not be after end')
+    return start_date, end_date
+
+
+def epoch_seconds(times) -> list :
+    # datetime64 labels --> integer seconds since 1970-01-01 (UTC)
+    return np.asarray(times).astype('datetime64[s]').astype(np.int64).tolist()
+
+
+def history_start(start_date, aggregation, window) -> datetime.datetime :
+    # Rolling windows also read the `window - 1` hours before the range --> the first rows are full windows
+    if aggregation == 'rolling' and start_date is not None :
+        return start_date - datetime.timedelta(hours=window - 1)
+    return start_date
+
+
+def aggregate_series(array, aggregation='hourly', threshold=None, window=24, start_date=None) -> dict :
+    # Lazy (time,) DataArray --> {column name : lazy DataArray}, nothing is computed here
+    if aggregation not in AGGREGATIONS :
+        raise ValueError(f'Unknown aggregation `{aggregation}`, expected one of {AGGREGATIONS}')
+    if aggregation == 'threshold' and threshold is None :
+        raise ValueError('The `threshold` aggregation needs a threshold value')
+
+    # No hours selected (e.g. a range outside of the dataset) --> empty columns, nothing to resample
+    if array.sizes['time'] == 0 :
+        dtype = np.int64 if aggregation == 'threshold' else array.dtype
+        return {name : array.astype(dtype) for name in AGGREGATION_COLUMNS[aggregation]}
+
+    if aggregation == 'hourly' :
+        return {'value' : array}
+
+    if aggregation == 'daily' :
+        days = array.resample(time='1D')
+        return {'min' : days.min(), 'mean' : days.mean(), 'max' : days.max()}
+
+    if aggregation == 'threshold' :
+        return {
+            'hours_above' : (array > threshold).resample(time='1D').sum() ,
+            'hours' : array.notnull().resample(time='1D').sum() ,
+        }
+
+    # Trailing window ending at each hour; partial windows (missing hours) are NaN, so fewer hours
+    # than `window` give all-NaN rows
+    if array.sizes['time'] < window :
+        missing = xr.full_like(array, np.nan, dtype=np.float64)
+        columns = {name : missing for name in AGGREGATION_COLUMNS['rolling']}
+    else :
+        windows = array.rolling(time=window, min_periods=window)
+        columns = {'min' : windows.min(), 'mean' : windows.mean(), 'max' : windows.max()}
+    if start_date is not None :
+        columns = {name : column.sel(time=slice(start_date, None)) for name, column in columns.items()}
+    return columns
+
+
+def columns_to_json(columns) -> tuple :
+    # Computed columns --> (epoch-second row labels, {name : list}); counts stay integers
+    times = epoch_seconds(next(iter(columns.values()))['time'].values)
+    data = {}
+    for name, column in columns.items() :
+        values = column.values
+        if np.issubdtype(values.dtype, np.integer) :
+            data[name] = values.tolist()
+        else :
+            data[name] = np.around(values.astype(np.float64), VALUE_DECIMALS).tolist()
+    return times, data
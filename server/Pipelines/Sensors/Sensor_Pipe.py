@@ -19,12 +19,32 @@ import orjson
 import matplotlib.pyplot as plt
 
 # Visualize gridded array as a PNG image
-from matplotlib import colormaps
-from matplotlib.colors import Normalize
 import matplotlib.cm as cm
 from PIL import Image
 from io import BytesIO
+import warnings
 import os
+# Precomputed uint8 colormap lookup tables
+from Pipelines.Common.Colormap_LUT import get_colormap_lut
+# Colorbar legends rendered once per style
+from Pipelines.Common.Legend_Service import legend_service, LEGEND_STYLES
+# Grid payload encoding (JSON lists, binary envelope, PNG image fields)
+from Pipelines.Common.Payload_Encoding import encode_payload, vis_arrays_to_json
+from Pipelines.Common.Value_Encoding import value_fields
+# Hour ranges streamed as framed messages (reused buffers, quantized deltas)
+from Pipelines.Common.Frame_Stream import Frame_Encoder
+# Shared, long-lived dataset handles
+from Pipelines.Common.Dataset_Registry import dataset_registry
+# Vectorized point / GeoJSON polygon --> grid cell resolution
+from Pipelines.Common.Geo_Selection import nearest_cells, polygon_cells, polygon_id, nan_percentiles
+# Pixel-major (time-series) copy of the sensor dataset
+from Pipelines.Sensors.Sensor_Rechunk import pixel_major_path, pixel_major_is_current
+# Date ranges and temporal aggregation of time series
+from Pipelines.Sensors.Sensor_Aggregation import (
+    date_range, history_start, aggregate_series, columns_to_json, epoch_seconds
+)
+# Per-request stage spans (no-ops outside traced requests)
+from Pipelines.Common.Pipeline_Tracing import stage
 
 
 ## --------------------------------------------------------------- ##
@@ -32,28 +52,48 @@ import os
 ## --------------------------------------------------------------- ##
 class Sensor_Pipe :
     def __init__(self, 
-                 file_name = 'combined.nc'
+                 file_name = 'combined.nc',
+                 pixel_file = None,
+                 registry = None
                 ) :
         self.file_name = file_name
+        # Open dataset handles are shared across connections (reopened only when the file changes)
+        self.registry = registry or dataset_registry
+        # Pixel-major (time-series) copy written by `sensor_rechunk.py`, used for point queries when current
+        self.pixel_file = pixel_file or pixel_major_path(file_name)
 
 
 
-    ## =============================================================== ##
-    ##      Lazily Load and Create Task Graph for Combined Dataset     ##
-    ## =============================================================== ##
-    def open_single_file(self, file_path, lon, lat, start_date, end_date, climate_var):
-        
+    def time_series_file(self) -> str :
+        # Point time series read the pixel-major copy, maps keep reading the map-oriented dataset
+        if pixel_major_is_current(self.file_name, self.pixel_file) :
+            return self.pixel_file
+        return self.file_name
+
+
+
+    def time_series_dataset(self, file_path) -> xr.Dataset :
         # Lazily load the NetCDF file --> Load data in 50-hour chunks, not
-        # caching anything to memory
-        ds = xr.open_dataset(
-            self.file_name,
-            chunks = {'time': 50},  # Lazily loaded data --> loading in pieces at a time
-            engine = 'h5netcdf',
+        # caching anything to memory; the pixel-major copy is indexed directly
+        # (one (all hours, tile x tile) chunk holds the whole season of a pixel).
+        # The handle is opened once per process and shared through the dataset registry
+        return self.registry.get(
+            file_path,
+            chunks = None if file_path == self.pixel_file else {'time': 50},
             cache = False,
             decode_timedelta = True,
             decode_coords = True,
         )
 
+
+
+    ## =============================================================== ##
+    ##      Lazily Load and Create Task Graph for Combined Dataset     ##
+    ## =============================================================== ##
+    def open_single_file(self, file_path, lon, lat, start_date, end_date, climate_var):
+        
+        ds = self.time_series_dataset(file_path)
+
         # Query the lazily-loaded NetCDF file in this specific order to make a task graph:
         # Minimize the amount of data we have to work with
         # (1) Select climate attribute ,
@@ -88,23 +128,26 @@ class Sensor_Pipe :
         end_date = datetime.datetime(int(end_year), int(end_month), int(end_day))
         
         # Retrieve relevant files and place inside of a list
-        all_files = [self.file_name]
+        all_files = [self.time_series_file()]
 
         # Compute the lazily-loaded dataset using the task graph generate in the method `self.open_single_file()`
         datasets = [delayed(self.open_single_file)(file, lon, lat, start_date, end_date, climate_var) for file in all_files]
-        combined_ds = compute(*datasets)  # Compute to filter, find, and load in the filtered data
+        with stage('sensor.read') as span :
+            combined_ds = compute(*datasets)  # Compute to filter, find, and load in the filtered data
 
-        # Concatenate the data by time dimension --> return as Xarray object
-        final_ds = xr.concat(combined_ds, dim='time')
+            # Concatenate the data by time dimension --> return as Xarray object
+            final_ds = xr.concat(combined_ds, dim='time')
+            span.add_bytes(final_ds.nbytes)
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
         # Extract the data values and time values as seperate lists, store in JSON-object
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
-        # Extract all time markers (values), convert to datetime objects, then to list containing strings
-        time_list = pd.to_datetime(final_ds.time.values).strftime('%Y-%m-%d %H:%M').tolist()
+        with stage('sensor.format') :
+            # Extract all time markers (values), convert to datetime objects, then to list containing strings
+            time_list = pd.to_datetime(final_ds.time.values).strftime('%Y-%m-%d %H:%M').tolist()
 
-        # Extract all data values, convert to a list containing data
-        data_values_list = final_ds.values.tolist()
+            # Extract all data values, convert to a list containing data
+            data_values_list = final_ds.values.tolist()
 
         # Store lists of (1) time values and (2) data values inside of a Python dictionary object
         json_df = {
@@ -117,7 +160,154 @@ class Sensor_Pipe :
         return json_df
 
 
-    
+
+    ## =================================================================================== ##
+    ##  Aggregated Time-Series for Pixel: Date Range + Reductions Before Materializing     ##
+    ## =================================================================================== ##
+    def generate_aggregated_time_series(
+        self, lon, lat, climate_var='td2m', start=None, end=None, aggregation='hourly', threshold=None, window=24,
+    ) -> dict :
+        # `start` / `end` are inclusive calendar days (defaults --> the whole dataset)
+        start_date, end_date = date_range(start, end)
+
+        # Lazy selection of the pixel (rolling windows also read the hours before `start`)
+        array = self.open_single_file(
+            self.time_series_file(), lon, lat, history_start(start_date, aggregation, window), end_date, climate_var
+        )
+        # The pixel-major copy is indexed directly --> read the pixel's hours once, reduce in memory;
+        # the map-oriented store stays a dask graph until the reduced columns are computed
+        if array.chunks is None :
+            with stage('sensor.read') as span :
+                array = array.load()
+                span.add_bytes(array.nbytes)
+
+        with stage('sensor.aggregate') :
+            columns = aggregate_series(array, aggregation, threshold, window, start_date)
+            computed = xr.Dataset(columns).compute()
+        with stage('sensor.format') :
+            times, data = columns_to_json({name : computed[name] for name in columns})
+
+        return {
+            'STATUS' : 'SUCCESS' ,
+            'AGGREGATION' : aggregation ,
+            'TIMES' : times ,
+            'DATA' : data ,
+        }
+
+
+
+    ## =================================================================================== ##
+    ##  Batch Time-Series: Many Points and Polygons from One Read of the Needed Chunks     ##
+    ## =================================================================================== ##
+    def read_cells(self, ds, climate_var, rows, columns, start_date, end_date) -> tuple :
+        # (row, column) cells --> (time index, values of shape (time, cells)); every storage chunk
+        # holding at least one requested cell is read exactly once, whatever the number of cells
+        climate_ds = ds[climate_var].sel(time = slice(start_date, end_date))
+        values = np.full((climate_ds.sizes['time'], len(rows)), np.nan, dtype=np.float32)
+        if len(rows) == 0 :
+            return climate_ds['time'].values, values
+
+        # Spatial chunk shape of the store (pixel-major tiles); contiguous stores are read as one bounding box
+        chunk_sizes = ds[climate_var].encoding.get('chunksizes')
+        row_min, row_max = int(rows.min()), int(rows.max()) + 1
+        column_min, column_max = int(columns.min()), int(columns.max()) + 1
+        blocks = [(row_min, row_max, column_min, column_max)]
+        if chunk_sizes is not None :
+            tile_rows, tile_columns = chunk_sizes[1], chunk_sizes[2]
+            tiles = np.unique(np.stack([rows // tile_rows, columns // tile_columns], axis=1), axis=0)
+            # Scattered cells --> one read per touched chunk; dense selections --> one bounding-box read
+            if len(tiles) * tile_rows * tile_columns < (row_max - row_min) * (column_max - column_min) / 2 :
+                blocks = [
+                    (r * tile_rows, (r + 1) * tile_rows, c * tile_columns, (c + 1) * tile_columns) for r, c in tiles
+                ]
+
+        for r0, r1, c0, c1 in blocks :
+            selected = np.flatnonzero((rows >= r0) & (rows < r1) & (columns >= c0) & (columns < c1))
+            block = climate_ds.isel(south_north = slice(r0, r1), west_east = slice(c0, c1)).values
+            values[:, selected] = block[:, rows[selected] - r0, columns[selected] - c0]
+
+        # Processing on temperature: Convert from Kelvin --> Fahrenheit
+        if climate_var == 'td2m' :
+            values = (values * (9/5)) - 459.67
+        return climate_ds['time'].values, values
+
+
+
+    def generate_batch_time_series(
+        self, points=(), polygons=(), climate_var='td2m', percentiles=(10, 50, 90), start=None, end=None,
+    ) -> dict :
+        # points --> [{'lon', 'lat', 'id'?}], polygons --> GeoJSON geometries or Features (optional `id`);
+        # `start` / `end` are inclusive calendar days (defaults --> the whole dataset)
+        start_date, end_date = date_range(start, end)
+        if len(points) == 0 and len(polygons) == 0 :
+            raise ValueError('Provide at least one point or polygon')
+        ds = self.time_series_dataset(self.time_series_file())
+        longitude = ds['west_east'].values
+        latitude = ds['south_north'].values
+
+        # (1) Resolve every point with one vectorized nearest-neighbour lookup per axis
+        point_lons = np.array([point['lon'] for point in points], dtype=np.float64)
+        point_lats = np.array([point['lat'] for point in points], dtype=np.float64)
+        point_columns, inside_columns = nearest_cells(longitude, point_lons)
+        point_rows, inside_rows = nearest_cells(latitude, point_lats)
+
+        # (2) Resolve every polygon to the cells it covers (none when it lies outside the grid)
+        polygon_ids = [polygon_id(polygon, index) for index, polygon in enumerate(polygons)]
+        polygon_cells_list = [polygon_cells(polygon, longitude, latitude) for polygon in polygons]
+
+        # (3) Union of all cells --> read once; each point/polygon keeps indices into the union
+        all_rows = np.concatenate([point_rows.astype(np.int64), *[rows for rows, _ in polygon_cells_list]])
+        all_columns = np.concatenate([point_columns.astype(np.int64), *[columns for _, columns in polygon_cells_list]])
+        cells, inverse = np.unique(np.stack([all_rows, all_columns], axis=1), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        with stage('sensor.read') as span :
+            times, values = self.read_cells(ds, climate_var, cells[:, 0], cells[:, 1], start_date, end_date)
+            span.add_bytes(values.nbytes)
+
+        # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+        # Columnar output: one list per field, aligned by point / polygon position
+        # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+        point_values = values[:, inverse[:len(points)]]
+        json_df = {
+            'STATUS' : 'SUCCESS' ,
+            'TIMES' : epoch_seconds(times) ,
+            'POINTS' : {
+                'id' : [index if point.get('id') is None else point['id'] for index, point in enumerate(points)] ,
+                'lon' : point_lons.tolist() ,
+                'lat' : point_lats.tolist() ,
+                # Grid cell each point snapped to (same nearest-cell rule as the single-point series)
+                'grid_lon' : longitude[point_columns].tolist() ,
+                'grid_lat' : latitude[point_rows].tolist() ,
+                'inside' : (inside_columns & inside_rows).tolist() ,
+                'DATA' : point_values.T.tolist() ,
+            } ,
+        }
+
+        # Per-polygon area statistics for every hour (NaN cells ignored; all-NaN hours stay NaN)
+        polygon_stats = {
+            'id' : polygon_ids , 'cells' : [], 'inside' : [], 'mean' : [], 'max' : [], **{f'p{q:g}' : [] for q in percentiles}
+        }
+        offset = len(points)
+        with stage('sensor.aggregate'), warnings.catch_warnings() :
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            for rows, _ in polygon_cells_list :
+                area = values[:, inverse[offset:offset + len(rows)]]
+                offset += len(rows)
+                if len(rows) == 0 :
+                    # Outside the grid --> all-NaN statistics, flagged by `inside`
+                    area = np.full((len(times), 1), np.nan, dtype=values.dtype)
+                polygon_stats['cells'].append(len(rows))
+                polygon_stats['inside'].append(len(rows) > 0)
+                polygon_stats['mean'].append(np.nanmean(area, axis=1).tolist())
+                polygon_stats['max'].append(np.nanmax(area, axis=1).tolist())
+                if len(percentiles) > 0 :
+                    for q, series in zip(percentiles, nan_percentiles(area, percentiles)) :
+                        polygon_stats[f'p{q:g}'].append(series.tolist())
+        json_df['POLYGONS'] = polygon_stats
+        return json_df
+
+
+
 
     ## =================================================================================== ##
     ##  Visualize Entire Gridded Array: Retrieve and Compute Specific Hourly Array    ##
@@ -127,11 +317,10 @@ class Sensor_Pipe :
         # User-specified (submitted) date -> (year, month, day)
         user_datetime = datetime.datetime(int(year), int(month), int(day), int(hour))    
 
-        # Lazily load the combined dataset and chunk data by 1-hour
-        ds = xr.open_dataset(
+        # Lazily load the combined dataset and chunk data by 1-hour (shared, long-lived handle)
+        ds = self.registry.get(
             self.file_name,
             chunks={'time': 1},
-            engine='h5netcdf',
             cache=False
         )
 
@@ -148,39 +337,118 @@ class Sensor_Pipe :
             climate_ds = (climate_ds * (9/5)) - 459.67
 
         # Compute the task graph for the delayed-object, return the computed array
-        return climate_ds.compute()
+        with stage('sensor.read') as span :
+            climate_ds = climate_ds.compute()
+            span.add_bytes(climate_ds.nbytes)
+        return climate_ds
+
+
 
+    ## =================================================================================== ##
+    ##  Stream a Range of Hourly Arrays: One Sequential Pass in Blocks of Hours            ##
+    ## =================================================================================== ##
+    def open_hour_range(self, start_date, end_date, climate_var='td2m') -> xr.DataArray :
+        # Unchunked shared handle --> every block below is one contiguous HDF5 read
+        ds = self.registry.get(self.file_name, cache=False)
+        return ds[climate_var].sel(time = slice(start_date, end_date))
+
+
+    def iterate_hour_blocks(self, climate_ds, block_hours=24) :
+        # (offset, (hours, lat, lon) float32 block) in time order --> the first block holds a single hour
+        # (fast first frame), the following ones `block_hours` hours (memory bounded by one block)
+        climate_var = climate_ds.name
+        offset, size = 0, 1
+        while offset < climate_ds.sizes['time'] :
+            with stage('sensor.read') as span :
+                block = np.asarray(climate_ds.isel(time = slice(offset, offset + size)).values, dtype=np.float32)
+                span.add_bytes(block.nbytes)
+            # Processing on temperature: Convert from Kelvin --> Fahrenheit (in place)
+            if climate_var == 'td2m' :
+                block *= np.float32(9/5)
+                block -= np.float32(459.67)
+            yield offset, block
+            offset += size
+            size = block_hours
+
+
+    def generate_range_frames(self, start_date, end_date, climate_var='td2m', payload_format='json',
+                              image_format='raw', encoding='full', block_hours=24) -> tuple :
+        # (stream header message, generator of frame messages) for every hour of [start_date, end_date]
+        cmap, vmin, vmax, label = LEGEND_STYLES[f'sensor_{climate_var}']
+        climate_ds = self.open_hour_range(start_date, end_date, climate_var)
+        encoder = Frame_Encoder(
+            climate_ds.sizes['south_north'], climate_ds.sizes['west_east'], cmap, vmin, vmax,
+            payload_format, image_format, encoding
+        )
+        times = [valid_time.astype('datetime64[s]').item() for valid_time in climate_ds['time'].values]
+        header = encoder.header(
+            times ,
+            bounds = [
+                climate_ds['west_east'].min().item(), climate_ds['south_north'].min().item(),
+                climate_ds['west_east'].max().item(), climate_ds['south_north'].max().item(),
+            ] ,
+            height = climate_ds.sizes['south_north'] ,
+            width = climate_ds.sizes['west_east'] ,
+            legend_url = legend_service.get(cmap, vmin, vmax, label).url ,
+        )
 
+        def frames() :
+            for offset, block in self.iterate_hour_blocks(climate_ds, block_hours) :
+                for index, array in enumerate(block, start=offset) :
+                    with stage('sensor.encode') as span :
+                        message = encoder.encode(index, array)
+                        span.add_bytes(len(message))
+                    yield message
+        return header, frames()
 
 
-    def produce_vis_json(
-        self, array, vmin, vmax, cmap='turbo', longitude='west_east', latitude='south_north',
+
+
+    def produce_vis_arrays(
+        self, array, vmin, vmax, cmap='turbo', longitude='west_east', latitude='south_north', label=None,
+        value_encoding='float',
     ) :
 
-        # Normalize values for the plot and legend
-        norm_values = Normalize(
-            vmin=vmin, vmax=vmax,
-        )
-        
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
         # Create the Climate Variable PNG (RGB) Image and Serialize to JSON-Structure
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
-        rgba_image = colormaps[cmap](norm_values(array))
-        alpha_channel = np.ones(array.shape)
-        alpha_channel[(np.isnan(array))] = 0
-        rgba_image[:, :, 3] = alpha_channel
-        rgba_image = (rgba_image * 255).astype(np.uint8)  # [0, 255] represents the colors
-        rgba_image = rgba_image[::-1, :]
+        # uint8 RGBA lookup table per (cmap, vmin, vmax) --> NaN pixels are transparent, rows flipped
+        with stage('sensor.render') :
+            rgba_image = get_colormap_lut(cmap, vmin, vmax).render(array.values)
 
 
-        return {
+        # Arrays stay as NumPy buffers --> encoded as JSON lists or binary by `Payload_Encoding`
+        vis_arrays = {
             'STATUS': 'SUCCESS' ,
-            'climate_var_image' : rgba_image.flatten().tolist() ,  # Flatten image to vector, convert to list
-            'climate_var_values' : np.around(array[::-1, :].values.flatten(), 2).tolist() ,  # Extract actual data, flatten to list
+            'climate_var_image' : rgba_image ,  # RGBA image (height, width, 4)
+            # Actual data (height, width) --> rounded floats or a quantized int16 grid (see `Value_Encoding`)
+            **value_fields(array[::-1, :].values, value_encoding) ,
             'bounds' : [
                 array[longitude].min().item(), array[latitude].min().item(), 
                 array[longitude].max().item(), array[latitude].max().item(),
             ],  # Calculate the bounding box for the data
             'height': array.sizes[latitude],  # Number of pixels (height) for the data
             'width': array.sizes[longitude],  # Numnber of pixels (width) for the data
-        }
\ No newline at end of file
+        }
+        # Reference to the cached colorbar legend (served by the `/legend` pathway)
+        if label is not None :
+            vis_arrays['legend_url'] = legend_service.get(cmap, vmin, vmax, label).url
+        return vis_arrays
+
+
+
+    def produce_vis_json(self, array, vmin, vmax, **kwargs) -> dict :
+        # JSON-compatible structure (flattened lists), kept for backward compatibility
+        return vis_arrays_to_json(self.produce_vis_arrays(array, vmin, vmax, **kwargs))
+
+
+
+    def produce_vis_payload(
+        self, array, vmin, vmax, payload_format='json', image_format='raw', label=None, value_encoding='float',
+    ) -> bytes :
+        # Render the hourly array and serialize it once (JSON or binary envelope)
+        vis_arrays = self.produce_vis_arrays(array, vmin, vmax, label=label, value_encoding=value_encoding)
+        with stage('sensor.serialize') as span :
+            payload = encode_payload(vis_arrays, payload_format, image_format)
+            span.add_bytes(len(payload))
+        return payload
@@ -0,0 +1,76 @@
+## --------------------------------------------------------------------------------------- ##
+##  Sensor Data Pipeline                                                                   ##
+## ~ Pixel-Major Copy of the Sensor Dataset: Small Spatial Tiles, Long Time Runs ~         ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# `combined.nc` is laid out for maps (one hour = one contiguous slab), so a single pixel's season
+# touches every slab of the file. The pixel-major copy stores each variable in HDF5 chunks of
+# (all hours, TILE x TILE pixels), compressed, so a point time series reads a single chunk.
+
+
+## --------------------------------------------------------------- ##
+##                      Pipeline Libraries                         ##
+## --------------------------------------------------------------- ##
+# Xarray --> Spatiotemporal Multidimensional Array Library
+import xarray as xr
+# Standard Libraries
+import os
+
+
+# Spatial tile edge (pixels) of every pixel-major chunk
+PIXEL_TILE = 8
+# gzip level --> climate fields compress well after byte shuffling
+PIXEL_COMPRESSION_LEVEL = 4
+
+
+def pixel_major_path(file_name) -> str :
+    # Default location of the pixel-major copy --> `combined.nc` --> `combined.pixel.nc`
+    root, extension = os.path.splitext(file_name)
+    return f'{root}.pixel{extension or ".nc"}'
+
+
+def pixel_major_is_current(file_name, pixel_file=None) -> bool :
+    # The copy is used only when it exists and is newer than the map-oriented dataset
+    pixel_file = pixel_file or pixel_major_path(file_name)
+    return (
+        os.path.exists(pixel_file) and os.path.exists(file_name) and
+        os.path.getmtime(pixel_file) >= os.path.getmtime(file_name)
+    )
+
+
+## --------------------------------------------------------------- ##
+##          Conversion: Map-Oriented --> Pixel-Major Layout        ##
+## --------------------------------------------------------------- ##
+def write_pixel_major(file_name, pixel_file=None, tile=PIXEL_TILE, level=PIXEL_COMPRESSION_LEVEL,
+                      time_dim='time', longitude='west_east', latitude='south_north') -> str :
+    pixel_file = pixel_file or pixel_major_path(file_name)
+
+    # Read one band of `tile` rows (all hours) at a time --> bounded memory, each band fills whole chunks
+    ds = xr.open_dataset(
+        file_name,
+        chunks = {time_dim: -1, latitude: tile, longitude: -1},
+        engine = 'h5netcdf',
+        cache = False,
+    )
+
+    encoding = {}
+    for name, variable in ds.data_vars.items() :
+        if variable.dims != (time_dim, latitude, longitude) :
+            continue
+        encoding[name] = {
+            'chunksizes' : (ds.sizes[time_dim], min(tile, ds.sizes[latitude]), min(tile, ds.sizes[longitude])) ,
+            'compression' : 'gzip' ,
+            'compression_opts' : level ,
+            'shuffle' : True ,
+        }
+
+    # Write next to the destination and swap in atomically (readers never see a partial file)
+    temp_file = f'{pixel_file}.tmp'
+    ds.to_netcdf(temp_file, engine='h5netcdf', encoding=encoding)
+    ds.close()
+    os.replace(temp_file, pixel_file)
+    return pixel_file
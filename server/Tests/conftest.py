@@ -0,0 +1,168 @@
+## --------------------------------------------------------------------------------------- ##
+##  Test Fixtures: Synthetic RTMA GRIB2 Hour Served by a Local S3 Stand-In                 ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# A synthetic RTMA hour (10u, 10v, 2t, 2sh, sp + `.idx`) on a shrunken 2.5 km Lambert conformal CONUS grid,
+# uploaded under NOAA's bucket layout to a moto server (or to any S3 endpoint given in `RTMA_TEST_S3_ENDPOINT`,
+# e.g. the SeaweedFS gateway of `start_seaweedfs.sh`). Kept independent of the benchmark fixtures.
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import datetime
+import logging
+import os
+import socket
+import fsspec
+import numpy as np
+import pytest
+
+
+# NCEP 2.5 km CONUS grid (RTMA / NDFD) --> Lambert conformal, standard parallel 25°N, orientation 265°E
+RTMA_GRID = {
+    'Nx' : 2345 ,
+    'Ny' : 1597 ,
+    'latitudeOfFirstGridPointInDegrees' : 19.228976 ,
+    'longitudeOfFirstGridPointInDegrees' : 233.723448 ,
+    'LaDInDegrees' : 25.0 ,
+    'LoVInDegrees' : 265.0 ,
+    'Latin1InDegrees' : 25.0 ,
+    'Latin2InDegrees' : 25.0 ,
+    'DxInMetres' : 2539.703 ,
+    'DyInMetres' : 2539.703 ,
+    'latitudeOfSouthernPoleInDegrees' : -90.0 ,
+    'longitudeOfSouthernPoleInDegrees' : 0.0 ,
+}
+# (short name, `.idx` variable, `.idx` level, discipline, category, number, fixed surface type, level)
+RTMA_MESSAGES = [
+    ('2t', 'TMP', '2 m above ground', 0, 0, 0, 103, 2),
+    ('10u', 'UGRD', '10 m above ground', 0, 2, 2, 103, 10),
+    ('10v', 'VGRD', '10 m above ground', 0, 2, 3, 103, 10),
+    ('2sh', 'SPFH', '2 m above ground', 0, 1, 0, 103, 2),
+    ('sp', 'PRES', 'surface', 0, 3, 0, 1, 0),
+]
+RTMA_BUCKET = 'noaa-rtma-pds'
+VALID_TIME = datetime.datetime(2024, 7, 15, 12)
+# 1/20 of the CONUS grid --> every message is ~19 kB, far below the default coalescing gap
+GRID_SCALE = 20
+
+
+def free_port() -> int :
+    with socket.socket() as probe :
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def rtma_object_key(valid_time) -> str :
+    return f'rtma2p5.{valid_time:%Y%m%d}/rtma2p5.t{valid_time:%H}z.2dvaranl_ndfd.grb2'
+
+
+
+## --------------------------------------------------------------- ##
+##                    Synthetic RTMA GRIB2 Hour                    ##
+## --------------------------------------------------------------- ##
+def rtma_fields(nx, ny, seed=0) -> dict :
+    # Smooth patterns + noise with realistic value ranges (16-bit packing keeps every message the same size)
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:ny, 0:nx].astype(np.float64)
+    x /= nx
+    y /= ny
+    noise = rng.normal(0, 0.5, (ny, nx))
+    return {
+        '2t' : 300 - 25 * y + 6 * np.sin(6 * x) + noise ,
+        '10u' : 6 * np.sin(4 * x + 3 * y) + noise ,
+        '10v' : 5 * np.cos(5 * y - 2 * x) + noise ,
+        '2sh' : np.clip(0.004 + 0.012 * (1 - y) * (0.5 + 0.5 * np.sin(3 * x)), 0.0005, None) ,
+        'sp' : 101000 - 12000 * np.abs(np.sin(3 * x)) * (1 - y) + 50 * noise ,
+    }
+
+
+def write_rtma_grib(path, valid_time, scale=GRID_SCALE) -> dict :
+    # One RTMA-shaped GRIB2 file + its `.idx` inventory --> {short name: message offset}
+    import eccodes
+    grid = dict(RTMA_GRID)
+    grid['Nx'], grid['Ny'] = RTMA_GRID['Nx'] // scale, RTMA_GRID['Ny'] // scale
+    grid['DxInMetres'] = RTMA_GRID['DxInMetres'] * RTMA_GRID['Nx'] / grid['Nx']
+    grid['DyInMetres'] = RTMA_GRID['DyInMetres'] * RTMA_GRID['Ny'] / grid['Ny']
+    fields = rtma_fields(grid['Nx'], grid['Ny'])
+
+    offsets = {}
+    inventory = []
+    with open(path, 'wb') as grib_file :
+        for number, (short_name, variable, level_name, discipline, category, parameter, surface, level) in enumerate(RTMA_MESSAGES, start=1) :
+            handle = eccodes.codes_grib_new_from_samples('GRIB2')
+            eccodes.codes_set(handle, 'gridDefinitionTemplateNumber', 30)
+            for key, value in grid.items() :
+                eccodes.codes_set(handle, key, value)
+            for key, value in (
+                ('discipline', discipline), ('parameterCategory', category), ('parameterNumber', parameter),
+                ('typeOfFirstFixedSurface', surface), ('scaledValueOfFirstFixedSurface', level),
+                ('scaleFactorOfFirstFixedSurface', 0), ('dataDate', int(f'{valid_time:%Y%m%d}')),
+                ('dataTime', valid_time.hour * 100), ('packingType', 'grid_simple'), ('bitsPerValue', 16),
+            ) :
+                eccodes.codes_set(handle, key, value)
+            eccodes.codes_set_values(handle, fields[short_name].ravel())
+            offsets[short_name] = grib_file.tell()
+            inventory.append(f'{number}:{offsets[short_name]}:d={valid_time:%Y%m%d%H}:{variable}:{level_name}:anl:')
+            eccodes.codes_write(handle, grib_file)
+            eccodes.codes_release(handle)
+
+    with open(f'{path}.idx', 'w') as index_file :
+        index_file.write('\n'.join(inventory) + '\n')
+    return offsets
+
+
+
+## --------------------------------------------------------------- ##
+##                          Fixtures                               ##
+## --------------------------------------------------------------- ##
+@pytest.fixture(scope='module')
+def rtma_object(tmp_path_factory) :
+    # {'s3_fs', 'bucket', 'path' (bucket/key), 'local_path', 'offsets' ({short name: message offset}), 'size'}
+    import boto3
+    local_path = str(tmp_path_factory.mktemp('rtma') / 'rtma.grb2')
+    offsets = write_rtma_grib(local_path, VALID_TIME)
+
+    server = None
+    endpoint_url = os.environ.get('RTMA_TEST_S3_ENDPOINT')
+    if endpoint_url is None :
+        from moto.server import ThreadedMotoServer
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        port = free_port()
+        server = ThreadedMotoServer(ip_address='127.0.0.1', port=port, verbose=False)
+        server.start()
+        endpoint_url = f'http://127.0.0.1:{port}'
+    credentials = {
+        'aws_access_key_id' : os.environ.get('AWS_ACCESS_KEY_ID', 'testing') ,
+        'aws_secret_access_key' : os.environ.get('AWS_SECRET_ACCESS_KEY', 'testing') ,
+    }
+    try:
+        client = boto3.client('s3', endpoint_url=endpoint_url, region_name='us-east-1', **credentials)
+        try:
+            client.create_bucket(Bucket=RTMA_BUCKET)
+        except client.exceptions.BucketAlreadyOwnedByYou :
+            pass
+        client.upload_file(local_path, RTMA_BUCKET, rtma_object_key(VALID_TIME))
+        client.upload_file(f'{local_path}.idx', RTMA_BUCKET, f'{rtma_object_key(VALID_TIME)}.idx')
+
+        s3_fs = fsspec.filesystem(
+            's3', anon=False, key=credentials['aws_access_key_id'], secret=credentials['aws_secret_access_key'],
+            client_kwargs={'endpoint_url' : endpoint_url, 'region_name' : 'us-east-1'},
+            skip_instance_cache=True,
+        )
+        yield {
+            's3_fs' : s3_fs ,
+            'bucket' : RTMA_BUCKET ,
+            'path' : f'{RTMA_BUCKET}/{rtma_object_key(VALID_TIME)}' ,
+            'local_path' : local_path ,
+            'offsets' : offsets ,
+            'size' : os.path.getsize(local_path) ,
+        }
+    finally:
+        if server is not None :
+            server.stop()
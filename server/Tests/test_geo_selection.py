@@ -0,0 +1,96 @@
+## --------------------------------------------------------------------------------------- ##
+##  Geo Selection: GeoJSON Polygon Cells and NaN-Aware Percentiles                         ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Run from the `server/` directory:
+### python -m pytest -q Tests
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import numpy as np
+import pytest
+from Pipelines.Common.Geo_Selection import polygon_cells, polygon_id, nan_percentiles
+from Pipelines.Sensors.Request_Data import Sensor_Batch_Query
+
+
+# 0.1° grid over the Imperial Valley --> latitude descending like the sensor store
+LONGITUDE = np.round(np.arange(-116.0, -114.95, 0.1), 6)
+LATITUDE = np.round(np.arange(33.5, 32.45, -0.1), 6)
+
+
+def square(lon, lat, size) -> dict :
+    return {'type' : 'Polygon', 'coordinates' : [[
+        [lon, lat], [lon + size, lat], [lon + size, lat + size], [lon, lat + size], [lon, lat],
+    ]]}
+
+
+
+## --------------------------------------------------------------- ##
+##                         Polygon Cells                           ##
+## --------------------------------------------------------------- ##
+def test_polygon_covers_cell_centers_inside() :
+    rows, columns = polygon_cells(square(-115.85, 32.95, 0.2), LONGITUDE, LATITUDE)
+    assert sorted(zip(LATITUDE[rows].tolist(), LONGITUDE[columns].tolist())) == [
+        (33.0, -115.8), (33.0, -115.7), (33.1, -115.8), (33.1, -115.7),
+    ]
+
+
+def test_small_polygon_inside_the_grid_snaps_to_nearest_cell() :
+    rows, columns = polygon_cells(square(-115.52, 33.02, 0.02), LONGITUDE, LATITUDE)
+    assert (LONGITUDE[columns].tolist(), LATITUDE[rows].tolist()) == ([-115.5], [33.0])
+
+
+def test_polygon_outside_the_grid_covers_no_cells() :
+    # A square in Texas must not resolve to the grid's nearest corner
+    rows, columns = polygon_cells(square(-100.0, 31.0, 0.5), LONGITUDE, LATITUDE)
+    assert len(rows) == 0 and len(columns) == 0
+
+
+@pytest.mark.parametrize('geometry', [
+    [1],
+    {'type' : 'Feature', 'geometry' : [1]},
+    {'type' : 'Point', 'coordinates' : [-115.5, 33.0]},
+    {'type' : 'Polygon', 'coordinates' : [[[-115.5, 33.0], [-115.4, 33.0]]]},
+])
+def test_malformed_geometries_are_value_errors(geometry) :
+    with pytest.raises(ValueError) :
+        polygon_cells(geometry, LONGITUDE, LATITUDE)
+
+
+def test_polygon_id() :
+    feature = {'type' : 'Feature', 'geometry' : square(-115.5, 33.0, 0.1)}
+    assert polygon_id(feature, 3) == 3
+    assert polygon_id({**feature, 'properties' : {'id' : 'field-7'}}, 3) == 'field-7'
+    assert polygon_id({**feature, 'id' : 'farm', 'properties' : {'id' : 'field-7'}}, 3) == 'farm'
+    with pytest.raises(ValueError) :
+        polygon_id({**feature, 'properties' : [1]}, 3)
+
+
+
+## --------------------------------------------------------------- ##
+##                       NaN Percentiles                           ##
+## --------------------------------------------------------------- ##
+def test_nan_percentiles_match_numpy() :
+    values = np.random.default_rng(0).normal(size=(6, 9))
+    values[1, :4] = np.nan
+    values[2, :] = np.nan
+    percentiles = [0, 10, 50, 90, 100]
+    with np.errstate(invalid='ignore'), pytest.warns(RuntimeWarning) :
+        expected = np.nanpercentile(values, percentiles, axis=1)
+    np.testing.assert_allclose(nan_percentiles(values, percentiles), expected)
+
+
+def test_nan_percentiles_without_cells() :
+    result = nan_percentiles(np.empty((4, 0)), [10, 90])
+    assert result.shape == (2, 4) and np.isnan(result).all()
+
+
+def test_batch_percentiles_are_unique_columns() :
+    query = Sensor_Batch_Query(climate_var='td2m', percentiles=[50, 50.0, 90, 10, 90])
+    assert [f'p{q:g}' for q in query.percentiles] == ['p50', 'p90', 'p10']
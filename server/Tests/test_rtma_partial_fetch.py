@@ -0,0 +1,107 @@
+## --------------------------------------------------------------------------------------- ##
+##  RTMA Partial GRIB2 Retrieval: Byte-Range Fetches against a Local S3 Stand-In           ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Byte-range fetches against the synthetic RTMA hour of `conftest.py` (moto, or `RTMA_TEST_S3_ENDPOINT`).
+#
+# Run from the `server/` directory:
+### python -m pytest -q Tests
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import numpy as np
+import pytest
+from Pipelines.NOAA.RTMA.RTMA_Grib_Reader import RTMA_Grib_Reader, RTMA_FILTER_KEYS
+from Pipelines.NOAA.RTMA.RTMA_Partial_Fetch import RTMA_Partial_Fetcher
+
+
+class Recording_S3 :
+    # Forwards to the real filesystem and keeps the (path, start, end) of every `cat_ranges` request
+    def __init__(self, s3_fs) :
+        self.s3_fs = s3_fs
+        self.requests = []
+
+
+    def cat_file(self, path, *args, **kwargs) :
+        return self.s3_fs.cat_file(path, *args, **kwargs)
+
+
+    def cat_ranges(self, paths, starts, ends, *args, **kwargs) :
+        self.requests.extend(zip(paths, starts, ends))
+        return self.s3_fs.cat_ranges(paths, starts, ends, *args, **kwargs)
+
+
+
+## --------------------------------------------------------------- ##
+##                 Coalesced Byte-Range Requests                   ##
+## --------------------------------------------------------------- ##
+def test_adjacent_messages_are_one_request(rtma_object) :
+    # 2t, 10u, 10v are the first three messages --> one range from 2t to the start of 2sh
+    recording = Recording_S3(rtma_object['s3_fs'])
+    fetcher = RTMA_Partial_Fetcher(recording)
+    messages = fetcher.fetch_messages(rtma_object['path'], RTMA_FILTER_KEYS)
+
+    offsets = rtma_object['offsets']
+    assert recording.requests == [(rtma_object['path'], offsets['2t'], offsets['2sh'])]
+    assert fetcher.bytes_fetched == offsets['2sh'] - offsets['2t']
+    assert len(messages) == 3 and all(message[:4] == b'GRIB' and message[-4:] == b'7777' for message in messages)
+
+
+def test_distant_messages_are_separate_requests(rtma_object) :
+    # 2t and sp with no gap allowance --> two requests, the last one open-ended (runs to the end of the file)
+    recording = Recording_S3(rtma_object['s3_fs'])
+    fetcher = RTMA_Partial_Fetcher(recording, max_gap=0)
+    filter_keys = [{'shortName' : '2t'}, {'shortName' : 'sp'}]
+    messages = fetcher.fetch_messages(rtma_object['path'], filter_keys)
+
+    offsets = rtma_object['offsets']
+    assert recording.requests == [
+        (rtma_object['path'], offsets['2t'], offsets['10u']),
+        (rtma_object['path'], offsets['sp'], None),
+    ]
+    assert fetcher.bytes_fetched == (offsets['10u'] - offsets['2t']) + (rtma_object['size'] - offsets['sp'])
+    assert [len(message) for message in messages] == [offsets['10u'] - offsets['2t'], rtma_object['size'] - offsets['sp']]
+
+    # A gap allowance wider than the skipped messages --> merged into one request
+    recording.requests.clear()
+    fetcher = RTMA_Partial_Fetcher(recording, max_gap=offsets['sp'] - offsets['10u'])
+    fetcher.fetch_messages(rtma_object['path'], filter_keys)
+    assert recording.requests == [(rtma_object['path'], offsets['2t'], None)]
+
+
+
+## --------------------------------------------------------------- ##
+##               Decoded Fields Match a Full Download              ##
+## --------------------------------------------------------------- ##
+@pytest.mark.parametrize('filter_keys', [
+    RTMA_FILTER_KEYS,
+    [*RTMA_FILTER_KEYS, {'shortName' : '2sh'}, {'shortName' : 'sp'}],
+])
+def test_partial_fields_match_full_download(rtma_object, tmp_path, filter_keys) :
+    reader = RTMA_Grib_Reader(filter_keys=filter_keys)
+    messages = RTMA_Partial_Fetcher(rtma_object['s3_fs']).fetch_messages(rtma_object['path'], filter_keys)
+    downloaded = tmp_path / 'full.grb2'
+    rtma_object['s3_fs'].get_file(rtma_object['path'], str(downloaded))
+
+    partial_fields = reader.read_messages(messages)
+    full_fields = reader.read_file(str(downloaded))
+    assert [field.short_name for field in partial_fields] == [key['shortName'] for key in filter_keys]
+    for partial, full in zip(partial_fields, full_fields) :
+        assert partial.short_name == full.short_name
+        assert partial.attrs == full.attrs
+        np.testing.assert_array_equal(partial.values, full.values)
+
+
+def test_missing_or_incomplete_index_falls_back(rtma_object) :
+    fetcher = RTMA_Partial_Fetcher(rtma_object['s3_fs'])
+    # Variable absent from the `.idx` inventory --> None (the pipe downloads the whole file)
+    assert fetcher.fetch_messages(rtma_object['path'], [{'shortName' : '2t'}, {'shortName' : 'vis'}]) is None
+    # No `.idx` sidecar at all
+    assert fetcher.fetch_messages(f"{rtma_object['bucket']}/rtma2p5.20240715/missing.grb2", RTMA_FILTER_KEYS) is None
+    assert fetcher.bytes_fetched == 0
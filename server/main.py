@@ -29,26 +29,55 @@
 # FastAPI and Uvicorn imports
 import uvicorn
 import fastapi
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Query, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import RedirectResponse, ORJSONResponse
+from fastapi.responses import RedirectResponse, ORJSONResponse, Response, StreamingResponse
 # Fast data encoding JSON library
 import orjson
+import datetime
+import threading
+import hashlib
+import os
+from typing import Literal
 
 
 # ---------------------------------------------- #
 #  Data Pipeline Validation (Pydantic) Imports   #
 # ---------------------------------------------- #
-from Pipelines.NOAA.RTMA.Request_Data import RTMA_Data_Submission, RTMA_Parse_Data
-from Pipelines.Sensors.Request_Data import Sensor_Data_Submission, Sensor_Data_Time_Series, Sensor_Parse_Data
+from Pipelines.NOAA.RTMA.Request_Data import RTMA_Data_Submission, RTMA_Parse_Data, RTMA_Hour_Query, RTMA_Point_Query
+from Pipelines.Sensors.Request_Data import (
+    Sensor_Data_Submission, Sensor_Data_Time_Series, Sensor_Parse_Data, Sensor_Hour_Query, Sensor_Point_Query,
+    Sensor_Batch_Query
+)
 
 
 # ---------------------------------------------- #
 #            Data Pipeline Imports               #
 # ---------------------------------------------- #
 from Pipelines.NOAA.RTMA.RTMA_Pipe import RTMA_Data_Pipe
+from Pipelines.NOAA.RTMA.RTMA_Region import resolve_region, REGIONS
+from Pipelines.NOAA.RTMA.RTMA_Cache import (
+    rtma_product_cache, rtma_cache_key, rtma_cache_ttl, rtma_is_settled, REVISABLE_TTL
+)
+from Pipelines.NOAA.RTMA.RTMA_Ingest import RTMA_Ingest_Scheduler
+from Pipelines.NOAA.RTMA.RTMA_Catalog import RTMA_Catalog_Error, CATALOG_RECENT_TTL, rtma_catalog_stats
+from Pipelines.NOAA.RTMA.RTMA_Wind import WIND_ENCODINGS
+from Pipelines.Common.Value_Encoding import VALUE_ENCODINGS
 from Pipelines.Sensors.Sensor_Pipe import Sensor_Pipe
+from Pipelines.Common.Payload_Encoding import negotiate_format, media_type, encode_png, encode_payload
+from Pipelines.Common.Legend_Service import legend_service, LEGEND_STYLES
+from Pipelines.Common.Colormap_LUT import get_colormap_lut
+from Pipelines.Common.Tile_Pyramid import Tile_Pyramid, Tile_Pyramid_Store
+from Pipelines.Common.Dataset_Registry import dataset_registry
+from Pipelines.Common.Pipeline_Executor import Execution_Lane, Executor_Overloaded
+from Pipelines.Common.Single_Flight import Single_Flight
+from Pipelines.Common.HTTP_Caching import IMMUTABLE, make_etag, cache_control, not_modified, cached_response
+from Pipelines.Common.Frame_Stream import FRAME_ENCODINGS, STREAM_MEDIA_TYPES, HEADER_INDEX, frame_message, epoch_seconds
+from Pipelines.Common.Pipeline_Tracing import Tracing_Middleware, pipeline_metrics, stage, mark, METRICS_MEDIA_TYPE
+from Pipelines.Alarms.Alarm_Engine import load_alarm_config
+from Pipelines.Alarms.Alarm_Sources import RTMA_Alarm_Source, Sensor_Alarm_Source, ALARM_RTMA_FILTER_KEYS
+from Pipelines.Alarms.Alarm_Monitor import Alarm_Monitor
 
 
 # ---------------------------------------------- #
@@ -78,34 +107,185 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Per-request stage timings --> Prometheus histograms on `/metrics` and a JSON log line for every request
+# slower than `SLOW_REQUEST_SECONDS` (disable with `TRACING_ENABLED=0`)
+app.add_middleware(Tracing_Middleware)
+
 
 # ---------------------------------------------- #
-#           App Pathways (GET, POST)             #
+#        Background RTMA Ingest (Optional)       #
 # ---------------------------------------------- #
+# Pre-renders newly published RTMA hours into the product cache before users ask for them
+# (enable with `RTMA_INGEST_ENABLED=1`, or run `rtma_ingest.py` as a sidecar process instead);
+# created on startup only when enabled --> no worker pool otherwise
+rtma_ingest = None
 
-# Sensor Data Single Array Visualization --> Post User Request (POST Operation)
-@app.post('/send_sensor_vis_request')
-async def send_sensor_vis_request( data: Sensor_Data_Submission ) :
-    # Pydantic interpretation of user request for Sensor data
-    df = Sensor_Parse_Data( json_object = data )
-    df = jsonable_encoder(df.read())
+@app.on_event('startup')
+async def start_rtma_ingest() :
+    global rtma_ingest
+    if os.environ.get('RTMA_INGEST_ENABLED', '0') == '1' :
+        # The scheduler also advances the live RTMA alarms --> one retrieval decodes the alarm fields too,
+        # caching them next to the served 2t / 10u / 10v arrays and payload
+        rtma_ingest = RTMA_Ingest_Scheduler(
+            pipe_factory = lambda : RTMA_Data_Pipe(filter_keys=ALARM_RTMA_FILTER_KEYS) ,
+            trailing_hours = int(os.environ.get('RTMA_INGEST_HOURS', 24)) ,
+            workers = int(os.environ.get('RTMA_INGEST_WORKERS', 2)) ,
+            poll_interval = float(os.environ.get('RTMA_INGEST_POLL_SECONDS', 120)) ,
+            on_ingest = advance_rtma_alarms ,
+        )
+        rtma_ingest.start()
 
-    # Retrieve and format user's variable selections
-    year = str(df['year'])
-    month = str(df['month'])
-    day = str(df['day'])
-    hour = str(df['hour'])
-    climate_var = str(df['climateVar'])
+@app.on_event('shutdown')
+async def stop_rtma_ingest() :
+    if rtma_ingest is not None :
+        rtma_ingest.stop()
 
-    # Redirect the formatted user's request to the GET URL for Sensor Data
-    return RedirectResponse(
-        f'get_sensor_vis_request/?year={year}&month={month}&day={day}&hour={hour}&climate_var={climate_var}', status_code=303
+
+# ---------------------------------------------- #
+#     Execution Lanes (Bounded Worker Pools)     #
+# ---------------------------------------------- #
+# Blocking pipeline work runs off the event loop in per-endpoint lanes with bounded queues;
+# configure with `<LANE>_EXECUTOR`, `<LANE>_WORKERS`, `<LANE>_QUEUE_DEPTH`, `<LANE>_TIMEOUT_SECONDS`
+rtma_lane = Execution_Lane.from_env('rtma', workers=2, queue_depth=8, timeout=120)
+sensor_lane = Execution_Lane.from_env('sensor', workers=4, queue_depth=32, timeout=30)
+
+# Heat alarms keep live per-source state in this process --> always a thread lane
+alarm_lane = Execution_Lane('alarm', 'thread',
+    workers = int(os.environ.get('ALARM_WORKERS', 2)) ,
+    queue_depth = int(os.environ.get('ALARM_QUEUE_DEPTH', 8)) ,
+    timeout = float(os.environ.get('ALARM_TIMEOUT_SECONDS', 600)) ,
+)
+
+# Frame streams keep a live generator per response in this process --> always a thread lane
+# (every frame is one lane job, so long streams never hold a worker between frames)
+stream_lane = Execution_Lane('stream', 'thread',
+    workers = int(os.environ.get('STREAM_WORKERS', 4)) ,
+    queue_depth = int(os.environ.get('STREAM_QUEUE_DEPTH', 16)) ,
+    timeout = float(os.environ.get('STREAM_TIMEOUT_SECONDS', 120)) ,
+)
+# Longest hour range served by the `/v1/.../frames` streams
+STREAM_MAX_HOURS = int(os.environ.get('STREAM_MAX_HOURS', 744))
+
+def lane_metrics() -> list :
+    # Scrape-time gauges / counters of every lane and of the RTMA product cache (`/metrics`)
+    lanes = {'rtma' : rtma_lane, 'sensor' : sensor_lane, 'alarm' : alarm_lane, 'stream' : stream_lane}
+    stats = {name : lane.stats() for name, lane in lanes.items()}
+    cache = rtma_product_cache.stats()
+    catalogs = list(rtma_catalog_stats().values())
+    return [
+        ('heat_server_lane_in_flight', 'gauge', 'Admitted lane jobs (running + queued).',
+            [({'lane' : name}, lane['in_flight']) for name, lane in stats.items()]) ,
+        ('heat_server_lane_jobs_total', 'counter', 'Lane jobs by outcome.',
+            [({'lane' : name, 'outcome' : outcome}, lane[outcome]) for name, lane in stats.items()
+             for outcome in ('completed', 'failed', 'rejected', 'timeouts')]) ,
+        ('heat_server_rtma_cache_lookups_total', 'counter', 'RTMA product cache lookups by result.',
+            [({'result' : result}, cache[result]) for result in ('memory_hits', 'disk_hits', 'misses')]) ,
+        ('heat_server_rtma_cache_bytes', 'gauge', 'RTMA product cache size by tier.',
+            [({'tier' : 'memory'}, cache['memory_bytes']), ({'tier' : 'disk'}, cache['disk_bytes'])]) ,
+        ('heat_server_rtma_catalog_operations_total', 'counter', 'RTMA catalog lookups, day listings, stale hits, and listing errors.',
+            [({'operation' : operation}, sum(catalog[operation] for catalog in catalogs))
+             for operation in ('lookups', 'listings', 'stale_hits', 'listing_errors')]) ,
+    ]
+
+pipeline_metrics.register_collector(lane_metrics)
+
+@app.on_event('shutdown')
+async def stop_execution_lanes() :
+    rtma_lane.shutdown()
+    sensor_lane.shutdown()
+    alarm_lane.shutdown()
+    stream_lane.shutdown()
+
+# Reprojected tile pyramids of the most recently requested hours
+tile_pyramids = Tile_Pyramid_Store(int(os.environ.get('TILE_PYRAMID_ENTRIES', 48)))
+
+# Identical in-flight requests (normalized parameters) are coalesced into one lane job
+rtma_flights = Single_Flight('rtma')
+sensor_flights = Single_Flight('sensor')
+alarm_flights = Single_Flight('alarm')
+
+def hour_key(year, month, day, hour) -> tuple :
+    # Normalized hour (e.g. `07` and `7` coalesce); malformed values and impossible dates
+    # (e.g. February 31st) are rejected up front
+    try:
+        key = tuple(int(part) for part in (year, month, day, hour))
+    except ValueError :
+        raise HTTPException(status_code=400, detail='year, month, day, and hour must be integers')
+    try:
+        datetime.datetime(*key)
+    except ValueError as e :
+        raise HTTPException(status_code=400, detail=f'Invalid date {key[0]:04d}-{key[1]:02d}-{key[2]:02d} {key[3]:02d}Z: {e}')
+    return key
+
+
+def padded_hour(key) -> tuple :
+    # Normalized hour --> the zero-padded strings every coalesced job receives, so a follower asking
+    # for `07` shares the result of a leader asking for `7` (S3 prefixes are `YYYYMMDD/tHHz`)
+    year, month, day, hour = key
+    return f'{year:04d}', f'{month:02d}', f'{day:02d}', f'{hour:02d}'
+
+
+# ---------------------------------------------- #
+#   Heat Alarms (Zones, Duration Rules, State)   #
+# ---------------------------------------------- #
+def alarm_grids() -> list :
+    # Grids the alarms run on --> preset RTMA regions and the sensor grid (when the dataset is present)
+    grids = [region.axes() for region in REGIONS.values()]
+    if os.path.exists('combined.nc') :
+        ds = dataset_registry.get('combined.nc', cache=False)
+        grids.append((ds['west_east'].values, ds['south_north'].values))
+    return grids
+
+# Zones and rules from the JSON file in `ALARM_CONFIG` (NWS heat index categories by default)
+ALARM_CONFIG = os.environ.get('ALARM_CONFIG')
+alarm_zones, alarm_rules = load_alarm_config(ALARM_CONFIG, alarm_grids() if ALARM_CONFIG else ())
+# Longest replay served by `/v1/alarms/{source}/replay` --> RTMA hours outside the archive and product cache are
+# one S3 retrieval each, so RTMA replays span far fewer days than the local sensor dataset
+ALARM_REPLAY_MAX_DAYS = {
+    'sensor' : int(os.environ.get('ALARM_REPLAY_MAX_DAYS', 200)) ,
+    'rtma' : int(os.environ.get('ALARM_RTMA_REPLAY_MAX_DAYS', 7)) ,
+}
+# (source, region key) --> live alarm monitor
+alarm_monitors = {}
+alarm_monitors_lock = threading.Lock()
+
+def alarm_monitor(source, roi=None) -> Alarm_Monitor :
+    key = (source, None if roi is None else roi.key())
+    with alarm_monitors_lock :
+        monitor = alarm_monitors.get(key)
+        if monitor is None :
+            alarm_source = Sensor_Alarm_Source() if source == 'sensor' else RTMA_Alarm_Source(roi)
+            monitor = alarm_monitors[key] = Alarm_Monitor(alarm_source, alarm_rules, alarm_zones)
+        return monitor
+
+# Every hour pre-rendered by the ingest scheduler also advances the live RTMA alarms of its region
+def advance_rtma_alarms(valid_time, region) :
+    alarm_monitor('rtma', region).evaluate(valid_time)
+
+
+# Full lanes --> 429, timed-out jobs --> 503, both with a Retry-After estimate
+@app.exception_handler(Executor_Overloaded)
+async def executor_overloaded( request: Request, exc: Executor_Overloaded ) :
+    return ORJSONResponse(
+        {'detail': str(exc)}, status_code=exc.status_code, headers={'Retry-After': str(exc.retry_after)}
     )
 
 
-# Sensor Data Single Array Visualization --> Retrieve Data Request (GET Operation) 
-@app.get('/get_sensor_vis_request')
-async def get_sensor_vis_request( year:str, month:str, day:str, hour:str, climate_var ) :
+# RTMA bucket listings that failed (network, credentials) --> 503 instead of "no data"
+@app.exception_handler(RTMA_Catalog_Error)
+async def rtma_catalog_error( request: Request, exc: RTMA_Catalog_Error ) :
+    return ORJSONResponse(
+        {'detail': str(exc)}, status_code=503, headers={'Retry-After': str(max(1, int(CATALOG_RECENT_TTL)))}
+    )
+
+
+# ---------------------------------------------- #
+#   Pipeline Jobs (Run Inside Execution Lanes)   #
+# ---------------------------------------------- #
+# Blocking pipeline work --> module-level functions so thread and process lanes can both run them
+
+# Sensor Data --> Render and Encode One Hourly Array
+def render_sensor_payload(year, month, day, hour, climate_var, payload_format, image_format, value_encoding) -> bytes :
     # Establish unique connection to the sensor pipe
     conn_sensor = Sensor_Pipe()
 
@@ -118,22 +298,605 @@ async def get_sensor_vis_request( year:str, month:str, day:str, hour:str, climat
         climate_var = climate_var
     )
 
-    # Generate JSON-structure containing visualization, hourly array, & metadata, 
+    # Generate the encoded structure containing visualization, hourly array, & metadata, 
     if climate_var == 'rh2m' :
-        vis_json = conn_sensor.produce_vis_json(
+        return conn_sensor.produce_vis_payload(
             array = ds ,
             vmin = 10 ,
             vmax = 90 ,
+            label = 'Relative Humidity (%)' ,
+            payload_format = payload_format ,
+            image_format = image_format ,
+            value_encoding = value_encoding ,
+        )
+    return conn_sensor.produce_vis_payload(
+        array = ds ,
+        vmin = 20 ,
+        vmax = 80 ,
+        label = 'Dew Point Temperature (°F)' ,
+        payload_format = payload_format ,
+        image_format = image_format ,
+        value_encoding = value_encoding ,
+    )
+
+
+# Sensor Data --> Time Series for One Pixel
+def sensor_time_series(lon, lat, climate_var) -> dict :
+    # Establish unique connection to the sensor pipe
+    conn_sensor = Sensor_Pipe()
+    return conn_sensor.generate_time_series(
+        lon = lon,
+        lat = lat,
+        climate_var = climate_var,
+    )
+
+
+# Sensor Data --> Date Range of One Pixel, Reduced Server-Side (hourly, daily, threshold, rolling)
+def sensor_aggregated_time_series(lon, lat, climate_var, start, end, aggregation, threshold, window) -> dict :
+    conn_sensor = Sensor_Pipe()
+    return conn_sensor.generate_aggregated_time_series(
+        lon = lon ,
+        lat = lat ,
+        climate_var = climate_var ,
+        start = start ,
+        end = end ,
+        aggregation = aggregation ,
+        threshold = threshold ,
+        window = window ,
+    )
+
+
+# Sensor Data --> Time Series for Many Points and Polygons (one read of the needed chunks)
+def sensor_batch_time_series(points, polygons, climate_var, percentiles, start, end) -> dict :
+    conn_sensor = Sensor_Pipe()
+    return conn_sensor.generate_batch_time_series(
+        points = points ,
+        polygons = polygons ,
+        climate_var = climate_var ,
+        percentiles = percentiles ,
+        start = start ,
+        end = end ,
+    )
+
+
+# RTMA point time series: longest range, and most archive gaps retrieved from S3 per request
+RTMA_SERIES_MAX_DAYS = int(os.environ.get('RTMA_SERIES_MAX_DAYS', 31))
+RTMA_SERIES_MAX_GAP_HOURS = int(os.environ.get('RTMA_SERIES_MAX_GAP_HOURS', 24))
+
+
+# RTMA Data --> Cached or Freshly Rendered Hourly Payload
+def render_rtma_payload(year, month, day, hour, roi, payload_format, image_format, wind_encoding, value_encoding='float') -> bytes :
+    # Establish unique connection to RTMA Pipeline
+    conn_rtma = RTMA_Data_Pipe()
+
+    # Serve the rendered payload straight from the product cache when this hour was already requested
+    payload_kind = f'payload:{payload_format}:{image_format}'
+    if wind_encoding != 'uv' :
+        payload_kind += f':{wind_encoding}'
+    if value_encoding != 'float' :
+        payload_kind += f':values-{value_encoding}'
+    payload_key = rtma_cache_key(year, month, day, hour, roi, conn_rtma.grib_reader.filter_keys, payload_kind)
+    with stage('rtma.payload_cache') :
+        payload = rtma_product_cache.get(payload_key)
+    if payload is not None :
+        mark(cache='hit')
+        return payload
+    mark(cache='miss')
+
+    # Retrieve queried RTMA Dataset (cropped arrays are cached separately from the payload)
+    ds = conn_rtma.retrieve_hourly_cached(
+        year = year,
+        month = month,
+        day = day ,
+        hour = hour ,
+        region = roi
+    )
+
+    # Generate the encoded structure containing visualization, data arrays, and metadata
+    payload = conn_rtma.produce_vis_payload(ds, payload_format, image_format, wind_encoding, value_encoding)
+
+    # Cache the serialized payload
+    rtma_product_cache.put(payload_key, payload, ttl=rtma_cache_ttl(conn_rtma.product, year, month, day, hour))
+    return payload
+
+
+# RTMA Data --> Pixel Time Series (archived hours from the Zarr archive, gaps retrieved hourly)
+def rtma_point_time_series(lon, lat, start_date, end_date, roi) -> dict :
+    return RTMA_Data_Pipe().generate_point_time_series(lon, lat, start_date, end_date, roi, RTMA_SERIES_MAX_GAP_HOURS)
+
+
+# RTMA Data --> Published Hours per Best Product over a Date Range (bucket catalog)
+def rtma_availability(start_date, end_date) -> dict :
+    return {'STATUS' : 'SUCCESS', **RTMA_Data_Pipe().catalog.availability(start_date, end_date)}
+
+
+# Heat Alarms --> Advance the Live State to One Hour, or Replay a Date Range on a Fresh Engine
+def evaluate_alarms(source, valid_time, roi) -> dict :
+    return alarm_monitor(source, roi).evaluate(valid_time)
+
+
+def replay_alarms(source, start_date, end_date, roi) -> dict :
+    return alarm_monitor(source, roi).replay(start_date, end_date)
+
+
+# Frame Streams --> Header Message and Frame Generator for an Hour Range
+def open_sensor_frames(start_date, end_date, climate_var, payload_format, image_format, encoding) -> tuple :
+    return Sensor_Pipe().generate_range_frames(start_date, end_date, climate_var, payload_format, image_format, encoding)
+
+
+def open_rtma_frames(start_date, end_date, payload_format) -> tuple :
+    # Header and the hours of the stream --> every hour is rendered by `rtma_frames` (missing hours are skipped)
+    times = []
+    valid_time = start_date
+    while valid_time <= end_date :
+        times.append(valid_time)
+        valid_time += datetime.timedelta(hours=1)
+    header = frame_message(HEADER_INDEX, encode_payload({
+        'STATUS' : 'SUCCESS' ,
+        'TIMES' : [epoch_seconds(valid_time) for valid_time in times] ,
+        'encoding' : 'full' ,
+    }, payload_format), payload_format)
+    return header, times
+
+
+# Tile Pyramids --> Reproject One Hour to Web Mercator and Build Every Zoom Level
+def build_sensor_pyramid(climate_var, valid_time) -> Tile_Pyramid :
+    conn_sensor = Sensor_Pipe()
+    array = conn_sensor.generate_hour_vis(
+        year = valid_time.year ,
+        month = valid_time.month ,
+        day = valid_time.day ,
+        hour = valid_time.hour ,
+        climate_var = climate_var
+    )
+    return Tile_Pyramid(array.values, array['west_east'].values, array['south_north'].values)
+
+
+def build_rtma_pyramid(valid_time, roi) -> Tile_Pyramid :
+    conn_rtma = RTMA_Data_Pipe()
+    ds = conn_rtma.retrieve_hourly_cached(
+        year = f'{valid_time:%Y}' ,
+        month = f'{valid_time:%m}' ,
+        day = f'{valid_time:%d}' ,
+        hour = f'{valid_time:%H}' ,
+        region = roi
+    )
+    # Temperature: Convert from Kelvin --> Fahrenheit (same values as the hourly payload)
+    array = (ds[2] - 273.15) * (9/5) + 32
+    pyramid = Tile_Pyramid(array.values, array['longitude'].values, array['latitude'].values)
+    # Product behind the tiles --> part of the ETag of hours that may still be revised
+    pyramid.version = conn_rtma.product
+    return pyramid
+
+
+# ---------------------------------------------- #
+#  Shared GET Handlers (ETags, Cache-Control)    #
+# ---------------------------------------------- #
+# Used by both the original GET pathways and the versioned `/v1` API
+
+# Sensor data are historical --> cached for a day, revalidated against the dataset file version
+SENSOR_MAX_AGE = int(os.environ.get('SENSOR_CACHE_MAX_AGE', 86400))
+
+def sensor_data_version() -> tuple :
+    # (mtime, size, inode) of the map-oriented dataset --> changes whenever `combined.nc` is replaced
+    return dataset_registry.version(Sensor_Pipe().file_name)
+
+
+def check_value_encoding(value_encoding) :
+    # `climate_var_values` layout --> 'float' (default), 'int16', or 'int16_delta'
+    if value_encoding not in VALUE_ENCODINGS :
+        raise HTTPException(status_code=400, detail=f'Unknown value encoding `{value_encoding}`, expected one of {VALUE_ENCODINGS}')
+
+
+# Metric `variable` labels --> validated variables only; the legacy GET routes accept any `climate_var`,
+# so anything else is counted as `other` (one series instead of one per distinct value)
+METRIC_VARIABLES = ('td2m', 'rh2m', '2t')
+
+
+def mark_variable(variable) :
+    mark(variable=variable if variable in METRIC_VARIABLES else 'other')
+
+
+async def serve_sensor_vis(request, year, month, day, hour, climate_var, payload_format, image_format, value_encoding='float') -> Response :
+    # Negotiate the response encoding --> JSON (default) or binary (`Accept: application/octet-stream`)
+    try:
+        payload_format, image_format = negotiate_format(request.headers.get('accept'), payload_format, image_format)
+    except ValueError as e :
+        raise HTTPException(status_code=400, detail=str(e))
+    check_value_encoding(value_encoding)
+
+    mark_variable(climate_var)
+    # Revalidation needs no computation --> the ETag only depends on the request and the dataset version
+    normalized = hour_key(year, month, day, hour)
+    year, month, day, hour = padded_hour(normalized)
+    flight_key = ('vis', *normalized, climate_var, payload_format, image_format, value_encoding)
+    etag = make_etag(*flight_key, sensor_data_version())
+    headers = {'ETag': etag, 'Cache-Control': cache_control(SENSOR_MAX_AGE), 'Vary': 'Accept'}
+    response = not_modified(request, etag, headers)
+    if response is not None :
+        return response
+
+    # Read, render, and encode the hour inside the sensor lane (off the event loop);
+    # identical concurrent requests share one computation
+    payload = await sensor_flights.run(
+        flight_key, sensor_lane.run, render_sensor_payload, year, month, day, hour, climate_var, payload_format, image_format,
+        value_encoding
+    )
+
+    # Serve the requested encoded data to the client
+    return Response(content=payload, media_type=media_type(payload_format), headers=headers)
+
+
+async def serve_time_series(request, lon, lat, climate_var, aggregation=None, **spec) -> Response :
+    # `aggregation=None` --> original hourly `DATES` / `DATA` layout; otherwise epoch `TIMES` and reduced columns
+    mark_variable(climate_var)
+    flight_key = ('series', round(lon, 6), round(lat, 6), climate_var, aggregation, *sorted(spec.items()))
+    etag = make_etag(*flight_key, sensor_data_version())
+    headers = {'ETag': etag, 'Cache-Control': cache_control(SENSOR_MAX_AGE)}
+    response = not_modified(request, etag, headers)
+    if response is not None :
+        return response
+
+    # Extract the pixel's time series inside the sensor lane (off the event loop);
+    # identical concurrent requests share one computation
+    try:
+        if aggregation is None :
+            time_series_json = await sensor_flights.run(flight_key, sensor_lane.run, sensor_time_series, lon, lat, climate_var)
+        else :
+            time_series_json = await sensor_flights.run(
+                flight_key, sensor_lane.run, sensor_aggregated_time_series, lon, lat, climate_var,
+                spec['start'], spec['end'], aggregation, spec['threshold'], spec['window']
+            )
+    except ValueError as e :
+        raise HTTPException(status_code=400, detail=str(e))
+    with stage('sensor.serialize') as span :
+        content = orjson.dumps(time_series_json)
+        span.add_bytes(len(content))
+    return Response(content=content, media_type='application/json', headers=headers)
+
+
+async def serve_batch_time_series(query) -> Response :
+    # POST body --> not HTTP-cacheable, but identical concurrent batches (e.g. dashboard refreshes) still coalesce
+    batch = query.model_dump()
+    mark_variable(batch['climate_var'])
+    flight_key = ('batch', hashlib.sha1(orjson.dumps(batch, option=orjson.OPT_SORT_KEYS)).hexdigest())
+    try:
+        batch_json = await sensor_flights.run(
+            flight_key, sensor_lane.run, sensor_batch_time_series,
+            batch['points'], batch['polygons'], batch['climate_var'], batch['percentiles'], batch['start'], batch['end']
+        )
+    except ValueError as e :
+        raise HTTPException(status_code=400, detail=str(e))
+    with stage('sensor.serialize') as span :
+        content = orjson.dumps(batch_json)
+        span.add_bytes(len(content))
+    return Response(content=content, media_type='application/json')
+
+
+def rtma_flight_key(normalized, roi, payload_format, image_format, wind_encoding, value_encoding='float') -> tuple :
+    # Shared by `/v1/rtma` and the RTMA frame streams --> a stream joins in-flight renders of the same hour
+    return (*normalized, roi.key(), payload_format, image_format, wind_encoding, value_encoding)
+
+
+async def serve_rtma(request, year, month, day, hour, region, bbox, payload_format, image_format, wind_encoding,
+                     value_encoding='float') -> Response :
+    # Negotiate the response encoding --> JSON (default) or binary (`Accept: application/octet-stream`)
+    try:
+        payload_format, image_format = negotiate_format(request.headers.get('accept'), payload_format, image_format)
+    except ValueError as e :
+        raise HTTPException(status_code=400, detail=str(e))
+    # Wind texture layout --> 'uv' (default), 'speed_direction', or 'particle'
+    if wind_encoding not in WIND_ENCODINGS :
+        raise HTTPException(status_code=400, detail=f'Unknown wind encoding `{wind_encoding}`, expected one of {WIND_ENCODINGS}')
+    check_value_encoding(value_encoding)
+
+    # Resolve the requested region of interest (preset name or `lon_min,lat_min,lon_max,lat_max`)
+    try:
+        roi = resolve_region(region=region, bbox=bbox)
+    except ValueError as e :
+        raise HTTPException(status_code=400, detail=str(e))
+
+    mark(variable='2t')
+    normalized = hour_key(year, month, day, hour)
+    year, month, day, hour = padded_hour(normalized)
+    flight_key = rtma_flight_key(normalized, roi, payload_format, image_format, wind_encoding, value_encoding)
+    # Settled hours (outside the revision window) never change --> immutable, revalidated without computing
+    settled = rtma_is_settled(year, month, day, hour)
+    if settled :
+        etag = make_etag(*flight_key, 'settled')
+        response = not_modified(request, etag, {'ETag': etag, 'Cache-Control': IMMUTABLE, 'Vary': 'Accept'})
+        if response is not None :
+            return response
+
+    # Cache lookup, retrieval, and rendering run inside the RTMA lane (off the event loop);
+    # identical concurrent requests share one download and render
+    try:
+        payload = await rtma_flights.run(
+            flight_key, rtma_lane.run, render_rtma_payload, year, month, day, hour, roi, payload_format, image_format, wind_encoding,
+            value_encoding
         )
+    except FileNotFoundError as e :
+        raise HTTPException(status_code=404, detail=str(e))
+
+    # Recent hours may still be superseded by a better product --> the ETag follows the payload itself
+    if not settled :
+        etag = make_etag(*flight_key, hashlib.sha1(payload).hexdigest())
+    return cached_response(
+        request, payload, media_type(payload_format), etag,
+        IMMUTABLE if settled else cache_control(REVISABLE_TTL), vary='Accept'
+    )
+
+
+async def lane_frames(frames) :
+    # Sensor frames --> one stream-lane job per frame: the next block is read only once the previous
+    # frame was handed to the client, so memory stays bounded by one block of hours
+    try:
+        while True :
+            message = await stream_lane.run(next, frames, None)
+            if message is None :
+                break
+            yield message
+    finally:
+        try:
+            frames.close()
+        except ValueError :
+            # Still running inside a timed-out lane job --> finishes on its own
+            pass
+
+
+async def rtma_frames(times, roi, payload_format, image_format, wind_encoding) :
+    # RTMA frames --> every hour goes through the RTMA lane and in-flight coalescing like `/v1/rtma`,
+    # so streams never add retrievals beyond the lane's bound (missing hours are skipped)
+    for index, valid_time in enumerate(times) :
+        normalized = (valid_time.year, valid_time.month, valid_time.day, valid_time.hour)
+        try:
+            payload = await rtma_flights.run(
+                rtma_flight_key(normalized, roi, payload_format, image_format, wind_encoding),
+                rtma_lane.run, render_rtma_payload, *padded_hour(normalized), roi, payload_format, image_format, wind_encoding
+            )
+        except FileNotFoundError :
+            continue
+        yield frame_message(index, payload, payload_format)
+
+
+async def serve_frames(request, source, start, end, payload_format, image_format, encoding, **spec) -> StreamingResponse :
+    # Negotiate the message encoding --> NDJSON (default) or length-prefixed binary envelopes
+    try:
+        payload_format, image_format = negotiate_format(request.headers.get('accept'), payload_format, image_format)
+    except ValueError as e :
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        start_date = datetime.datetime.strptime(start, '%Y-%m-%dT%H')
+        end_date = datetime.datetime.strptime(end, '%Y-%m-%dT%H')
+    except ValueError :
+        raise HTTPException(status_code=400, detail='start and end must be formatted as YYYY-MM-DDTHH')
+    if start_date > end_date or (end_date - start_date) // datetime.timedelta(hours=1) + 1 > STREAM_MAX_HOURS :
+        raise HTTPException(status_code=400, detail=f'start must not be after end, and streams span at most {STREAM_MAX_HOURS} hours')
+    if encoding not in FRAME_ENCODINGS :
+        raise HTTPException(status_code=400, detail=f'Unknown frame encoding `{encoding}`, expected one of {FRAME_ENCODINGS}')
+
+    mark_variable(spec.get('climate_var', '2t'))
+    if source == 'sensor' :
+        job, args = open_sensor_frames, (start_date, end_date, spec['climate_var'], payload_format, image_format, encoding)
     else :
-        vis_json = conn_sensor.produce_vis_json(
-            array = ds ,
-            vmin = 20 ,
-            vmax = 80 ,
+        # RTMA frames are the cached hourly payloads (wind fields included) --> full frames only
+        if encoding != 'full' :
+            raise HTTPException(status_code=400, detail='RTMA frame streams only support the `full` encoding')
+        if spec['wind_encoding'] not in WIND_ENCODINGS :
+            raise HTTPException(status_code=400, detail=f'Unknown wind encoding `{spec["wind_encoding"]}`, expected one of {WIND_ENCODINGS}')
+        try:
+            roi = resolve_region(region=spec['region'], bbox=spec['bbox'])
+        except ValueError as e :
+            raise HTTPException(status_code=400, detail=str(e))
+        job, args = open_rtma_frames, (start_date, end_date, payload_format)
+
+    # The header is built before the response starts --> a full lane still answers 429 / 503
+    header, frames = await stream_lane.run(job, *args)
+    if source == 'sensor' :
+        frames = lane_frames(frames)
+    else :
+        frames = rtma_frames(frames, roi, payload_format, image_format, spec['wind_encoding'])
+
+    async def messages() :
+        try:
+            yield header
+            async for message in frames :
+                yield message
+        except Executor_Overloaded :
+            # The status line is already sent --> end the stream early (clients see the missing hours)
+            return
+        finally:
+            await frames.aclose()
+
+    # `X-Accel-Buffering: no` --> reverse proxies forward every frame as soon as it is written
+    return StreamingResponse(
+        messages(), media_type=STREAM_MEDIA_TYPES[payload_format],
+        headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no', 'Vary': 'Accept'}
+    )
+
+
+def alarm_region(source, region, bbox) :
+    # RTMA alarms are evaluated per region of interest; sensor alarms cover the sensor grid
+    if source not in ('sensor', 'rtma') :
+        raise HTTPException(status_code=404, detail=f'Unknown alarm source `{source}`, expected `sensor` or `rtma`')
+    if source == 'sensor' :
+        return None
+    try:
+        return resolve_region(region=region, bbox=bbox)
+    except ValueError as e :
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def serve_alarms(source, time, region, bbox) -> Response :
+    roi = alarm_region(source, region, bbox)
+    try:
+        valid_time = datetime.datetime.strptime(time, '%Y-%m-%dT%H')
+    except ValueError :
+        raise HTTPException(status_code=400, detail='time must be formatted as YYYY-MM-DDTHH')
+    flight_key = ('alarms', source, valid_time, None if roi is None else roi.key())
+    try:
+        alarms_json = await alarm_flights.run(flight_key, alarm_lane.run, evaluate_alarms, source, valid_time, roi)
+    except FileNotFoundError as e :
+        raise HTTPException(status_code=404, detail=str(e))
+    return Response(content=orjson.dumps(alarms_json), media_type='application/json')
+
+
+async def serve_alarm_replay(source, start, end, region, bbox) -> Response :
+    roi = alarm_region(source, region, bbox)
+    max_days = ALARM_REPLAY_MAX_DAYS[source]
+    if start > end or (end - start).days + 1 > max_days :
+        raise HTTPException(status_code=400, detail=f'start must not be after end, and {source} replays span at most {max_days} days')
+    start_date = datetime.datetime.combine(start, datetime.time.min)
+    end_date = datetime.datetime.combine(end, datetime.time(23))
+    flight_key = ('alarm_replay', source, start_date, end_date, None if roi is None else roi.key())
+    replay_json = await alarm_flights.run(flight_key, alarm_lane.run, replay_alarms, source, start_date, end_date, roi)
+    return Response(content=orjson.dumps(replay_json), media_type='application/json')
+
+
+async def serve_rtma_time_series(request, lon, lat, start, end, region, bbox) -> Response :
+    try:
+        roi = resolve_region(region=region, bbox=bbox)
+    except ValueError as e :
+        raise HTTPException(status_code=400, detail=str(e))
+    if start > end or (end - start).days + 1 > RTMA_SERIES_MAX_DAYS :
+        raise HTTPException(status_code=400, detail=f'start must not be after end, and series span at most {RTMA_SERIES_MAX_DAYS} days')
+    start_date = datetime.datetime.combine(start, datetime.time.min)
+    end_date = datetime.datetime.combine(end, datetime.time(23))
+
+    # Archive reads and gap retrievals run inside the RTMA lane; identical concurrent requests share one read
+    mark(variable='point')
+    flight_key = ('rtma_series', round(lon, 6), round(lat, 6), start_date, end_date, roi.key())
+    try:
+        series_json = await rtma_flights.run(
+            flight_key, rtma_lane.run, rtma_point_time_series, lon, lat, start_date, end_date, roi
+        )
+    except ValueError as e :
+        raise HTTPException(status_code=400, detail=str(e))
+    with stage('rtma.serialize') as span :
+        content = orjson.dumps(series_json)
+        span.add_bytes(len(content))
+
+    # Complete series of settled hours never change; anything with gaps or revisable hours is re-checked
+    settled = rtma_is_settled(end_date.year, end_date.month, end_date.day, end_date.hour)
+    complete = settled and series_json['MISSING'] == 0
+    etag = make_etag(*flight_key, hashlib.sha1(content).hexdigest())
+    return cached_response(
+        request, content, 'application/json', etag, IMMUTABLE if complete else cache_control(REVISABLE_TTL)
+    )
+
+
+async def serve_rtma_availability(request, start, end) -> Response :
+    if start > end or (end - start).days + 1 > RTMA_SERIES_MAX_DAYS :
+        raise HTTPException(status_code=400, detail=f'start must not be after end, and ranges span at most {RTMA_SERIES_MAX_DAYS} days')
+    start_date = datetime.datetime.combine(start, datetime.time.min)
+    end_date = datetime.datetime.combine(end, datetime.time(23))
+    flight_key = ('rtma_availability', start_date, end_date)
+    availability_json = await rtma_flights.run(flight_key, rtma_lane.run, rtma_availability, start_date, end_date)
+    content = orjson.dumps(availability_json)
+
+    # Settled days never change; recent days are re-listed every `CATALOG_RECENT_TTL` seconds
+    settled = rtma_is_settled(end_date.year, end_date.month, end_date.day, end_date.hour)
+    etag = make_etag(*flight_key, hashlib.sha1(content).hexdigest())
+    return cached_response(
+        request, content, 'application/json', etag, IMMUTABLE if settled else cache_control(CATALOG_RECENT_TTL)
+    )
+
+
+async def serve_tile(request, source, var, time, z, x, y, ext, region, bbox) -> Response :
+    # Tile styles are the legend styles --> `sensor_td2m`, `sensor_rh2m`, `rtma_2t`
+    style = LEGEND_STYLES.get(f'{source}_{var}')
+    if style is None or ext not in ('png', 'bin') :
+        raise HTTPException(status_code=404, detail=f'Unknown tile layer `{source}/{var}` or extension `{ext}`')
+    try:
+        valid_time = datetime.datetime.strptime(time, '%Y-%m-%dT%H')
+    except ValueError :
+        raise HTTPException(status_code=400, detail='time must be formatted as YYYY-MM-DDTHH')
+
+    mark(variable=var)
+    # The hour's pyramid is reprojected and built once, then every tile is a slice of it
+    if source == 'sensor' :
+        version = sensor_data_version()
+        pyramid_key = ('pyramid', source, var, valid_time, version)
+        flights, lane, job, args = sensor_flights, sensor_lane, build_sensor_pyramid, (var, valid_time)
+        settled = False
+    else :
+        try:
+            roi = resolve_region(region=region, bbox=bbox)
+        except ValueError as e :
+            raise HTTPException(status_code=400, detail=str(e))
+        settled = rtma_is_settled(valid_time.year, valid_time.month, valid_time.day, valid_time.hour)
+        version = 'settled' if settled else None
+        pyramid_key = ('pyramid', source, var, valid_time, roi.key())
+        flights, lane, job, args = rtma_flights, rtma_lane, build_rtma_pyramid, (valid_time, roi)
+
+    # Historical hours (sensor data, settled RTMA hours) revalidate without building anything
+    tile_key = ('tile', source, var, time, z, x, y, ext, region, bbox)
+    if version is not None :
+        etag = make_etag(*tile_key, version)
+        headers = {'ETag': etag, 'Cache-Control': IMMUTABLE if settled else cache_control(SENSOR_MAX_AGE)}
+        response = not_modified(request, etag, headers)
+        if response is not None :
+            return response
+
+    pyramid = tile_pyramids.get(pyramid_key)
+    mark(cache='miss' if pyramid is None else 'hit')
+    if pyramid is None :
+        try:
+            pyramid = await flights.run(pyramid_key, lane.run, job, *args)
+        except FileNotFoundError as e :
+            raise HTTPException(status_code=404, detail=str(e))
+        # Sensor pyramids are keyed by the dataset version; RTMA pyramids of a fallback product expire
+        # like its cached arrays, so a better analysis ingested later reaches the tiles (and their ETags)
+        ttl = None if source == 'sensor' else rtma_cache_ttl(
+            pyramid.version, valid_time.year, valid_time.month, valid_time.day, valid_time.hour
         )
+        tile_pyramids.put(pyramid_key, pyramid, ttl)
+    if version is None :
+        etag = make_etag(*tile_key, pyramid.version)
+        headers = {'ETag': etag, 'Cache-Control': cache_control(REVISABLE_TTL)}
 
-    # Serve the requested ORJSON-encoded data to the client
-    return ORJSONResponse(vis_json)
+    # Raw float32 values or a colormapped RGBA PNG (north-up rows, NaN --> transparent)
+    with stage('tile.encode') as span :
+        tile = pyramid.tile(z, x, y)
+        if ext == 'bin' :
+            content, tile_media_type = tile.astype('<f4').tobytes(), 'application/octet-stream'
+        else :
+            cmap, vmin, vmax, _ = style
+            content, tile_media_type = encode_png(get_colormap_lut(cmap, vmin, vmax).render(tile, flip=False)), 'image/png'
+        span.add_bytes(len(content))
+    return cached_response(request, content, tile_media_type, etag, headers['Cache-Control'])
+
+
+# ---------------------------------------------- #
+#           App Pathways (GET, POST)             #
+# ---------------------------------------------- #
+
+# Sensor Data Single Array Visualization --> Post User Request (POST Operation)
+@app.post('/send_sensor_vis_request')
+async def send_sensor_vis_request( data: Sensor_Data_Submission ) :
+    # Pydantic interpretation of user request for Sensor data
+    df = Sensor_Parse_Data( json_object = data )
+    df = jsonable_encoder(df.read())
+
+    # Retrieve and format user's variable selections
+    year = str(df['year'])
+    month = str(df['month'])
+    day = str(df['day'])
+    hour = str(df['hour'])
+    climate_var = str(df['climateVar'])
+
+    # Redirect the formatted user's request to the GET URL for Sensor Data
+    return RedirectResponse(
+        f'get_sensor_vis_request/?year={year}&month={month}&day={day}&hour={hour}&climate_var={climate_var}', status_code=303
+    )
+
+
+# Sensor Data Single Array Visualization --> Retrieve Data Request (GET Operation) 
+@app.get('/get_sensor_vis_request')
+async def get_sensor_vis_request( request: Request, year:str, month:str, day:str, hour:str, climate_var,
+                                  payload_format:str = Query(None, alias='format'), image_format:str = None,
+                                  value_encoding:str = Query('float', alias='values') ) :
+    return await serve_sensor_vis(request, year, month, day, hour, climate_var, payload_format, image_format, value_encoding)
 
 
 @app.post('/send_location')
@@ -151,16 +914,8 @@ async def send_location( data: Sensor_Data_Time_Series ) :
     )
 
 @app.get('/retrieve_time_series')
-async def retrieve_time_series(lon: float, lat: float, climateVar: str) :
-    # Establish unique connection to the sensor pipe
-    conn_sensor = Sensor_Pipe()
-    print('Data Retrieved')
-    time_series_json = conn_sensor.generate_time_series(
-        lon = lon,
-        lat = lat,
-        climate_var = climateVar,
-    )
-    return ORJSONResponse(time_series_json)
+async def retrieve_time_series( request: Request, lon: float, lat: float, climateVar: str ) :
+    return await serve_time_series(request, lon, lat, climateVar)
 
 
 
@@ -178,36 +933,168 @@ async def send_RTMA_request( data: RTMA_Data_Submission ) :
     day = str(df['day'])
     hour = str(df['hour'])
 
+    # Optional region of interest (defaults to Southern California on the GET pathway)
+    region_query = ''
+    if df.get('region') is not None :
+        region_query += f"&region={df['region']}"
+    if df.get('bbox') is not None :
+        region_query += f"&bbox={df['bbox']}"
+
     # Redirect the formatted user's request to the GET URL for RTMA Data
     return RedirectResponse(
-        f'get_RTMA_request/?year={year}&month={month}&day={day}&hour={hour}', status_code=303
+        f'get_RTMA_request/?year={year}&month={month}&day={day}&hour={hour}{region_query}', status_code=303
     )
 
 
 
 # RTMA Pipeline --> Retrieve Data Request (GET User Request)
 @app.get('/get_RTMA_request', response_class=ORJSONResponse)
-async def get_RTMA_request( year:str, month:str, day:str, hour:str ) :
-    # Establish unique connection to RTMA Pipeline
-    conn_rtma = RTMA_Data_Pipe()
+async def get_RTMA_request( request: Request, year:str, month:str, day:str, hour:str, region:str = None, bbox:str = None,
+                            payload_format:str = Query(None, alias='format'), image_format:str = None,
+                            wind_encoding:str = Query('uv', alias='wind'), value_encoding:str = Query('float', alias='values') ) :
+    return await serve_rtma(
+        request, year, month, day, hour, region, bbox, payload_format, image_format, wind_encoding, value_encoding
+    )
 
-    # Retrieve queried RTMA Dataset
-    ds = conn_rtma.retrieve_hourly_dask(
-        year = year,
-        month = month,
-        day = day ,
-        hour = hour
+
+# ---------------------------------------------- #
+#     Versioned, Cacheable GET API (Single Trip) #
+# ---------------------------------------------- #
+# One GET per visualization (no POST --> 303 redirect); strong ETags, Cache-Control, and 304 responses
+
+# Sensor Data --> Hourly Array Visualization
+@app.get('/v1/sensor/vis')
+async def v1_sensor_vis( request: Request, query: Sensor_Hour_Query = Depends() ) :
+    return await serve_sensor_vis(
+        request, query.year, query.month, query.day, query.hour, query.climate_var, query.format, query.image_format,
+        query.values
+    )
+
+
+# Sensor Data --> Pixel Time Series
+@app.get('/v1/sensor/time_series')
+async def v1_sensor_time_series( request: Request, query: Sensor_Point_Query = Depends() ) :
+    return await serve_time_series(
+        request, query.lon, query.lat, query.climate_var, query.aggregation,
+        start=query.start, end=query.end, threshold=query.threshold, window=query.window
+    )
+
+
+# Sensor Data --> Batch Time Series (points and GeoJSON polygons, columnar response)
+@app.post('/v1/sensor/time_series/batch')
+async def v1_sensor_time_series_batch( query: Sensor_Batch_Query ) :
+    return await serve_batch_time_series(query)
+
+
+# RTMA Data --> Hourly Visualization
+@app.get('/v1/rtma')
+async def v1_rtma( request: Request, query: RTMA_Hour_Query = Depends() ) :
+    # Zero-padded like the original pathway --> the S3 prefixes are `rtma2p5.YYYYMMDD/rtma2p5.tHHz`
+    return await serve_rtma(
+        request, f'{query.year:04d}', f'{query.month:02d}', f'{query.day:02d}', f'{query.hour:02d}', query.region, query.bbox,
+        query.format, query.image_format, query.wind, query.values
     )
 
-    # Generate JSON-structure containing visualization, data arrays, and metadata
-    vis_json = conn_rtma.produce_vis_json(
-        u = ds[0],
-        v = ds[1],
-        climate_var = ds[2]
+
+# RTMA Data --> Pixel Time Series over Inclusive Days (2t in °F, 10u / 10v in m/s)
+@app.get('/v1/rtma/time_series')
+async def v1_rtma_time_series( request: Request, query: RTMA_Point_Query = Depends() ) :
+    return await serve_rtma_time_series(request, query.lon, query.lat, query.start, query.end, query.region, query.bbox)
+
+
+# RTMA Data --> Published Hours and Best Product per Hour over Inclusive Days
+@app.get('/v1/rtma/availability')
+async def v1_rtma_availability( request: Request, start: datetime.date, end: datetime.date ) :
+    return await serve_rtma_availability(request, start, end)
+
+
+# Sensor Data --> Stream of Hourly Frames over a Time Range (NDJSON or length-prefixed binary messages)
+@app.get('/v1/sensor/frames')
+async def v1_sensor_frames( request: Request, start: str, end: str, climate_var: Literal['td2m', 'rh2m'],
+                            payload_format:str = Query(None, alias='format'), image_format:str = None, encoding:str = 'full' ) :
+    return await serve_frames(request, 'sensor', start, end, payload_format, image_format, encoding, climate_var=climate_var)
+
+
+# RTMA Data --> Stream of Hourly Visualizations over a Time Range
+@app.get('/v1/rtma/frames')
+async def v1_rtma_frames( request: Request, start: str, end: str, region: str = None, bbox: str = None,
+                          payload_format:str = Query(None, alias='format'), image_format:str = None,
+                          wind_encoding:str = Query('uv', alias='wind') ) :
+    return await serve_frames(
+        request, 'rtma', start, end, payload_format, image_format, 'full', region=region, bbox=bbox, wind_encoding=wind_encoding
     )
 
-    # Serve the requested ORJSON-encoded data to the client
-    return ORJSONResponse(vis_json)
+
+# Heat Alarms --> Configured Zones and Duration Rules
+@app.get('/v1/alarms/rules')
+async def v1_alarm_rules() :
+    return ORJSONResponse({
+        'RULES' : [rule.describe() for rule in alarm_rules] ,
+        'ZONES' : [{'id' : zone.zone_id, 'name' : zone.name, 'geometry' : zone.geometry} for zone in alarm_zones.values()] ,
+    })
+
+
+# Heat Alarms --> Alarm State of One Hour (per-rule cell counts and GeoJSON alarm polygons)
+@app.get('/v1/alarms/{source}')
+async def v1_alarms( source: str, time: str, region: str = None, bbox: str = None ) :
+    return await serve_alarms(source, time, region, bbox)
+
+
+# Heat Alarms --> Hourly Alarmed-Cell Counts over a Date Range (inclusive days)
+@app.get('/v1/alarms/{source}/replay')
+async def v1_alarm_replay( source: str, start: datetime.date, end: datetime.date, region: str = None, bbox: str = None ) :
+    return await serve_alarm_replay(source, start, end, region, bbox)
+
+
+# Map Tiles --> XYZ Web Mercator Tiles of an Hourly Grid (`.png` colormapped, `.bin` raw float32)
+@app.get('/tiles/{source}/{var}/{time}/{z}/{x}/{y}.{ext}')
+async def get_tile( request: Request, source: str, var: str, time: str, z: int, x: int, y: int, ext: str,
+                    region: str = None, bbox: str = None ) :
+    return await serve_tile(request, source, var, time, z, x, y, ext, region, bbox)
+
+
+# Colorbar Legend --> Cached PNG per Legend Style (GET Operation)
+@app.get('/legend/{legend_id}')
+async def get_legend( request: Request, legend_id: str ) :
+    legend = legend_service.get_by_id(legend_id)
+    if legend is None :
+        raise HTTPException(status_code=404, detail=f'Unknown legend `{legend_id}`')
+
+    # A legend's PNG never changes for a given style --> cached by clients indefinitely
+    return cached_response(request, legend.png, 'image/png', legend.etag, IMMUTABLE)
+
+
+# RTMA Product Cache and Sensor Dataset Registry --> Hit, Miss, Eviction, and Reload Counters (GET Operation)
+@app.get('/cache_stats')
+async def cache_stats() :
+    return ORJSONResponse({
+        'rtma': rtma_product_cache.stats(), 'rtma_catalog': rtma_catalog_stats(), 'datasets': dataset_registry.stats()
+    })
+
+
+# Execution Lanes --> In-Flight Jobs, Rejections, Timeouts, and Coalescing Ratios (GET Operation)
+@app.get('/executor_stats')
+async def executor_stats() :
+    return ORJSONResponse({
+        'rtma' : {**rtma_lane.stats(), 'coalescing' : rtma_flights.stats()} ,
+        'sensor' : {**sensor_lane.stats(), 'coalescing' : sensor_flights.stats()} ,
+        'alarm' : {**alarm_lane.stats(), 'coalescing' : alarm_flights.stats()} ,
+        'stream' : stream_lane.stats() ,
+    })
+
+
+# Prometheus Metrics --> Request / Stage Latency Histograms, Byte Counters, Lane and Cache Gauges (GET Operation)
+@app.get('/metrics')
+async def metrics() :
+    return Response(content=pipeline_metrics.render(), media_type=METRICS_MEDIA_TYPE)
+
+
+# RTMA Ingest Scheduler --> Status and Lag Report (GET Operation)
+@app.get('/ingest_status')
+async def ingest_status() :
+    if rtma_ingest is None :
+        return ORJSONResponse({'enabled' : False, 'running' : False})
+    return ORJSONResponse({'enabled' : True, **rtma_ingest.report()})
 
 
 
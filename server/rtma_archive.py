@@ -0,0 +1,67 @@
+## --------------------------------------------------------------------------------------- ##
+##  RTMA Archive Backfill: Append Historical RTMA Hours to the Zarr Archive                ##
+## ~ Crops 2t/10u/10v (plus optional fields) per Region, Resumable, with Gap Reports ~     ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Run from the `server/` directory (the server reads the same store through `RTMA_ARCHIVE`):
+### python rtma_archive.py --store rtma_archive.zarr --start 2024-06-01 --end 2024-08-31 --workers 8
+### python rtma_archive.py --store rtma_archive.zarr --start 2024-06-01 --end 2024-08-31 --variables 2t 10u 10v 2sh sp
+### python rtma_archive.py --store rtma_archive.zarr --start 2024-06-01 --end 2024-08-31 --report
+# SeaweedFS gateway (`start_seaweedfs.sh`):
+### RTMA_ARCHIVE_S3_ENDPOINT=http://127.0.0.1:8333 python rtma_archive.py --store s3://rtma-archive/rtma.zarr ...
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import argparse
+import datetime
+import orjson
+from Pipelines.NOAA.RTMA.RTMA_Archive import RTMA_Archive
+from Pipelines.NOAA.RTMA.RTMA_Archive_Backfill import backfill_archive
+from Pipelines.NOAA.RTMA.RTMA_Grib_Reader import RTMA_FILTER_KEYS
+from Pipelines.NOAA.RTMA.RTMA_Region import resolve_region
+
+
+def parse_hour(value, end=False) -> datetime.datetime :
+    # `YYYY-MM-DD` (whole day) or `YYYY-MM-DDTHH`
+    if len(value) == 10 :
+        day = datetime.datetime.strptime(value, '%Y-%m-%d')
+        return day + datetime.timedelta(hours=23) if end else day
+    return datetime.datetime.strptime(value, '%Y-%m-%dT%H')
+
+
+def archive_filter_keys(short_names) -> list :
+    # Pipeline filter keys for 2t/10u/10v, plain `shortName` matches for any other field
+    known = {key['shortName'] : key for key in RTMA_FILTER_KEYS}
+    return [known.get(short_name, {'shortName' : short_name}) for short_name in short_names]
+
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='Backfill the RTMA Zarr archive')
+    parser.add_argument('--store', required=True, help='Archive directory or fsspec URL (e.g. s3://bucket/rtma.zarr)')
+    parser.add_argument('--start', required=True, help='First hour, YYYY-MM-DD or YYYY-MM-DDTHH (UTC)')
+    parser.add_argument('--end', required=True, help='Last hour, YYYY-MM-DD or YYYY-MM-DDTHH (UTC)')
+    parser.add_argument('--region', action='append', default=None, help='Preset region name (repeatable)')
+    parser.add_argument('--variables', nargs='+', default=['2t', '10u', '10v'], help='GRIB short names to archive')
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes (one archive day per job)')
+    parser.add_argument('--report', action='store_true', help='Only report coverage and gaps of the range')
+    args = parser.parse_args()
+
+    start, end = parse_hour(args.start), parse_hour(args.end, end=True)
+    for region in [resolve_region(region) for region in (args.region or [None])] :
+        if args.report :
+            archive = RTMA_Archive(args.store)
+            summary = {
+                **archive.coverage(region) ,
+                'gaps' : [[first.isoformat(), last.isoformat()] for first, last in archive.gaps(region, start, end)] ,
+            }
+        else :
+            summary = backfill_archive(
+                args.store, start, end, region, archive_filter_keys(args.variables), workers=args.workers
+            )
+        print(orjson.dumps(summary).decode(), flush=True)
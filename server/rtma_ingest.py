@@ -0,0 +1,46 @@
+## --------------------------------------------------------------------------------------- ##
+##  RTMA Ingest Sidecar: Pre-Render Newly Published RTMA Hours                             ##
+## ~ Polls the NOAA RTMA Bucket, Backfills a Trailing Window, Fills the Product Cache ~    ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Run next to the server (sharing `RTMA_CACHE_DIR` so the server reads the pre-rendered hours):
+### python rtma_ingest.py --hours 24 --workers 2 --poll 120 --region southern_california
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import argparse
+import time
+import orjson
+from Pipelines.NOAA.RTMA.RTMA_Ingest import RTMA_Ingest_Scheduler
+from Pipelines.NOAA.RTMA.RTMA_Region import resolve_region
+
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='Background RTMA ingest scheduler')
+    parser.add_argument('--hours', type=int, default=24, help='Trailing window (hours) to backfill and keep current')
+    parser.add_argument('--workers', type=int, default=2, help='Hours retrieved and rendered concurrently')
+    parser.add_argument('--poll', type=float, default=120, help='Seconds between bucket polls')
+    parser.add_argument('--region', action='append', default=None, help='Preset region name (repeatable)')
+    args = parser.parse_args()
+
+    scheduler = RTMA_Ingest_Scheduler(
+        regions = [resolve_region(region) for region in (args.region or [None])] ,
+        trailing_hours = args.hours ,
+        workers = args.workers ,
+        poll_interval = args.poll ,
+    )
+    scheduler.start()
+
+    # Report status and lag once per poll interval
+    try:
+        while True :
+            time.sleep(args.poll)
+            print(orjson.dumps(scheduler.report()).decode(), flush=True)
+    except KeyboardInterrupt :
+        scheduler.stop()
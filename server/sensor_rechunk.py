@@ -0,0 +1,40 @@
+## --------------------------------------------------------------------------------------- ##
+##  Sensor Dataset Conversion: Build the Pixel-Major (Time-Series) Copy of combined.nc     ##
+## ~ Small Spatial Tiles with Long Time Runs, Compressed --> Few Chunk Reads per Point ~    ##
+## --------------------------------------------------------------------------------------- ##
+##  Ryan Paul Lafler, M.Sc.                                                                ##
+##  Copyright 2024 by Ryan Paul Lafler and Premier Analytics Consulting, LLC.              ##
+##  E-mail: rplafler@premier-analytics.com                                                 ##
+## --------------------------------------------------------------------------------------- ##
+
+# Run from the `server/` directory after every update of `combined.nc`:
+### python sensor_rechunk.py --source combined.nc --tile 8 --level 4
+
+
+# ---------------------------------------------- #
+#                 Library Imports                #
+# ---------------------------------------------- #
+import argparse
+import os
+import time
+import orjson
+from Pipelines.Sensors.Sensor_Rechunk import PIXEL_TILE, PIXEL_COMPRESSION_LEVEL, write_pixel_major
+
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='Write the pixel-major copy of the sensor dataset')
+    parser.add_argument('--source', default='combined.nc', help='Map-oriented sensor dataset')
+    parser.add_argument('--output', default=None, help='Pixel-major copy (default: <source>.pixel.nc)')
+    parser.add_argument('--tile', type=int, default=PIXEL_TILE, help='Spatial tile edge (pixels) per chunk')
+    parser.add_argument('--level', type=int, default=PIXEL_COMPRESSION_LEVEL, help='gzip compression level')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    output = write_pixel_major(args.source, args.output, tile=args.tile, level=args.level)
+    print(orjson.dumps({
+        'source' : args.source ,
+        'output' : output ,
+        'source_bytes' : os.path.getsize(args.source) ,
+        'output_bytes' : os.path.getsize(output) ,
+        'seconds' : time.perf_counter() - start ,
+    }).decode())